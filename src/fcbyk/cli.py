@@ -1,4 +1,8 @@
 #!/usr/bin/env python3
+# 协程补丁必须先于其它任何导入（见 fcbyk.utils.asyncmode，slide --async-mode 使用）
+from fcbyk.utils import asyncmode
+asyncmode.patch_from_env()
+
 import click, random, os
 from fcbyk import commands, defaults
 from fcbyk.utils import storage
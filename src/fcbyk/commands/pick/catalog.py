@@ -0,0 +1,118 @@
+"""
+pick 文件目录缓存
+files 模式下的可抽取文件列表：用 os.scandir 扫描一次后缓存为不可变快照，
+只在目录 mtime 变化（最多每 check_interval 秒检查一次）或管理员手动重扫时刷新。
+version 由文件列表内容（文件名 + 大小）计算：多进程模式下各 worker 看到相同文件时
+version 一致，客户端带着任一 worker 返回的 ETag 访问其它 worker 也能命中 304。
+"""
+import hashlib
+import os
+import threading
+import time
+from collections import namedtuple
+from types import MappingProxyType
+from typing import Iterator, Optional, Tuple
+
+
+FileEntry = namedtuple('FileEntry', ['name', 'path', 'size'])
+
+# 两次 mtime 检查之间的最小间隔（秒），间隔内的请求完全不访问文件系统
+CATALOG_CHECK_INTERVAL = 1.0
+
+
+def catalog_version(files: Tuple[FileEntry, ...]) -> int:
+    """文件列表的内容摘要（48 位，前端可按普通数字比较；不会为 0）"""
+    h = hashlib.blake2b(digest_size=6, person=b'fcbyk-files')
+    for f in files:
+        h.update(f.name.encode('utf-8', 'surrogateescape'))
+        h.update(b'\0%d\n' % f.size)
+    return int.from_bytes(h.digest(), 'big') or 1
+
+
+class CatalogSnapshot:
+    """某一时刻的文件列表（只读）"""
+
+    __slots__ = ('files', 'by_name', 'version')
+
+    def __init__(self, files: Tuple[FileEntry, ...], version: Optional[int] = None):
+        self.files = files
+        self.by_name = MappingProxyType({f.name: f for f in files})
+        self.version = catalog_version(files) if version is None else version
+
+    def __len__(self) -> int:
+        return len(self.files)
+
+    def __iter__(self) -> Iterator[FileEntry]:
+        return iter(self.files)
+
+    def __bool__(self) -> bool:
+        return bool(self.files)
+
+    def get(self, name: str) -> Optional[FileEntry]:
+        return self.by_name.get(name)
+
+
+def scan_files(root: str) -> Tuple[FileEntry, ...]:
+    """扫描单个文件或目录（不递归），按文件名排序"""
+    if not root:
+        return ()
+    try:
+        if os.path.isfile(root):
+            return (FileEntry(os.path.basename(root), root, os.path.getsize(root)),)
+        entries = []
+        with os.scandir(root) as it:
+            for entry in it:
+                try:
+                    if entry.is_file():
+                        entries.append(FileEntry(entry.name, entry.path, entry.stat().st_size))
+                except OSError:
+                    continue
+    except OSError:
+        return ()
+    entries.sort(key=lambda f: f.name)
+    return tuple(entries)
+
+
+class FileCatalog:
+    """文件列表缓存，线程安全"""
+
+    def __init__(self, root: str, check_interval: float = CATALOG_CHECK_INTERVAL):
+        self.root = root
+        self.check_interval = check_interval
+        self._lock = threading.Lock()
+        self._snapshot: Optional[CatalogSnapshot] = None
+        self._mtime = None
+        self._checked_at = 0.0
+
+    def _stat_mtime(self):
+        try:
+            return os.stat(self.root).st_mtime_ns
+        except OSError:
+            return None
+
+    def _scan(self, mtime) -> CatalogSnapshot:
+        files = scan_files(self.root)
+        if self._snapshot is None or files != self._snapshot.files:
+            self._snapshot = CatalogSnapshot(files)
+        self._mtime = mtime
+        self._checked_at = time.monotonic()
+        return self._snapshot
+
+    def snapshot(self) -> CatalogSnapshot:
+        """返回当前快照；必要时检查 mtime 并重新扫描"""
+        snap = self._snapshot
+        if snap is not None and time.monotonic() - self._checked_at < self.check_interval:
+            return snap
+        with self._lock:
+            if self._snapshot is not None and time.monotonic() - self._checked_at < self.check_interval:
+                return self._snapshot
+            mtime = self._stat_mtime()
+            if self._snapshot is not None and mtime == self._mtime:
+                self._checked_at = time.monotonic()
+                return self._snapshot
+            return self._scan(mtime)
+
+    def rescan(self) -> CatalogSnapshot:
+        """强制重新扫描（例如目录内文件内容被替换但目录 mtime 未变）"""
+        with self._lock:
+            return self._scan(self._stat_mtime())
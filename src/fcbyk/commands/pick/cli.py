@@ -5,7 +5,22 @@ from fcbyk.utils.network import get_private_networks
 
 from fcbyk.cli_support.guard import check_port
 
-from .controller import start_web_server
+from .controller import start_web_server, service, parse_trusted_proxies
+from .codes import MAX_CODE_LENGTH
+
+
+# 通过 servers stop / kill 结束属于正常停止：清除抽奖日志，下次启动不会把上一轮当作崩溃恢复
+# （Windows 上 taskkill /F 不会触发服务自身的退出逻辑）
+svc_core.register_stop_hook('pick', service.discard_recovery)
+
+
+def _validate_trusted_proxies(ctx, param, value):
+    try:
+        parse_trusted_proxies(value)
+    except ValueError as e:
+        raise click.BadParameter(str(e))
+    return value
+
 
 @click.command(name='pick', help='Start web picker server')
 @click.option('--port', '-p', default=80, show_default=True, type=int, help='Port for web mode')
@@ -19,9 +34,27 @@ from .controller import start_web_server
     hidden=True
 )
 @click.option('-D', '--daemon', is_flag=True, help='Run web or file picker server in background')
+@click.option('--workers', '-w', default=1, show_default=True, type=click.IntRange(min=1), help='Worker processes for file picker server (POSIX only)')
+@click.option(
+    '--trusted-proxy', 'trusted_proxies', multiple=True, callback=_validate_trusted_proxies,
+    help='Reverse proxy address (IP or CIDR, repeatable); requests from it are identified by X-Forwarded-For',
+)
+@click.option('--gen-codes', 'gen_codes', type=click.IntRange(min=1), help='Generate N redeem codes, print them and exit')
+@click.option('--code-length', default=4, show_default=True, type=click.IntRange(1, MAX_CODE_LENGTH), help='Length of generated redeem codes')
+@click.option('--csv', 'as_csv', is_flag=True, help='Print generated redeem codes as CSV')
 @click.pass_context
-def pick(ctx, port, no_browser, files, password, daemon_password, daemon):
+def pick(
+    ctx, port, no_browser, files, password, daemon_password, daemon, workers, trusted_proxies,
+    gen_codes, code_length, as_csv,
+):
 
+    # 只生成兑换码：写入持久化后逐行输出，不启动服务
+    if gen_codes:
+        if as_csv:
+            click.echo('code')
+        for codes in service.iter_mint_redeem_codes_in_storage(gen_codes, code_length):
+            click.echo('\n'.join(codes))
+        return
 
     # 端口占用检测
     if not check_port(port):
@@ -48,6 +81,8 @@ def pick(ctx, port, no_browser, files, password, daemon_password, daemon):
                 no_browser=no_browser,
                 files_root=files,
                 admin_password=effective_password,
+                workers=workers,
+                trusted_proxies=trusted_proxies,
             )
             return
 
@@ -58,6 +93,10 @@ def pick(ctx, port, no_browser, files, password, daemon_password, daemon):
             str(port),
         ]
         args.append('--no-browser')
+        if workers > 1:
+            args.extend(['--workers', str(workers)])
+        for proxy in trusted_proxies:
+            args.extend(['--trusted-proxy', proxy])
         if effective_password:
             args.extend(['--daemon-password', effective_password])
         
@@ -77,6 +116,8 @@ def pick(ctx, port, no_browser, files, password, daemon_password, daemon):
     if daemon:
         args = ['--port', str(port)]
         args.append('--no-browser')
+        for proxy in trusted_proxies:
+            args.extend(['--trusted-proxy', proxy])
         
         # 输出地址信息（与 lansend/slide 保持一致）
         click.echo()
@@ -102,4 +143,4 @@ def pick(ctx, port, no_browser, files, password, daemon_password, daemon):
     else:
         admin_password = '123456'
     
-    start_web_server(port, no_browser, admin_password=admin_password)
+    start_web_server(port, no_browser, admin_password=admin_password, trusted_proxies=trusted_proxies)
@@ -0,0 +1,431 @@
+"""
+pick 兑换码存储
+基于 SQLite 的兑换码持久化：每次新增/核销/重置只改一行，不再整文件重写 JSON。
+批量生成使用带密钥的 Feistel 置换把自增计数器映射到码空间，生成的兑换码天然不重复。
+"""
+import hashlib
+import os
+import secrets
+import string
+import threading
+from collections.abc import MutableMapping
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from fcbyk.utils import storage
+
+
+def normalize_code(code) -> str:
+    """兑换码统一去空白并转大写"""
+    return str(code or '').strip().upper()
+
+
+def _entry_digest(code: str, used: bool) -> int:
+    """单个兑换码状态的 48 位摘要（异或累加后作为 RedeemCodeRegistry.version）"""
+    data = ('%s\0%d' % (code, used)).encode('utf-8', 'surrogateescape')
+    return int.from_bytes(hashlib.blake2b(data, digest_size=6).digest(), 'big')
+
+
+class RedeemCodeRegistry(MutableMapping):
+    """内存中的兑换码状态 {code: used}
+
+    用法与 dict 相同，额外增量维护：
+    - total / used 计数：状态接口 O(1) 返回统计，不再每次全量扫描；
+    - version：全部 (code, used) 摘要的异或，只由内容决定，
+      多进程模式下各 worker 同步到相同状态时 version 一致，客户端可据此跳过未变化的轮询。
+    """
+
+    def __init__(self, codes: Optional[Dict[str, bool]] = None):
+        self._lock = threading.Lock()
+        self._codes: Dict[str, bool] = {}
+        self._used = 0
+        self.version = 0
+        if codes:
+            self.replace(codes)
+
+    def __getitem__(self, code: str) -> bool:
+        return self._codes[code]
+
+    def __setitem__(self, code: str, used) -> None:
+        used = bool(used)
+        with self._lock:
+            old = self._codes.get(code)
+            if old is used:
+                return
+            if old is not None:
+                self.version ^= _entry_digest(code, old)
+            if old:
+                self._used -= 1
+            if used:
+                self._used += 1
+            self._codes[code] = used
+            self.version ^= _entry_digest(code, used)
+
+    def __delitem__(self, code: str) -> None:
+        with self._lock:
+            used = self._codes.pop(code)
+            if used:
+                self._used -= 1
+            self.version ^= _entry_digest(code, used)
+
+    def __contains__(self, code) -> bool:
+        return code in self._codes
+
+    def __iter__(self):
+        return iter(list(self._codes))
+
+    def __len__(self) -> int:
+        return len(self._codes)
+
+    def __repr__(self) -> str:
+        return 'RedeemCodeRegistry(%r)' % (self._codes,)
+
+    def replace(self, codes: Dict[str, bool]) -> None:
+        """整体替换内容"""
+        new_codes = {str(k): bool(v) for k, v in dict(codes).items()}
+        version = 0
+        for code, used in new_codes.items():
+            version ^= _entry_digest(code, used)
+        with self._lock:
+            self._codes = new_codes
+            self._used = sum(1 for v in new_codes.values() if v)
+            self.version = version
+
+    def clear(self) -> None:
+        self.replace({})
+
+    def snapshot(self) -> Dict[str, bool]:
+        """返回当前内容的副本"""
+        with self._lock:
+            return dict(self._codes)
+
+    @property
+    def total(self) -> int:
+        return len(self._codes)
+
+    @property
+    def used(self) -> int:
+        return self._used
+
+    def stats(self) -> Tuple[int, int, int]:
+        """返回 (总数, 已用数, version)，三者保证来自同一时刻"""
+        with self._lock:
+            return len(self._codes), self._used, self.version
+
+
+CODE_CHARSET = string.ascii_uppercase + string.digits
+MAX_CODE_LENGTH = 16
+
+# Feistel 轮数
+_FEISTEL_ROUNDS = 6
+
+
+class CodePermutation:
+    """[0, len(charset)**length) 上的带密钥伪随机置换
+
+    把码空间拆成 a * b 两段做广义 Feistel（FE1），每一轮都是码空间上的双射：
+    不同的输入必然得到不同的输出，无需查重；没有密钥时无法从一个兑换码推出其它兑换码。
+    """
+
+    def __init__(self, key: bytes, length: int, charset: str = CODE_CHARSET):
+        self.length = length
+        self.charset = charset
+        base = len(charset)
+        self.size = base ** length
+        self._a = base ** (length // 2)
+        self._b = base ** (length - length // 2)
+        self._rounds = [
+            hashlib.blake2b(digest_size=8, key=key, person=b'fcbyk-pick-%02d' % r)
+            for r in range(_FEISTEL_ROUNDS)
+        ]
+
+    def permute(self, n: int) -> int:
+        a, b = self._a, self._b
+        for h in self._rounds:
+            left, right = divmod(n, b)
+            h = h.copy()
+            h.update(right.to_bytes(8, 'big'))
+            n = a * right + (left + int.from_bytes(h.digest(), 'big')) % a
+            a, b = b, a
+        return n
+
+    def encode(self, n: int) -> str:
+        charset, base = self.charset, len(self.charset)
+        out = []
+        for _ in range(self.length):
+            n, d = divmod(n, base)
+            out.append(charset[d])
+        return ''.join(reversed(out))
+
+    def code_at(self, counter: int) -> str:
+        """第 counter 个兑换码"""
+        return self.encode(self.permute(counter))
+
+
+class RedeemCodeStore:
+    """兑换码持久化存储
+
+    表结构：redeem_codes(code 主键, used 0/1)，按主键查找/更新为 O(log n)。
+    首次打开时会把旧版 pick_redeem_codes.json 中的兑换码导入（只导入一次，原文件保留）。
+    所有方法线程安全；连接在第一次使用时才打开。
+    """
+
+    def __init__(self, db_path: str, legacy_json_path: Optional[str] = None):
+        self.db_path = db_path
+        self.legacy_json_path = legacy_json_path
+        self._lock = threading.RLock()
+        self._conn = None
+
+    # -------------------- 连接与迁移 --------------------
+    def _connect(self):
+        if self._conn is not None:
+            return self._conn
+        conn = storage.connect_sqlite(self.db_path)
+        conn.execute(
+            "CREATE TABLE IF NOT EXISTS redeem_codes ("
+            " code TEXT PRIMARY KEY,"
+            " used INTEGER NOT NULL DEFAULT 0"
+            ") WITHOUT ROWID"
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)")
+        self._conn = conn
+        self._import_legacy_json()
+        return conn
+
+    def _import_legacy_json(self) -> None:
+        conn = self._conn
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'legacy_json_imported'").fetchone():
+            return
+
+        rows = []
+        path = self.legacy_json_path
+        if path and os.path.exists(path):
+            data = storage.load_json(path, default={}, strict=False)
+            codes = data.get('codes') if isinstance(data, dict) else None
+            if isinstance(codes, dict):
+                for k, v in codes.items():
+                    code = normalize_code(k)
+                    if not code:
+                        continue
+                    used = False
+                    if isinstance(v, dict):
+                        used = bool(v.get('used'))
+                    elif isinstance(v, bool):
+                        used = v
+                    rows.append((code, int(used)))
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            conn.executemany("INSERT OR IGNORE INTO redeem_codes (code, used) VALUES (?, ?)", rows)
+            conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('legacy_json_imported', '1')")
+            conn.execute("COMMIT")
+        except Exception:
+            conn.execute("ROLLBACK")
+            raise
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    # -------------------- 查询 --------------------
+    def load_all(self) -> Dict[str, bool]:
+        """读取全部兑换码 {code: used}"""
+        with self._lock:
+            rows = self._connect().execute("SELECT code, used FROM redeem_codes").fetchall()
+        return {code: bool(used) for code, used in rows}
+
+    def get(self, code: str) -> Optional[bool]:
+        """返回兑换码是否已使用；不存在返回 None"""
+        code = normalize_code(code)
+        with self._lock:
+            row = self._connect().execute("SELECT used FROM redeem_codes WHERE code = ?", (code,)).fetchone()
+        return None if row is None else bool(row[0])
+
+    def counts(self) -> Tuple[int, int]:
+        """返回 (总数, 已用数)"""
+        with self._lock:
+            total, used = self._connect().execute(
+                "SELECT COUNT(*), COALESCE(SUM(used), 0) FROM redeem_codes"
+            ).fetchone()
+        return int(total), int(used)
+
+    def iter_codes(self, only_unused: bool = False, batch_size: int = 1000) -> Iterator[Tuple[str, bool]]:
+        """按 code 排序分批迭代 (code, used)，不会一次性读入全部数据"""
+        sql = "SELECT code, used FROM redeem_codes WHERE code > ?"
+        if only_unused:
+            sql += " AND used = 0"
+        sql += " ORDER BY code LIMIT ?"
+
+        last = ''
+        while True:
+            with self._lock:
+                rows = self._connect().execute(sql, (last, batch_size)).fetchall()
+            if not rows:
+                return
+            for code, used in rows:
+                yield code, bool(used)
+            last = rows[-1][0]
+
+    def stream_codes(self, only_unused: bool = False, batch_size: int = 1000) -> Iterator[Tuple[str, bool]]:
+        """按 code 排序流式读取 (code, used)，用于大批量导出
+
+        使用独立的只读连接和一个读事务：导出内容是一致的快照，
+        WAL 模式下导出期间不阻塞核销/新增；内存占用只与 batch_size 有关。
+        """
+        with self._lock:
+            self._connect()
+        sql = "SELECT code, used FROM redeem_codes"
+        if only_unused:
+            sql += " WHERE used = 0"
+        sql += " ORDER BY code"
+
+        conn = storage.connect_sqlite(self.db_path)
+        try:
+            conn.execute("BEGIN")
+            cur = conn.execute(sql)
+            while True:
+                rows = cur.fetchmany(batch_size)
+                if not rows:
+                    break
+                for code, used in rows:
+                    yield code, bool(used)
+            conn.execute("COMMIT")
+        finally:
+            conn.close()
+
+    def export(self, only_unused: bool = False) -> List[Dict]:
+        """导出为 [{code, used}, ...]（按 code 排序）"""
+        return [{'code': code, 'used': used} for code, used in self.iter_codes(only_unused=only_unused)]
+
+    # -------------------- 修改 --------------------
+    def add(self, code: str) -> bool:
+        """新增兑换码，已存在返回 False"""
+        code = normalize_code(code)
+        if not code:
+            return False
+        with self._lock:
+            cur = self._connect().execute("INSERT OR IGNORE INTO redeem_codes (code, used) VALUES (?, 0)", (code,))
+        return cur.rowcount == 1
+
+    def add_many(self, codes: Iterable[str]) -> int:
+        """在一个事务内批量新增（已存在的忽略），返回实际新增数量"""
+        rows = [(c,) for c in (normalize_code(x) for x in codes) if c]
+        if not rows:
+            return 0
+        with self._lock:
+            conn = self._connect()
+            before = conn.total_changes
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.executemany("INSERT OR IGNORE INTO redeem_codes (code, used) VALUES (?, 0)", rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            return conn.total_changes - before
+
+    def _meta_get(self, key: str) -> Optional[str]:
+        row = self._conn.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return None if row is None else row[0]
+
+    def _meta_set(self, key: str, value: str) -> None:
+        self._conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)", (key, value))
+
+    def _mint_chunk(self, length: int, want: int) -> Tuple[List[str], bool]:
+        """在一个短事务内生成最多 want 个 length 位兑换码，返回 (新兑换码, 该长度码空间是否已用完)"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                key_hex = self._meta_get('mint_key')
+                if key_hex is None:
+                    key_hex = secrets.token_hex(16)
+                    self._meta_set('mint_key', key_hex)
+                perm = CodePermutation(bytes.fromhex(key_hex), length)
+                counter_key = 'mint_counter_%d' % length
+                # 计数器在事务内读取，多个进程同时生成也不会取到同一段
+                counter = int(self._meta_get(counter_key) or 0)
+
+                want = min(want, perm.size - counter)
+                batch = [perm.code_at(counter + i) for i in range(want)]
+                counter += want
+                fresh: List[str] = []
+                if batch:
+                    placeholders = ','.join('?' * len(batch))
+                    taken = {
+                        row[0] for row in conn.execute(
+                            "SELECT code FROM redeem_codes WHERE code IN (%s)" % placeholders, batch
+                        )
+                    }
+                    fresh = [c for c in batch if c not in taken]
+                    conn.executemany(
+                        "INSERT INTO redeem_codes (code, used) VALUES (?, 0)", [(c,) for c in fresh]
+                    )
+                    self._meta_set(counter_key, str(counter))
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+        return fresh, counter >= perm.size
+
+    def mint(self, count: int, length: int = 4, batch_size: int = 500) -> List[str]:
+        """批量生成 count 个新兑换码，返回新兑换码（按生成顺序），见 iter_mint"""
+        minted: List[str] = []
+        for fresh in self.iter_mint(count, length, batch_size):
+            minted.extend(fresh)
+        return minted
+
+    def iter_mint(self, count: int, length: int = 4, batch_size: int = 500) -> Iterator[List[str]]:
+        """批量生成 count 个新兑换码，每提交一批就产出该批的新兑换码
+
+        每个长度的码空间维护一个持久化计数器，依次取 CodePermutation 的输出，
+        只有与手动添加的兑换码撞上时才需要跳过；当前长度的码空间用完后自动加长一位。
+        每 batch_size 个码一个事务，两批之间释放锁，大批量生成期间核销不会被长时间阻塞；
+        中途出错（或调用方停止迭代）时已提交的批次保留。
+        """
+        count = int(count)
+        length = int(length)
+        if not 1 <= length <= MAX_CODE_LENGTH:
+            raise ValueError('length must be in 1..%d' % MAX_CODE_LENGTH)
+        minted = 0
+        while minted < count:
+            if length > MAX_CODE_LENGTH:
+                raise ValueError('redeem code space exhausted')
+            fresh, exhausted = self._mint_chunk(length, min(batch_size, count - minted))
+            minted += len(fresh)
+            if fresh:
+                yield fresh
+            if exhausted and minted < count:
+                length += 1
+
+    def delete(self, code: str) -> bool:
+        """删除兑换码，不存在返回 False"""
+        code = normalize_code(code)
+        with self._lock:
+            cur = self._connect().execute("DELETE FROM redeem_codes WHERE code = ?", (code,))
+        return cur.rowcount == 1
+
+    def clear(self) -> int:
+        """清空全部兑换码，返回清空前数量"""
+        with self._lock:
+            cur = self._connect().execute("DELETE FROM redeem_codes")
+        return max(cur.rowcount, 0)
+
+    def mark_used(self, code: str) -> bool:
+        """把未使用的兑换码标记为已使用（compare-and-set），成功返回 True"""
+        code = normalize_code(code)
+        with self._lock:
+            cur = self._connect().execute(
+                "UPDATE redeem_codes SET used = 1 WHERE code = ? AND used = 0", (code,)
+            )
+        return cur.rowcount == 1
+
+    def reset_unused(self, code: str) -> bool:
+        """把已使用的兑换码重置为未使用，成功返回 True"""
+        code = normalize_code(code)
+        with self._lock:
+            cur = self._connect().execute(
+                "UPDATE redeem_codes SET used = 0 WHERE code = ? AND used = 1", (code,)
+            )
+        return cur.rowcount == 1
@@ -1,14 +1,24 @@
 import os
+import ipaddress
+import json
+import threading
+import time
+import zlib
 import click
 import webbrowser
 import uuid
 from typing import Optional
-from flask import jsonify, request, send_file, url_for, Response
+from flask import jsonify, request, url_for, Response
 from fcbyk.utils import storage
 from fcbyk.utils.network import get_private_networks
 from datetime import datetime
 from .service import PickService
+from .codes import MAX_CODE_LENGTH
+from fcbyk.utils.ratelimit import SlidingWindowLimiter
+from .draw import DrawEngine, DrawError, InvalidCodeError
+from .events import EventBroker, format_sse
 from ...web.app import create_spa
+from ...web.transfer import FileCache, send_path
 
 # 持久化数据文件：~/.fcbyk/data/pick_data.json
 config_file = storage.get_path('pick_data.json', subdir='data')
@@ -25,9 +35,47 @@ app = create_spa(entry_html="pick.html", page=["/admin", "/f"])
 files_mode_root = None  # 指定目录或单文件路径（None 表示列表抽奖模式）
 ADMIN_PASSWORD = None
 
-# 服务实例
+# 单次大批量生成兑换码的上限
+BULK_GEN_MAX = 200000
+
+# SSE 连接的最长持续时间（秒）：到期后由浏览器按 retry 自动重连并用 Last-Event-ID 续传，
+# 避免空闲连接长期占用 waitress 工作线程
+SSE_STREAM_SECONDS = 25.0
+SSE_KEEPALIVE_SECONDS = 10.0
+SSE_RETRY_MS = 2000
+
+# waitress 工作线程数（SSE 长连接会各占用一个线程）
+SERVER_THREADS = 32
+# 同时保持的 SSE 连接上限，远小于线程数，保证抽奖、下载与管理接口始终有空闲线程；
+# 超出时返回 503，客户端改用 /api/files 的 ETag 条件轮询
+SSE_MAX_LISTENERS = SERVER_THREADS // 4
+# 建议降级轮询的间隔（秒）
+SSE_FALLBACK_POLL_SECONDS = 5
+
+# 服务实例（进程内共享，抽奖项由其 ItemStore 缓存并延迟写回）
 service = PickService(config_file, default_config)
 
+# 文件抽奖引擎：抽奖与管理端修改兑换码状态都经过它的锁串行化
+draw_engine = DrawEngine(service)
+
+# 奖品文件下载缓存：只缓存小文件，总量有上限
+download_cache = FileCache(max_bytes=64 * 1024 * 1024, max_file_size=8 * 1024 * 1024)
+
+# 抽奖事件推送（/api/files/events）
+event_broker = EventBroker()
+# SSE 连接占用的名额
+sse_slots = threading.BoundedSemaphore(SSE_MAX_LISTENERS)
+
+# 受信任的反向代理（ip_network 元组，由 --trusted-proxy 设置）。
+# 请求来自这些地址时，限流与抽奖改按 X-Forwarded-For 中的真实客户端地址识别
+TRUSTED_PROXIES = ()
+
+# 抽奖接口限流（按 TCP 对端地址计数；X-Forwarded-For 可被伪造，只在对端是受信任代理时采用）：
+# - pick_limiter：每个客户端的抽奖请求频率
+# - code_fail_limiter：兑换码错误 / 已使用的次数，超出后在访问任何存储之前直接拒绝
+pick_limiter = SlidingWindowLimiter(limit=20, window=10)
+code_fail_limiter = SlidingWindowLimiter(limit=10, window=60)
+
 
 def _require_admin_auth():
     if not ADMIN_PASSWORD:
@@ -51,13 +99,8 @@ def api_info():
 @app.route('/api/items')
 def api_items():
     """返回当前配置中的抽奖项"""
-    # 配置文件格式错误时，不直接让服务崩溃，回退到空列表
-    data = storage.load_json(config_file, default=default_config, create_if_missing=True, strict=False)
-    if not isinstance(data, dict):
-        data = default_config
-    items = data.get('items', [])
-    if not isinstance(items, list):
-        items = []
+    # 配置文件格式错误时由 ItemStore 回退到空列表，不会让服务崩溃
+    items = service.get_items()
     return jsonify({'items': items})
 
 
@@ -70,9 +113,7 @@ def api_items_add():
     if not item:
         return jsonify({'error': '元素不能为空'}), 400
     
-    # 创建临时 service 实例进行数据操作
-    temp_service = PickService(config_file, default_config)
-    success = temp_service.add_item(item)
+    success = service.add_item(item)
     
     if not success:
         return jsonify({'error': '元素已存在'}), 400
@@ -96,9 +137,7 @@ def api_items_batch():
     if not items:
         return jsonify({'error': '没有有效的元素'}), 400
     
-    # 创建临时 service 实例进行数据操作
-    temp_service = PickService(config_file, default_config)
-    duplicates = temp_service.add_items(items)
+    duplicates = service.add_items(items)
     
     return jsonify({
         'success': True,
@@ -116,9 +155,7 @@ def api_items_remove():
     if not item:
         return jsonify({'error': '元素不能为空'}), 400
     
-    # 创建临时 service 实例进行数据操作
-    temp_service = PickService(config_file, default_config)
-    success = temp_service.remove_item(item)
+    success = service.remove_item(item)
     
     if not success:
         return jsonify({'error': '元素不存在'}), 400
@@ -129,9 +166,7 @@ def api_items_remove():
 @app.route('/api/items/clear', methods=['DELETE'])
 def api_items_clear():
     """清空列表"""
-    # 创建临时 service 实例进行数据操作
-    temp_service = PickService(config_file, default_config)
-    count = temp_service.clear_items()
+    count = service.clear_items()
     
     return jsonify({'success': True, 'cleared_count': count})
 
@@ -145,20 +180,75 @@ def api_items_update():
     if not isinstance(items, list):
         return jsonify({'error': 'items 必须是列表'}), 400
     
-    # 创建临时 service 实例进行数据操作
-    temp_service = PickService(config_file, default_config)
-    temp_service.update_items(items)
+    service.update_items(items)
     
     return jsonify({'success': True, 'count': len(items)})
 
 
-def _get_client_ip():
-    """获取客户端 IP，优先 X-Forwarded-For（支持代理场景）"""
-    xff = request.headers.get('X-Forwarded-For', '')
-    if xff:
-        # X-Forwarded-For 可能包含多个 IP，取第一个
-        return xff.split(',')[0].strip()
-    return request.remote_addr or 'unknown'
+def _rate_limited(wait: float, message: str = '请求过于频繁，请稍后再试'):
+    resp = jsonify({'error': message, 'retry_after': round(wait, 1)})
+    resp.status_code = 429
+    resp.headers['Retry-After'] = str(int(wait) + 1)
+    return resp
+
+
+def parse_trusted_proxies(values) -> tuple:
+    """解析受信任代理列表（IP 或 CIDR），不合法时抛出 ValueError"""
+    return tuple(ipaddress.ip_network(v.strip(), strict=False) for v in values if v and v.strip())
+
+
+def _is_trusted_proxy(addr: str) -> bool:
+    try:
+        ip = ipaddress.ip_address(addr)
+    except ValueError:
+        return False
+    return any(ip in net for net in TRUSTED_PROXIES)
+
+
+def _client_ip() -> str:
+    """客户端地址：限流计数、IP 模式抽奖与抽奖历史统一使用
+
+    默认为 TCP 对端地址。对端是受信任代理时，从右向左跳过 X-Forwarded-For 中的受信任代理，
+    取第一个不受信任的地址：客户端自己伪造的左侧部分不会被采用。
+    """
+    addr = request.remote_addr or 'unknown'
+    if not TRUSTED_PROXIES or not _is_trusted_proxy(addr):
+        return addr
+    hops = [h.strip() for h in request.headers.get('X-Forwarded-For', '').split(',') if h.strip()]
+    for hop in reversed(hops):
+        if not _is_trusted_proxy(hop):
+            return hop
+        addr = hop
+    return addr
+
+
+def _draw_stats(files_version: Optional[int] = None) -> dict:
+    """当前抽奖计数（不含文件列表），用于事件推送"""
+    if service.redeem_codes:
+        total, used, version = service.redeem_codes.stats()
+        stats = {
+            'mode': 'code',
+            'total_codes': total,
+            'used_codes': used,
+            'draw_count': used,
+            'codes_version': version,
+        }
+    else:
+        stats = {'mode': 'ip', 'draw_count': len(service.ip_draw_records)}
+    if files_version is None and files_mode_root:
+        files_version = service.get_file_catalog(files_mode_root).snapshot().version
+    stats['files_version'] = files_version
+    stats['session_id'] = SERVER_SESSION_ID
+    return stats
+
+
+def _publish_stats(event: str = 'stats', files_version: Optional[int] = None, **extra) -> None:
+    """发布计数变化事件（files 模式下才有监听者）"""
+    if not files_mode_root:
+        return
+    data = _draw_stats(files_version)
+    data.update(extra)
+    event_broker.publish(event, data)
 
 
 @app.route('/api/files', methods=['GET'])
@@ -167,34 +257,115 @@ def api_files():
     if not files_mode_root:
         return jsonify({'error': 'files mode not enabled'}), 400
 
-    files = service.list_files(files_mode_root)
-    resp = {
-        'files': [{'name': f['name'], 'size': f['size']} for f in files],
-    }
-
-    resp['session_id'] = SERVER_SESSION_ID
+    snapshot = service.get_file_catalog(files_mode_root).snapshot()
 
     # 兑换码模式优先，否则使用 IP 限制模式
     if service.redeem_codes:
-        total = len(service.redeem_codes)
-        used = sum(1 for v in service.redeem_codes.values() if v)
-        resp.update({
+        total, used, version = service.redeem_codes.stats()
+        state = {
             'mode': 'code',
             'total_codes': total,
             'used_codes': used,
             'draw_count': used,
             'limit_per_code': 1,
-        })
+            'codes_version': version,
+        }
+        etag = '%s-f%d-c%d' % (SERVER_SESSION_ID, snapshot.version, version)
     else:
-        client_ip = _get_client_ip()
+        client_ip = _client_ip()
         picked = service.ip_draw_records.get(client_ip)
-        resp.update({
+        draw_count = len(service.ip_draw_records)
+        state = {
             'mode': 'ip',
-            'draw_count': len(service.ip_draw_records),
+            'draw_count': draw_count,
             'ip_picked': picked,
             'limit_per_ip': 1,
-        })
-    return jsonify(resp)
+        }
+        etag = '%s-f%d-i%d-%08x' % (
+            SERVER_SESSION_ID, snapshot.version, draw_count, zlib.crc32((picked or '').encode('utf-8')),
+        )
+
+    # 文件列表与抽奖状态都没变化时返回 304，轮询方不必重新下载整个列表
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        resp = {
+            'files': [{'name': f.name, 'size': f.size} for f in snapshot],
+            'session_id': SERVER_SESSION_ID,
+            'files_version': snapshot.version,
+        }
+        resp.update(state)
+        resp = jsonify(resp)
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'no-cache'
+    return resp
+
+
+@app.route('/api/files/events', methods=['GET'])
+def api_files_events():
+    """SSE：推送抽奖事件与计数变化，客户端不必轮询 /api/files
+
+    事件：
+        - stats: 计数变化（兑换码增删、重置、文件重扫等），连接建立时也会先发送一次
+        - draw: 有人抽中，附带 file
+        - reset: 断线期间错过了事件，客户端应重新拉取 /api/files
+
+    同时连接数超过 SSE_MAX_LISTENERS 时返回 503，客户端应改为条件轮询 /api/files。
+    """
+    if not files_mode_root:
+        return jsonify({'error': 'files mode not enabled'}), 400
+
+    try:
+        last = int(request.headers.get('Last-Event-ID') or request.args.get('last_id') or -1)
+    except ValueError:
+        last = -1
+
+    initial = None
+    if last < 0 or last > event_broker.last_seq:
+        # 新连接，或 Last-Event-ID 来自上一次启动的服务：先发送一份当前状态
+        last = event_broker.last_seq
+        initial = format_sse('stats', json.dumps(_draw_stats()), last)
+
+    slots = sse_slots
+    if not slots.acquire(blocking=False):
+        resp = jsonify({'error': 'too many listeners', 'poll_interval': SSE_FALLBACK_POLL_SECONDS})
+        resp.status_code = 503
+        resp.headers['Retry-After'] = str(SSE_FALLBACK_POLL_SECONDS)
+        return resp
+
+    released = []
+
+    def release():
+        # 响应关闭时释放（包括生成器从未开始迭代、客户端提前断开的情况），只释放一次
+        if not released:
+            released.append(True)
+            slots.release()
+
+    deadline = time.monotonic() + SSE_STREAM_SECONDS
+
+    def stream():
+        cursor = last
+        yield 'retry: %d\n\n' % SSE_RETRY_MS
+        if initial:
+            yield initial
+        while True:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                return
+            messages, latest, missed = event_broker.wait(cursor, min(SSE_KEEPALIVE_SECONDS, remaining))
+            if missed:
+                yield format_sse('reset', json.dumps(_draw_stats()), latest)
+            elif messages:
+                yield ''.join(messages)
+            else:
+                yield ': ping\n\n'
+            cursor = latest
+
+    resp = Response(stream(), content_type='text/event-stream; charset=utf-8')
+    resp.call_on_close(release)
+    resp.headers['Cache-Control'] = 'no-cache'
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
 
 
 @app.route('/api/files/pick', methods=['POST'])
@@ -207,78 +378,62 @@ def api_files_pick():
     if not files_mode_root:
         return jsonify({'error': 'files mode not enabled'}), 400
 
-    files = service.list_files(files_mode_root)
-    if not files:
+    client_ip = _client_ip()
+    wait = pick_limiter.hit(client_ip)
+    if wait:
+        return _rate_limited(wait)
+
+    snapshot = service.get_file_catalog(files_mode_root).snapshot()
+    if not snapshot:
         return jsonify({'error': 'no files available'}), 400
 
-    client_ip = _get_client_ip()
+    def _url_for_file(name):
+        return url_for('download_file', filename=name, _external=True)
 
-    # 兑换码模式优先
-    if service.redeem_codes:
-        data = request.get_json(silent=True) or {}
-        code = str(data.get('code', '')).strip().upper()
-        if not code:
-            return jsonify({'error': '请输入兑换码'}), 400
-        if code not in service.redeem_codes:
-            return jsonify({'error': '兑换码无效'}), 400
-        if service.redeem_codes[code]:
-            return jsonify({'error': '兑换码已被使用'}), 429
-
-        # 过滤掉当前 IP 已抽中过的文件
-        used_by_ip = service.ip_file_history.get(client_ip, set())
-        candidates = [f for f in files if f['name'] not in used_by_ip]
-        if not candidates:
-            return jsonify({'error': '本 IP 已无可抽取的文件'}), 400
-
-        selected = service.pick_file(candidates)
-        service.redeem_codes[code] = True
-        # 持久化标记已用
-        try:
-            service.mark_redeem_code_used_in_storage(code)
-        except Exception:
-            pass
-        service.ip_file_history.setdefault(client_ip, set()).add(selected['name'])
-        used = sum(1 for v in service.redeem_codes.values() if v)
-        download_url = url_for('download_file', filename=selected['name'], _external=True)
-        timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        # 保存兑换码的抽奖结果，用于页面刷新后恢复
-        service.code_results[code] = {
-            'file': {'name': selected['name'], 'size': selected['size']},
-            'download_url': download_url,
-            'timestamp': timestamp,
-        }
-        click.echo(
-            "[%s] %s draw file: %s successfully, redeem code: %s used, remaining redeem codes: %s"
-            % (timestamp, client_ip, selected['name'], code, (len(service.redeem_codes) - used))
-        )
-        return jsonify({
-            'file': {'name': selected['name'], 'size': selected['size']},
-            'download_url': download_url,
-            'mode': 'code',
-            'draw_count': used,
-            'total_codes': len(service.redeem_codes),
-            'used_codes': used,
-            'code': code,
-        })
+    try:
+        # 兑换码模式优先
+        if service.redeem_codes:
+            data = request.get_json(silent=True) or {}
+            code = str(data.get('code', '')).strip().upper()
+            if not code:
+                return jsonify({'error': '请输入兑换码'}), 400
+
+            wait = code_fail_limiter.retry_after(client_ip)
+            if wait:
+                return _rate_limited(wait, '兑换码错误次数过多，请稍后再试')
+
+            result = draw_engine.draw_with_code(code, client_ip, snapshot, _url_for_file)
+            _publish_stats('draw', snapshot.version, file=result.file['name'])
+            click.echo(
+                "[%s] %s draw file: %s successfully, redeem code: %s used, remaining redeem codes: %s"
+                % (result.timestamp, client_ip, result.file['name'], code, (result.total_codes - result.used_codes))
+            )
+            return jsonify({
+                'file': result.file,
+                'download_url': result.download_url,
+                'mode': 'code',
+                'draw_count': result.draw_count,
+                'total_codes': result.total_codes,
+                'used_codes': result.used_codes,
+                'code': code,
+            })
+
+        # IP 限制模式
+        result = draw_engine.draw_by_ip(client_ip, snapshot, _url_for_file)
+        _publish_stats('draw', snapshot.version, file=result.file['name'])
+    except DrawError as e:
+        if isinstance(e, InvalidCodeError):
+            code_fail_limiter.hit(client_ip)
+        resp = {'error': e.message}
+        resp.update(e.extra)
+        return jsonify(resp), e.status
 
-    # IP 限制模式
-    if client_ip in service.ip_draw_records:
-        return jsonify({'error': 'already picked', 'picked': service.ip_draw_records[client_ip]}), 429
-    used_by_ip = service.ip_file_history.get(client_ip, set())
-    candidates = [f for f in files if f['name'] not in used_by_ip]
-    if not candidates:
-        return jsonify({'error': '本 IP 已无可抽取的文件'}), 400
-
-    selected = service.pick_file(candidates)
-    service.ip_draw_records[client_ip] = selected['name']
-    service.ip_file_history.setdefault(client_ip, set()).add(selected['name'])
-    download_url = url_for('download_file', filename=selected['name'], _external=True)
     return jsonify({
-        'file': {'name': selected['name'], 'size': selected['size']},
-        'download_url': download_url,
+        'file': result.file,
+        'download_url': result.download_url,
         'mode': 'ip',
-        'draw_count': len(service.ip_draw_records),
-        'ip_picked': selected['name']
+        'draw_count': result.draw_count,
+        'ip_picked': result.file['name']
     })
 
 
@@ -301,14 +456,17 @@ def api_files_result(code):
 
 @app.route('/api/files/download/<path:filename>', methods=['GET'])
 def download_file(filename):
-    """下载指定文件，受限于文件模式根目录（带路径安全检查）"""
+    """下载指定文件，受限于文件模式根目录（带路径安全检查）
+
+    支持 ETag / Range；小文件从 download_cache 发送，抽奖后大量客户端同时下载时不重复读盘。
+    """
     if not files_mode_root:
         return jsonify({'error': 'files mode not enabled'}), 400
 
     if os.path.isfile(files_mode_root):
         if filename != os.path.basename(files_mode_root):
             return jsonify({'error': 'file not found'}), 404
-        return send_file(files_mode_root, as_attachment=True, download_name=filename)
+        return send_path(files_mode_root, download_name=filename, cache=download_cache)
 
     # 防止路径穿越攻击
     safe_root = os.path.abspath(files_mode_root)
@@ -317,17 +475,14 @@ def download_file(filename):
         return jsonify({'error': 'invalid path'}), 400
     if not os.path.isfile(target_path):
         return jsonify({'error': 'file not found'}), 404
-    return send_file(target_path, as_attachment=True, download_name=os.path.basename(target_path))
+    return send_path(target_path, download_name=os.path.basename(target_path), cache=download_cache)
 
 
 @app.route('/api/pick', methods=['POST'])
 def api_pick_item():
     """从配置列表中随机抽取一项"""
-    data = storage.load_json(config_file, default=default_config, create_if_missing=True, strict=False)
-    if not isinstance(data, dict):
-        data = default_config
-    items = data.get('items', [])
-    if not isinstance(items, list) or not items:
+    items = service.get_items()
+    if not items:
         return jsonify({'error': 'no items available'}), 400
     selected = service.pick_random_item(items)
     return jsonify({'item': selected, 'items': items})
@@ -353,17 +508,23 @@ def admin_codes():
     if auth is not None:
         return auth
 
-    codes_list = [{'code': code, 'used': used} for code, used in service.redeem_codes.items()]
-    total = len(codes_list)
-    used = sum(1 for c in codes_list if c['used'])
-    left = total - used
-
-    return jsonify({
-        'codes': codes_list,
-        'total_codes': total,   # 总数
-        'used_codes': used,     # 已用
-        'left_codes': left      # 剩余
-    })
+    # version 未变化时直接返回 304，管理页轮询不再重复下发完整列表
+    total, used, version = service.redeem_codes.stats()
+    etag = '%s-%d' % (SERVER_SESSION_ID, version)
+    if request.if_none_match.contains(etag):
+        resp = Response(status=304)
+    else:
+        codes_list = [{'code': c, 'used': u} for c, u in service.redeem_codes.snapshot().items()]
+        resp = jsonify({
+            'codes': codes_list,
+            'total_codes': total,   # 总数
+            'used_codes': used,     # 已用
+            'left_codes': total - used,  # 剩余
+            'version': version,
+        })
+    resp.set_etag(etag)
+    resp.headers['Cache-Control'] = 'private, no-cache'
+    return resp
 
 
 @app.route('/api/admin/codes/add', methods=['POST'])
@@ -382,17 +543,20 @@ def admin_codes_add():
     if not all(c.isalnum() for c in code):
         return jsonify({'error': '兑换码只能包含字母和数字'}), 400
 
-    if code in service.redeem_codes:
-        return jsonify({'error': '兑换码已存在'}), 400
-
     # 内存态是本次 server 运行的权威来源；持久化仅用于 files 模式下的跨次启动恢复。
     # 因此：内存中不存在时应允许新增成功；即便持久化层提示已存在，也不应让 API 失败。
-    service.redeem_codes[code] = False
-    try:
-        service.add_redeem_code_to_storage(code)
-    except Exception:
-        # 持久化失败不影响管理员在当前会话内添加兑换码
-        pass
+    # 与抽奖一样先持锁并同步其它 worker 的变更，再判断是否存在
+    with draw_engine.lock:
+        service.sync_shared()
+        if code in service.redeem_codes:
+            return jsonify({'error': '兑换码已存在'}), 400
+        service.register_redeem_codes([code])
+        try:
+            service.add_redeem_code_to_storage(code)
+        except Exception:
+            # 持久化失败不影响管理员在当前会话内添加兑换码
+            pass
+    _publish_stats()
     click.echo("[%s] Admin added new redeem code: %s" % (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), code))
 
     return jsonify({
@@ -404,7 +568,7 @@ def admin_codes_add():
 
 @app.route('/api/admin/codes/gen', methods=['POST'])
 def admin_codes_gen():
-    """批量生成兑换码（单次最多 100）。"""
+    """批量生成兑换码（单次最多 100，更大批量见 /api/admin/codes/gen/bulk）。"""
     auth = _require_admin_auth()
     if auth is not None:
         return auth
@@ -425,10 +589,12 @@ def admin_codes_gen():
 
     new_codes = []
     try:
-        new_codes = service.generate_and_add_redeem_codes_to_storage(n)
+        with draw_engine.lock:
+            new_codes = service.generate_and_add_redeem_codes_to_storage(n)
     except Exception as e:
         return jsonify({'error': 'failed to generate codes: %s' % e}), 500
 
+    _publish_stats()
     click.echo(
         "[%s] Admin generated redeem codes: requested=%d generated=%d"
         % (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), n, len(new_codes))
@@ -442,6 +608,63 @@ def admin_codes_gen():
     })
 
 
+@app.route('/api/admin/codes/gen/bulk', methods=['POST'])
+def admin_codes_gen_bulk():
+    """大批量生成兑换码，生成结果以流的形式下载。
+
+    每提交一批（RedeemCodeStore.iter_mint）就登记到内存态并输出该批，不在内存中攒出完整列表；
+    下载中途断开时已输出的批次保留，其余不再生成。
+
+    Body:
+        {"count": 50000, "length": 4, "format": "text" | "csv"}
+    """
+    auth = _require_admin_auth()
+    if auth is not None:
+        return auth
+
+    data = request.get_json(silent=True) or {}
+    fmt = str(data.get('format', 'text')).strip().lower()
+    try:
+        n = int(data.get('count'))
+        length = int(data.get('length', 4))
+    except Exception:
+        return jsonify({'error': 'count and length must be int'}), 400
+
+    if n <= 0 or n > BULK_GEN_MAX:
+        return jsonify({'error': 'count must be in 1..%d' % BULK_GEN_MAX}), 400
+    if length < 1 or length > MAX_CODE_LENGTH:
+        return jsonify({'error': 'length must be in 1..%d' % MAX_CODE_LENGTH}), 400
+    if fmt not in ('text', 'csv'):
+        return jsonify({'error': 'format must be text or csv'}), 400
+
+    def generate():
+        generated = 0
+        if fmt == 'csv':
+            yield 'code\n'
+        try:
+            # 生成与写库不持有抽奖锁，只在登记到内存态时短暂加锁
+            for fresh in service.iter_mint_redeem_codes_in_storage(n, length):
+                with draw_engine.lock:
+                    service.register_redeem_codes(fresh)
+                generated += len(fresh)
+                yield '\n'.join(fresh) + '\n'
+        except Exception as e:
+            click.echo(" Error: bulk redeem code generation stopped: %s" % e)
+        finally:
+            if generated:
+                _publish_stats()
+            click.echo(
+                "[%s] Admin bulk generated redeem codes: requested=%d generated=%d"
+                % (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), n, generated)
+            )
+
+    mimetype = 'text/csv' if fmt == 'csv' else 'text/plain'
+    resp = Response(generate(), mimetype=mimetype + '; charset=utf-8')
+    resp.headers['Content-Disposition'] = 'attachment; filename=redeem_codes.%s' % ('csv' if fmt == 'csv' else 'txt')
+    resp.headers['X-Requested-Count'] = str(n)
+    return resp
+
+
 @app.route('/api/admin/codes/<code>', methods=['DELETE'])
 def admin_codes_delete(code):
     """删除单个兑换码。"""
@@ -453,31 +676,30 @@ def admin_codes_delete(code):
     if not code:
         return jsonify({'error': 'invalid code'}), 400
 
-    if code not in service.redeem_codes:
-        # 内存里都没有，直接视为不存在
-        return jsonify({'error': 'code not found'}), 404
-
-    was_used = bool(service.redeem_codes.get(code))
+    with draw_engine.lock:
+        service.sync_shared()
+        if code not in service.redeem_codes:
+            # 内存里都没有，直接视为不存在
+            return jsonify({'error': 'code not found'}), 404
+        was_used = bool(service.redeem_codes.get(code))
 
-    # 先删内存
-    try:
-        del service.redeem_codes[code]
-    except Exception:
-        pass
+        # 先删内存
+        try:
+            del service.redeem_codes[code]
+        except Exception:
+            pass
 
-    # 再删持久化
-    try:
-        service.delete_redeem_code_from_storage(code)
-    except Exception:
-        pass
+        # 再删持久化
+        try:
+            service.delete_redeem_code_from_storage(code)
+        except Exception:
+            pass
+        service.record({'op': 'code_del', 'code': code})
 
-    # 同时清理结果缓存（避免前端还能查到旧结果）
-    try:
-        if code in service.code_results:
-            del service.code_results[code]
-    except Exception:
-        pass
+        # 同时清理结果缓存（避免前端还能查到旧结果）；奖品视为已发出，不退回库存
+        service.forget_code_result(code)
 
+    _publish_stats()
     click.echo("[%s] Admin deleted redeem code: %s" % (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), code))
 
     return jsonify({'success': True, 'code': code, 'was_used': was_used})
@@ -495,18 +717,21 @@ def admin_codes_clear():
     if not confirm:
         return jsonify({'error': 'confirm required'}), 400
 
-    before = len(service.redeem_codes)
+    with draw_engine.lock:
+        before = len(service.redeem_codes)
 
-    # 清内存
-    service.redeem_codes = {}
-    service.code_results = {}
+        # 清内存
+        service.redeem_codes = {}
+        service.forget_code_result()
 
-    # 清持久化
-    try:
-        service.clear_redeem_codes_in_storage()
-    except Exception:
-        pass
+        # 清持久化
+        try:
+            service.clear_redeem_codes_in_storage()
+        except Exception:
+            pass
+        service.record({'op': 'codes_clear'})
 
+    _publish_stats()
     click.echo("[%s] Admin cleared redeem codes: %d" % (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), before))
 
     return jsonify({'success': True, 'cleared': before})
@@ -514,7 +739,7 @@ def admin_codes_clear():
 
 @app.route('/api/admin/codes/<code>/reset', methods=['POST'])
 def admin_codes_reset(code):
-    """将单个兑换码重置为未使用。"""
+    """将单个兑换码重置为未使用，已抽中的奖品退回库存。"""
     auth = _require_admin_auth()
     if auth is not None:
         return auth
@@ -523,72 +748,201 @@ def admin_codes_reset(code):
     if not code:
         return jsonify({'error': 'invalid code'}), 400
 
-    if code not in service.redeem_codes:
-        return jsonify({'error': 'code not found'}), 404
-
-    # 内存重置
-    service.redeem_codes[code] = False
+    with draw_engine.lock:
+        service.sync_shared()
+        if code not in service.redeem_codes:
+            return jsonify({'error': 'code not found'}), 404
+        # 内存重置
+        service.redeem_codes[code] = False
+        service.record({'op': 'code_reset', 'code': code})
 
-    # 持久化重置
-    ok = None
-    try:
-        ok = service.reset_redeem_code_unused_in_storage(code)
-    except Exception:
+        # 持久化重置
         ok = None
+        try:
+            ok = service.reset_redeem_code_unused_in_storage(code)
+        except Exception:
+            ok = None
 
-    # 清理结果缓存：reset 后不应再能查询到上一次抽奖结果
-    try:
-        if code in service.code_results:
-            del service.code_results[code]
-    except Exception:
-        pass
+        # 持久化由已使用变为未使用（多进程下只有一个 worker 成功）时退回奖品库存
+        refunded = service.refund_code_prize(code) if ok else None
+
+        # 清理结果缓存：reset 后不应再能查询到上一次抽奖结果
+        service.forget_code_result(code)
 
+    _publish_stats()
     click.echo("[%s] Admin reset redeem code to unused: %s" % (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), code))
 
-    return jsonify({'success': True, 'code': code, 'storage_reset': bool(ok)})
+    return jsonify({'success': True, 'code': code, 'storage_reset': bool(ok), 'prize_refunded': refunded})
+
+
+@app.route('/api/admin/files/rescan', methods=['POST'])
+def admin_files_rescan():
+    """强制重新扫描文件目录（文件内容被原地替换、目录 mtime 未变化时使用），多进程模式下所有 worker 一并重扫。"""
+    auth = _require_admin_auth()
+    if auth is not None:
+        return auth
+
+    if not files_mode_root:
+        return jsonify({'error': 'files mode not enabled'}), 400
+
+    with draw_engine.lock:
+        service.sync_shared()
+        snapshot = service.rescan_files(files_mode_root)
+    _publish_stats(files_version=snapshot.version)
+    return jsonify({'success': True, 'count': len(snapshot), 'files_version': snapshot.version})
+
+
+@app.route('/api/admin/ratelimit', methods=['GET'])
+def admin_ratelimit():
+    """查看抽奖接口限流统计。"""
+    auth = _require_admin_auth()
+    if auth is not None:
+        return auth
+
+    return jsonify({
+        'pick': pick_limiter.stats(),
+        'code_failures': code_fail_limiter.stats(),
+    })
+
+
+@app.route('/api/admin/prizes', methods=['GET'])
+def admin_prizes():
+    """查看奖品权重 / 库存配置。"""
+    auth = _require_admin_auth()
+    if auth is not None:
+        return auth
+
+    prizes, _version = service.prize_store.snapshot()
+    return jsonify({
+        'prizes': [
+            {'name': name, 'weight': weight, 'stock': stock}
+            for name, (weight, stock) in sorted(prizes.items())
+        ],
+    })
+
+
+@app.route('/api/admin/prizes', methods=['PUT'])
+def admin_prizes_update():
+    """整体设置奖品配置。
+
+    Body:
+        {"prizes": [{"name": "a.txt", "weight": 5, "stock": 100}, ...]}
+        - weight: 抽中权重（>= 0，默认 1）
+        - stock: 库存（>= 0），省略或 null 表示不限量
+        传空列表表示取消奖品配置，恢复等概率抽取。
+    """
+    auth = _require_admin_auth()
+    if auth is not None:
+        return auth
+
+    data = request.get_json(silent=True) or {}
+    items = data.get('prizes')
+    if not isinstance(items, list):
+        return jsonify({'error': 'prizes 必须是列表'}), 400
+
+    prizes = {}
+    for item in items:
+        if not isinstance(item, dict):
+            return jsonify({'error': 'invalid prize'}), 400
+        name = str(item.get('name', '')).strip()
+        if not name:
+            return jsonify({'error': 'prize name required'}), 400
+        try:
+            weight = float(item.get('weight', 1))
+            stock = item.get('stock')
+            stock = None if stock is None else int(stock)
+        except (TypeError, ValueError):
+            return jsonify({'error': 'invalid weight or stock: %s' % name}), 400
+        if weight < 0 or (stock is not None and stock < 0):
+            return jsonify({'error': 'weight and stock must be >= 0: %s' % name}), 400
+        prizes[name] = (weight, stock)
+
+    with draw_engine.lock:
+        service.prize_store.replace(prizes)
+        service.record({'op': 'prizes'})
+
+    click.echo("[%s] Admin updated prizes: %d" % (datetime.now().strftime('%Y-%m-%d %H:%M:%S'), len(prizes)))
+    return jsonify({'success': True, 'count': len(prizes)})
 
 
 @app.route('/api/admin/codes/export', methods=['GET'])
 def admin_codes_export():
-    """导出兑换码。
+    """导出兑换码（流式响应，边读库边发送）。
 
     Query:
         - only_unused=1: 仅导出未使用兑换码
-        - format=text: 返回纯文本，每行一个兑换码
+        - format=text: 纯文本，每行一个兑换码
+        - format=csv: CSV，列为 code,used
+        - format=ndjson: 每行一个 {"code", "used"} JSON 对象
 
-    默认返回 JSON（兼容旧调用方）。
+    默认返回 JSON（兼容旧调用方，结构不变）。
     """
     auth = _require_admin_auth()
     if auth is not None:
         return auth
 
     only_unused = str(request.args.get('only_unused', '')).strip() == '1'
-    fmt = str(request.args.get('format', '')).strip().lower()
+    fmt = str(request.args.get('format', '')).strip().lower() or 'json'
+    if fmt not in ('json', 'text', 'csv', 'ndjson'):
+        return jsonify({'error': 'unsupported format: %s' % fmt}), 400
 
     try:
-        exported = service.export_redeem_codes_from_storage(only_unused=only_unused)
+        rows = service.stream_redeem_codes_from_storage(only_unused=only_unused)
+        first = next(rows, None)
     except Exception as e:
         return jsonify({'error': 'export failed: %s' % e}), 500
 
-    # 纯文本导出：每行一个 code
+    def all_rows():
+        if first is not None:
+            yield first
+            for row in rows:
+                yield row
+
+    def chunked(render):
+        buf = []
+        for row in all_rows():
+            buf.append(render(row))
+            if len(buf) >= 1000:
+                yield ''.join(buf)
+                buf = []
+        if buf:
+            yield ''.join(buf)
+
     if fmt == 'text':
-        lines = []
-        for item in exported:
-            c = item.get('code')
-            if c:
-                lines.append(str(c))
-        text = "\n".join(lines)
-        return Response(text, mimetype='text/plain; charset=utf-8')
+        body = chunked(lambda r: r[0] + '\n')
+        mimetype = 'text/plain'
+    elif fmt == 'csv':
+        def body_csv():
+            yield 'code,used\n'
+            for chunk in chunked(lambda r: '%s,%d\n' % (r[0], r[1])):
+                yield chunk
+        body = body_csv()
+        mimetype = 'text/csv'
+    elif fmt == 'ndjson':
+        body = chunked(lambda r: json.dumps({'code': r[0], 'used': r[1]}) + '\n')
+        mimetype = 'application/x-ndjson'
+    else:
+        def body_json():
+            counts = [0, 0]
 
-    total = len(exported)
-    used = sum(1 for c in exported if c.get('used'))
+            def render(row):
+                sep = ',' if counts[0] else ''
+                counts[0] += 1
+                counts[1] += int(row[1])
+                return sep + json.dumps({'code': row[0], 'used': row[1]})
 
-    return jsonify({
-        'codes': exported,
-        'total_codes': total,
-        'used_codes': used,
-        'left_codes': total - used,
-    })
+            yield '{"codes":['
+            for chunk in chunked(render):
+                yield chunk
+            total, used = counts
+            yield '],"total_codes":%d,"used_codes":%d,"left_codes":%d}\n' % (total, used, total - used)
+        body = body_json()
+        mimetype = 'application/json'
+
+    resp = Response(body, content_type=mimetype + '; charset=utf-8')
+    resp.headers['Cache-Control'] = 'no-store'
+    resp.headers['X-Accel-Buffering'] = 'no'
+    return resp
 
 
 def start_web_server(
@@ -596,13 +950,52 @@ def start_web_server(
     no_browser: bool,
     files_root: Optional[str] = None,
     admin_password: Optional[str] = None,
+    workers: int = 1,
+    trusted_proxies=(),
 ) -> None:
-    """启动抽奖 Web 服务器"""
-    global files_mode_root, ADMIN_PASSWORD
+    """启动抽奖 Web 服务器
+
+    workers > 1 时（仅 files 模式、支持 fork 的系统）由多个进程共同监听同一端口，
+    抽奖状态通过共享 SQLite 库同步。
+    trusted_proxies 为反向代理地址（IP 或 CIDR），来自这些地址的请求按 X-Forwarded-For 识别客户端。
+    """
+    global files_mode_root, ADMIN_PASSWORD, SERVER_SESSION_ID, TRUSTED_PROXIES
     ADMIN_PASSWORD = admin_password
+    TRUSTED_PROXIES = parse_trusted_proxies(trusted_proxies)
     files_mode_root = os.path.abspath(files_root) if files_root else None
 
     service.reset_state()
+    pick_limiter.reset()
+    code_fail_limiter.reset()
+    if files_mode_root:
+        # 预先扫描一次文件目录，之后的抽奖/状态请求直接使用缓存快照
+        service.get_file_catalog(files_mode_root).snapshot()
+
+        if workers > 1 and not hasattr(os, 'fork'):
+            click.echo(" Note: --workers requires fork(), running a single process")
+            workers = 1
+
+        # 上次异常退出时留下了抽奖日志或共享库：回放恢复中奖记录，并沿用原会话 ID（前端历史不会被清空）
+        state, session_id, replayed = service.recover_draws()
+        if state is not None:
+            service.restore_state(state)
+            if session_id:
+                SERVER_SESSION_ID = session_id
+            click.echo(
+                " Recovered draw records from previous run: %d IP draws, %d code results (%d journal entries)"
+                % (len(state['ip_draw_records']), len(state['code_results']), replayed)
+            )
+        with draw_engine.lock:
+            if workers > 1:
+                # 多进程：共享库即本轮的持久化（恢复的记录写入共享库），单进程抽奖日志已不再需要
+                service.enable_shared_state(SERVER_SESSION_ID)
+                service.journal.close()
+            else:
+                service.journal.open(SERVER_SESSION_ID, service.journal_state)
+                service.discard_shared_state()
+    elif workers > 1:
+        click.echo(" Note: --workers only applies to files mode, running a single process")
+        workers = 1
 
     # 加载持久化兑换码（所有模式都支持）
     service.redeem_codes = service.load_redeem_codes_from_storage()
@@ -635,5 +1028,87 @@ def start_web_server(
         except Exception:
             click.echo(" Note: Could not auto-open browser, please visit the URL above")
     click.echo()
+    if workers > 1:
+        click.echo(f" Workers: {workers}")
+    from waitress import serve
+    _install_sigterm_handler()
+    try:
+        if workers > 1:
+            _serve_workers(port, workers)
+        else:
+            serve(app, host='0.0.0.0', port=port, threads=SERVER_THREADS)
+    finally:
+        service.flush_items()
+        # 正常退出：本次抽奖结束，不再需要恢复
+        service.discard_recovery()
+
+
+def _install_sigterm_handler() -> None:
+    """svc stop 在 POSIX 上发送 SIGTERM：转成 KeyboardInterrupt，与 Ctrl+C 走同一条正常退出路径
+    （waitress 停止服务后，finally 中写回抽奖项并清除抽奖日志 / 共享库）"""
+    import signal
+    if threading.current_thread() is not threading.main_thread():
+        return
+
+    def _on_sigterm(signum, frame):
+        raise KeyboardInterrupt
+
+    signal.signal(signal.SIGTERM, _on_sigterm)
+
+
+def _sync_shared_state() -> None:
+    """worker 后台同步：应用其它 worker 的状态变更，并向本进程的 SSE 监听者推送"""
+    with draw_engine.lock:
+        applied = service.sync_shared()
+    if applied:
+        _publish_stats()
+
+
+def _serve_workers(port: int, workers: int) -> None:
+    """主进程监听端口后 fork 出 workers 个子进程，各自运行 waitress 并共享同一个监听 socket"""
+    import signal
+    import socket
     from waitress import serve
-    serve(app, host='0.0.0.0', port=port)
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind(('0.0.0.0', port))
+    sock.listen(1024)
+
+    # SQLite 连接不能跨 fork 使用
+    service.close_connections()
+
+    children = []
+    for i in range(workers):
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                service.shared.reopen('worker-%d-%d' % (i, os.getpid()))
+                service.shared.start_follower(_sync_shared_state)
+                serve(app, sockets=[sock], threads=SERVER_THREADS)
+            except BaseException:
+                code = 1
+            finally:
+                os._exit(code)
+        children.append(pid)
+
+    try:
+        for pid in children:
+            os.waitpid(pid, 0)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        # 退出过程中不再响应重复的 Ctrl+C，确保子进程都被回收
+        signal.signal(signal.SIGINT, signal.SIG_IGN)
+        for pid in children:
+            try:
+                os.kill(pid, signal.SIGTERM)
+            except OSError:
+                pass
+        for pid in children:
+            try:
+                os.waitpid(pid, 0)
+            except OSError:
+                pass
+        sock.close()
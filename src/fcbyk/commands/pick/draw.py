@@ -0,0 +1,199 @@
+"""
+pick 文件抽奖引擎
+所有会修改抽奖状态的操作都在同一把锁内完成（单一串行点），
+兑换码核销在持久化层再做一次 compare-and-set，保证同一兑换码 / 同一 IP 不会被重复抽取。
+多进程模式下 IP 占位同样落在共享库中，抽取前先同步其它 worker 的状态变更。
+"""
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, Optional
+
+from .catalog import CatalogSnapshot, FileEntry
+from .service import PickService
+
+
+class DrawError(Exception):
+    """抽奖失败，status 对应 HTTP 状态码，extra 会合并进错误响应"""
+
+    def __init__(self, message: str, status: int = 400, **extra):
+        super().__init__(message)
+        self.message = message
+        self.status = status
+        self.extra = extra
+
+
+class InvalidCodeError(DrawError):
+    """兑换码不存在或已被使用（用于统计猜码失败次数）"""
+
+
+@dataclass
+class DrawResult:
+    file: Dict
+    download_url: str
+    timestamp: str
+    mode: str
+    draw_count: int
+    code: Optional[str] = None
+    total_codes: int = 0
+    used_codes: int = 0
+
+
+class DrawEngine:
+    """文件抽奖引擎
+
+    - 兑换码模式：校验 -> 选文件 -> 持久化 CAS 核销 -> 更新内存，整个过程持有 lock。
+    - IP 模式：检查并写入 ip_draw_records 同样在 lock 内完成。
+    管理端修改兑换码状态（删除/重置/清空）时也应持有 lock，避免与抽奖交错。
+    """
+
+    # 多进程下库存 CAS 失败后的最大重抽次数
+    MAX_STOCK_RETRIES = 8
+
+    def __init__(self, service: PickService):
+        self.service = service
+        self.lock = threading.Lock()
+
+    def _ensure_remaining(self, client_ip: str, snapshot: CatalogSnapshot) -> None:
+        service = self.service
+        seen = service.ip_file_history.get(client_ip, set())
+        if service.prize_store.enabled():
+            prizes, version = service.prize_store.snapshot()
+            total, for_client = service.prize_sampler.available(snapshot, prizes, version, seen)
+            if total <= 0:
+                raise DrawError('奖品已全部抽完', 400)
+            if for_client <= 0:
+                raise DrawError('本 IP 已无可抽取的文件', 400)
+            return
+        if not service.file_sampler.remaining(client_ip, snapshot, seen):
+            raise DrawError('本 IP 已无可抽取的文件', 400)
+
+    def _sample_weighted(self, history, snapshot: CatalogSnapshot) -> FileEntry:
+        """按权重抽取并扣减库存；库存已被其它进程抢光时修正本地库存后重抽"""
+        service = self.service
+        prizes, version = service.prize_store.snapshot()
+        for _ in range(self.MAX_STOCK_RETRIES):
+            selected = service.prize_sampler.sample(snapshot, prizes, version, history)
+            if selected is None:
+                break
+            ok, stock = service.prize_store.consume(selected.name)
+            if ok:
+                service.prize_sampler.consume(selected.name)
+                return selected
+            service.prize_sampler.set_stock(selected.name, stock)
+        raise DrawError('奖品已全部抽完', 400)
+
+    def _sample(self, client_ip: str, snapshot: CatalogSnapshot) -> FileEntry:
+        """取出该 IP 未抽到过的文件（等概率 O(1) / 按权重 O(log n)），并记入 ip_file_history"""
+        history = self.service.ip_file_history.setdefault(client_ip, set())
+        if self.service.prize_store.enabled():
+            selected = self._sample_weighted(history, snapshot)
+        else:
+            selected = self.service.file_sampler.sample(client_ip, snapshot, history)
+        if selected is None:
+            raise DrawError('本 IP 已无可抽取的文件', 400)
+        history.add(selected.name)
+        return selected
+
+    def _claim_code_in_storage(self, code: str) -> bool:
+        """持久化层核销；返回 False 表示兑换码已被其它进程/会话用掉"""
+        try:
+            if self.service.mark_redeem_code_used_in_storage(code):
+                return True
+            # 持久化里不存在（例如仅在内存中新增）时以内存为准
+            return self.service.code_store.get(code) is not True
+        except Exception:
+            # 持久化失败不影响本次会话内的抽奖
+            return True
+
+    def draw_with_code(
+        self,
+        code: str,
+        client_ip: str,
+        snapshot: CatalogSnapshot,
+        url_for_file: Callable[[str], str],
+    ) -> DrawResult:
+        """使用兑换码抽取一个文件（每个兑换码仅能成功一次）"""
+        service = self.service
+        with self.lock:
+            service.sync_shared()
+            if code not in service.redeem_codes:
+                raise InvalidCodeError('兑换码无效', 400)
+            if service.redeem_codes[code]:
+                raise InvalidCodeError('兑换码已被使用', 429)
+
+            self._ensure_remaining(client_ip, snapshot)
+            if not self._claim_code_in_storage(code):
+                service.redeem_codes[code] = True
+                raise DrawError('兑换码已被使用', 429)
+
+            try:
+                selected = self._sample(client_ip, snapshot)
+            except DrawError:
+                # 已在持久化中核销，抽取失败时回滚，兑换码仍可再次使用
+                try:
+                    service.reset_redeem_code_unused_in_storage(code)
+                except Exception:
+                    pass
+                raise
+            service.redeem_codes[code] = True
+
+            file_info = {'name': selected.name, 'size': selected.size}
+            download_url = url_for_file(selected.name)
+            timestamp = datetime.now().strftime('%Y-%m-%d %H:%M:%S')
+            # 保存兑换码的抽奖结果，用于页面刷新后恢复
+            service.code_results[code] = {
+                'file': file_info,
+                'download_url': download_url,
+                'timestamp': timestamp,
+            }
+            service.record({'op': 'code', 'code': code, 'ip': client_ip, 'result': service.code_results[code]})
+            total, used, _version = service.redeem_codes.stats()
+
+        return DrawResult(
+            file=file_info,
+            download_url=download_url,
+            timestamp=timestamp,
+            mode='code',
+            draw_count=used,
+            code=code,
+            total_codes=total,
+            used_codes=used,
+        )
+
+    def draw_by_ip(
+        self,
+        client_ip: str,
+        snapshot: CatalogSnapshot,
+        url_for_file: Callable[[str], str],
+    ) -> DrawResult:
+        """IP 限制模式：每个 IP 仅能成功抽取一次"""
+        service = self.service
+        with self.lock:
+            service.sync_shared()
+            if client_ip in service.ip_draw_records:
+                raise DrawError('already picked', 429, picked=service.ip_draw_records[client_ip])
+
+            shared = service.shared
+            if shared is not None and not shared.claim_ip(client_ip):
+                # 其它 worker 已为该 IP 抽取（或正在抽取）
+                raise DrawError('already picked', 429, picked=shared.get_ip_file(client_ip))
+            try:
+                selected = self._sample(client_ip, snapshot)
+            except DrawError:
+                if shared is not None:
+                    shared.release_ip(client_ip)
+                raise
+            if shared is not None:
+                shared.set_ip_file(client_ip, selected.name)
+            service.ip_draw_records[client_ip] = selected.name
+            service.record({'op': 'ip', 'ip': client_ip, 'file': selected.name})
+            draw_count = len(service.ip_draw_records)
+
+        return DrawResult(
+            file={'name': selected.name, 'size': selected.size},
+            download_url=url_for_file(selected.name),
+            timestamp=datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+            mode='ip',
+            draw_count=draw_count,
+        )
@@ -0,0 +1,57 @@
+"""
+pick 事件推送
+抽奖 / 兑换码变化以事件形式发布到一个共享的环形缓冲区，SSE 连接各自按序号读取：
+每个事件只序列化一次，监听者再多也不会增加发布方的开销。
+"""
+import json
+import threading
+from collections import deque
+from typing import List, Optional, Tuple
+
+# 环形缓冲区保留的最近事件数；断线重连时 Last-Event-ID 早于缓冲区的客户端会收到 reset
+EVENT_BUFFER_SIZE = 256
+
+
+def format_sse(event: str, data: str, event_id: Optional[int] = None) -> str:
+    """编码为一条 SSE 消息"""
+    head = 'id: %d\n' % event_id if event_id is not None else ''
+    return '%sevent: %s\ndata: %s\n\n' % (head, event, data)
+
+
+class EventBroker:
+    """单生产者缓冲、多消费者按序号读取的事件中心，线程安全"""
+
+    def __init__(self, capacity: int = EVENT_BUFFER_SIZE):
+        self._cond = threading.Condition()
+        self._buffer = deque(maxlen=capacity)   # (seq, 已编码的 SSE 消息)
+        self._seq = 0
+
+    @property
+    def last_seq(self) -> int:
+        return self._seq
+
+    def publish(self, event: str, data: dict) -> int:
+        """发布事件，返回其序号"""
+        payload = json.dumps(data, ensure_ascii=False, separators=(',', ':'))
+        with self._cond:
+            self._seq += 1
+            self._buffer.append((self._seq, format_sse(event, payload, self._seq)))
+            self._cond.notify_all()
+            return self._seq
+
+    def wait(self, after: int, timeout: float) -> Tuple[List[str], int, bool]:
+        """等待序号大于 after 的事件
+
+        Returns:
+            (消息列表, 最新序号, 是否丢失了事件)；超时返回空列表。
+            丢失事件（after 早于缓冲区）时调用方应让客户端重新拉取完整状态。
+        """
+        with self._cond:
+            if self._seq <= after:
+                self._cond.wait(timeout)
+            if self._seq <= after:
+                return [], after, False
+            oldest = self._buffer[0][0]
+            missed = after + 1 < oldest
+            messages = [msg for seq, msg in self._buffer if seq > after]
+            return messages, self._seq, missed
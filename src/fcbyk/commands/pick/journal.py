@@ -0,0 +1,193 @@
+"""
+pick 抽奖日志
+files 模式下每次成功抽奖 / 管理端清理结果都追加一行 NDJSON，
+fsync 按时间窗口合并；每 snapshot_every 条记录写一次完整快照并截断日志。
+服务正常退出时删除日志；崩溃或被强制结束后再次启动会先回放快照 + 日志，恢复中奖记录。
+"""
+import json
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from fcbyk.utils import storage
+
+
+# 写入后最多延迟多久 fsync（秒）；进程崩溃不丢数据，断电最多丢失该窗口内的记录
+JOURNAL_FSYNC_INTERVAL = 0.2
+# 累计多少条记录后写一次快照并截断日志
+JOURNAL_SNAPSHOT_EVERY = 1000
+
+
+def empty_state() -> Dict:
+    return {'ip_draw_records': {}, 'ip_file_history': {}, 'code_results': {}}
+
+
+# 恢复时会回放的操作；其它操作（兑换码增删、奖品配置等）已各自持久化，不写入日志
+REPLAYED_OPS = frozenset(('ip', 'code', 'forget', 'forget_all'))
+
+
+def dump_state(state: Dict) -> Dict:
+    """状态转为可 JSON 序列化的形式（快照 / restore 记录）"""
+    return {
+        'ip_draw_records': state['ip_draw_records'],
+        'ip_file_history': {ip: sorted(names) for ip, names in state['ip_file_history'].items()},
+        'code_results': state['code_results'],
+    }
+
+
+def merge_state(state: Dict, data: Dict) -> None:
+    """把 dump_state 的结果合并到状态上"""
+    state['ip_draw_records'].update(data.get('ip_draw_records') or {})
+    for ip, names in (data.get('ip_file_history') or {}).items():
+        state['ip_file_history'].setdefault(ip, set()).update(names)
+    state['code_results'].update(data.get('code_results') or {})
+
+
+def apply_record(state: Dict, rec: Dict) -> None:
+    """把一条日志记录应用到状态上（重复应用结果不变，快照与日志有重叠时也能正确回放）"""
+    op = rec.get('op')
+    if op == 'restore':
+        # 启动时恢复的上一轮状态（多进程共享日志的第一条）
+        merge_state(state, rec['state'])
+    elif op == 'ip':
+        state['ip_draw_records'][rec['ip']] = rec['file']
+        state['ip_file_history'].setdefault(rec['ip'], set()).add(rec['file'])
+    elif op == 'code':
+        state['ip_file_history'].setdefault(rec['ip'], set()).add(rec['result']['file']['name'])
+        state['code_results'][rec['code']] = rec['result']
+    elif op == 'forget':
+        state['code_results'].pop(rec['code'], None)
+    elif op == 'forget_all':
+        state['code_results'].clear()
+
+
+class DrawJournal:
+    """追加写的抽奖日志 + 定期快照，线程安全
+
+    open() 之前 append 为空操作（测试、列表模式等不需要持久化的场景）。
+    """
+
+    def __init__(
+        self,
+        path: str,
+        snapshot_path: str,
+        fsync_interval: float = JOURNAL_FSYNC_INTERVAL,
+        snapshot_every: int = JOURNAL_SNAPSHOT_EVERY,
+    ):
+        self.path = path
+        self.snapshot_path = snapshot_path
+        self.fsync_interval = fsync_interval
+        self.snapshot_every = snapshot_every
+        self._lock = threading.Lock()
+        self._fh = None
+        self._state_fn: Optional[Callable[[], Dict]] = None
+        self._session_id = None
+        self._since_snapshot = 0
+        self._timer = None
+
+    # -------------------- 恢复 --------------------
+    def recover(self) -> Tuple[Optional[Dict], Optional[str], int]:
+        """读取上一次未正常退出时留下的快照与日志
+
+        Returns:
+            (状态, 会话 ID, 回放的日志条数)；没有可恢复的数据时状态为 None。
+        """
+        snap = storage.load_json(self.snapshot_path, default=None, strict=False)
+        if not isinstance(snap, dict) and not os.path.exists(self.path):
+            return None, None, 0
+
+        state = empty_state()
+        session_id = None
+        if isinstance(snap, dict):
+            session_id = snap.get('session_id')
+            merge_state(state, snap)
+
+        replayed = 0
+        try:
+            with open(self.path, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                    except ValueError:
+                        # 崩溃时可能留下半行，之后不会再有完整记录
+                        break
+                    if rec.get('op') == 'session':
+                        session_id = rec.get('id') or session_id
+                        continue
+                    apply_record(state, rec)
+                    replayed += 1
+        except OSError:
+            pass
+        return state, session_id, replayed
+
+    # -------------------- 写入 --------------------
+    def open(self, session_id: str, state_fn: Callable[[], Dict]) -> None:
+        """开始记录；state_fn 返回当前完整状态，用于写快照（调用时应已持有抽奖锁）"""
+        with self._lock:
+            self._session_id = session_id
+            self._state_fn = state_fn
+            self._write_snapshot_locked()
+
+    def _write_snapshot_locked(self) -> None:
+        snapshot = dump_state(self._state_fn())
+        snapshot['session_id'] = self._session_id
+        storage.save_json(self.snapshot_path, snapshot, indent=None)
+        # 快照已落盘后再截断日志；两步之间崩溃时日志记录会被重复回放，结果不变
+        if self._fh is not None:
+            self._fh.close()
+        _ensure_parent(self.path)
+        self._fh = open(self.path, 'w', encoding='utf-8')
+        self._fh.write(json.dumps({'op': 'session', 'id': self._session_id}) + '\n')
+        self._fh.flush()
+        self._since_snapshot = 0
+
+    def append(self, rec: Dict) -> None:
+        """追加一条记录（调用方持有抽奖锁，保证记录顺序与内存状态一致）"""
+        with self._lock:
+            if self._fh is None:
+                return
+            self._fh.write(json.dumps(rec, ensure_ascii=False, separators=(',', ':')) + '\n')
+            self._fh.flush()
+            self._since_snapshot += 1
+            if self._since_snapshot >= self.snapshot_every:
+                self._write_snapshot_locked()
+                self._sync_locked()
+            elif self.fsync_interval <= 0:
+                self._sync_locked()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.fsync_interval, self._sync)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def _sync_locked(self) -> None:
+        if self._fh is not None:
+            os.fsync(self._fh.fileno())
+
+    def _sync(self) -> None:
+        with self._lock:
+            self._timer = None
+            self._sync_locked()
+
+    def close(self, discard: bool = True) -> None:
+        """停止记录；discard=True（正常退出）时删除日志与快照，下次启动不再恢复"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._fh is not None:
+                self._sync_locked()
+                self._fh.close()
+                self._fh = None
+            self._state_fn = None
+            if discard:
+                for p in (self.path, self.snapshot_path):
+                    try:
+                        os.remove(p)
+                    except OSError:
+                        pass
+
+
+def _ensure_parent(path: str) -> None:
+    parent = os.path.dirname(path)
+    if parent:
+        os.makedirs(parent, exist_ok=True)
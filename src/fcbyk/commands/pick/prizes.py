@@ -0,0 +1,118 @@
+"""
+pick 奖品配置
+files 模式下为每个文件设置抽中权重与库存（SQLite 持久化），
+每次抽中只更新一行库存，奖品有成千上万件时也不需要重写整份数据。
+"""
+import threading
+from typing import Dict, Optional, Tuple
+
+from fcbyk.utils import storage
+
+
+Prize = Tuple[float, Optional[int]]   # (weight, stock)，stock 为 None 表示不限量
+
+
+class PrizeStore:
+    """奖品权重 / 库存存储
+
+    - 配置在首次使用时读入内存，之后读操作不访问数据库；
+    - version 在配置被修改时递增，抽样器据此判断是否需要重建；
+    - consume 使用 compare-and-set 扣减库存，多进程共享同一个库时不会超发；
+    - restock 退回一件库存（管理员把已中奖的兑换码重置为未使用时）。
+    """
+
+    def __init__(self, db_path: str):
+        self.db_path = db_path
+        self._lock = threading.RLock()
+        self._conn = None
+        self._prizes: Optional[Dict[str, Prize]] = None
+        self.version = 0
+
+    def _connect(self):
+        if self._conn is None:
+            conn = storage.connect_sqlite(self.db_path)
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS prizes ("
+                " name TEXT PRIMARY KEY,"
+                " weight REAL NOT NULL DEFAULT 1,"
+                " stock INTEGER"
+                ") WITHOUT ROWID"
+            )
+            self._conn = conn
+        return self._conn
+
+    def _load(self) -> Dict[str, Prize]:
+        if self._prizes is None:
+            rows = self._connect().execute("SELECT name, weight, stock FROM prizes").fetchall()
+            self._prizes = {name: (float(weight), stock) for name, weight, stock in rows}
+            self.version += 1
+        return self._prizes
+
+    def close(self) -> None:
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def reload(self) -> None:
+        """丢弃内存缓存，下次访问时重新读取"""
+        with self._lock:
+            self._prizes = None
+
+    def enabled(self) -> bool:
+        """是否配置了任何奖品（未配置时按普通等概率抽取）"""
+        with self._lock:
+            return bool(self._load())
+
+    def snapshot(self) -> Tuple[Dict[str, Prize], int]:
+        """返回 (配置副本, version)"""
+        with self._lock:
+            return dict(self._load()), self.version
+
+    def replace(self, prizes: Dict[str, Prize]) -> None:
+        """整体替换奖品配置"""
+        rows = [(name, float(w), None if s is None else int(s)) for name, (w, s) in prizes.items()]
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                conn.execute("DELETE FROM prizes")
+                conn.executemany("INSERT INTO prizes (name, weight, stock) VALUES (?, ?, ?)", rows)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._prizes = {name: (w, s) for name, w, s in rows}
+            self.version += 1
+
+    def consume(self, name: str) -> Tuple[bool, Optional[int]]:
+        """扣减一件库存
+
+        Returns:
+            (是否成功, 扣减后的库存)；未配置或不限量的文件总是成功，库存返回 None。
+        """
+        with self._lock:
+            prizes = self._load()
+            prize = prizes.get(name)
+            if prize is None or prize[1] is None:
+                return True, None
+            conn = self._connect()
+            cur = conn.execute("UPDATE prizes SET stock = stock - 1 WHERE name = ? AND stock > 0", (name,))
+            row = conn.execute("SELECT stock FROM prizes WHERE name = ?", (name,)).fetchone()
+            stock = row[0] if row else 0
+            prizes[name] = (prize[0], stock)
+            return cur.rowcount == 1, stock
+
+    def restock(self, name: str) -> Optional[int]:
+        """退回一件库存，返回退回后的库存；未配置或不限量的文件不做任何事，返回 None"""
+        with self._lock:
+            prizes = self._load()
+            prize = prizes.get(name)
+            if prize is None or prize[1] is None:
+                return None
+            conn = self._connect()
+            conn.execute("UPDATE prizes SET stock = stock + 1 WHERE name = ? AND stock IS NOT NULL", (name,))
+            row = conn.execute("SELECT stock FROM prizes WHERE name = ?", (name,)).fetchone()
+            stock = row[0] if row else None
+            prizes[name] = (prize[0], stock)
+            return stock
@@ -0,0 +1,249 @@
+"""
+pick 抽样结构
+- NoRepeatSampler：按客户端维护一个惰性洗牌的排列（稀疏 Fisher-Yates + 游标），
+  每次 O(1) 取出该客户端尚未抽到过的文件，不必每次重建候选列表。
+- WeightedSampler：按权重 + 库存抽样，基于 Fenwick 树，抽样与库存扣减均为 O(log n)。
+"""
+import random
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from .catalog import CatalogSnapshot, FileEntry
+
+
+class _Permutation:
+    """0..n-1 的惰性随机排列
+
+    只记录被交换过的位置（val_at / pos_of），未出现的位置即为恒等映射；
+    [0, cursor) 为已取出部分。内存占用与已取出数量成正比。
+    """
+
+    __slots__ = ('n', 'cursor', 'val_at', 'pos_of', 'synced')
+
+    def __init__(self, n: int):
+        self.n = n
+        self.cursor = 0
+        self.val_at: Dict[int, int] = {}
+        self.pos_of: Dict[int, int] = {}
+        self.synced = 0   # 已同步的外部历史条数
+
+    def _val(self, pos: int) -> int:
+        return self.val_at.get(pos, pos)
+
+    def _pos(self, val: int) -> int:
+        return self.pos_of.get(val, val)
+
+    def _swap_to_cursor(self, pos: int) -> int:
+        cur = self.cursor
+        a, b = self._val(pos), self._val(cur)
+        self.val_at[pos], self.pos_of[b] = b, pos
+        self.val_at[cur], self.pos_of[a] = a, cur
+        self.cursor = cur + 1
+        return a
+
+    def remaining(self) -> int:
+        return self.n - self.cursor
+
+    def take_random(self) -> Optional[int]:
+        if self.cursor >= self.n:
+            return None
+        return self._swap_to_cursor(self.cursor + random.randrange(self.n - self.cursor))
+
+    def exclude(self, val: int) -> None:
+        pos = self._pos(val)
+        if pos >= self.cursor:
+            self._swap_to_cursor(pos)
+
+
+class NoRepeatSampler:
+    """按客户端不重复抽样
+
+    - 每个客户端一个 _Permutation，抽取为 O(1)。
+    - 文件列表快照变化（version 不同）时丢弃全部排列，按各客户端历史重新排除。
+    - 外部历史（seen）条数与排列记录不一致时（例如状态被恢复/重置）自动重建该客户端排列。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._version = None
+        self._index: Dict[str, int] = {}
+        self._perms: Dict[str, _Permutation] = {}
+
+    def reset(self) -> None:
+        with self._lock:
+            self._version = None
+            self._index = {}
+            self._perms = {}
+
+    def _perm_for(self, client: str, snapshot: CatalogSnapshot, seen: Iterable[str]) -> _Permutation:
+        if snapshot.version != self._version:
+            self._version = snapshot.version
+            self._index = {f.name: i for i, f in enumerate(snapshot.files)}
+            self._perms = {}
+
+        seen = seen if isinstance(seen, (set, frozenset)) else set(seen)
+        perm = self._perms.get(client)
+        if perm is None or perm.synced != len(seen):
+            perm = _Permutation(len(snapshot.files))
+            for name in seen:
+                idx = self._index.get(name)
+                if idx is not None:
+                    perm.exclude(idx)
+            perm.synced = len(seen)
+            self._perms[client] = perm
+        return perm
+
+    def remaining(self, client: str, snapshot: CatalogSnapshot, seen: Iterable[str]) -> int:
+        """客户端还能抽到的文件数"""
+        with self._lock:
+            return self._perm_for(client, snapshot, seen).remaining()
+
+    def sample(self, client: str, snapshot: CatalogSnapshot, seen: Iterable[str]) -> Optional[FileEntry]:
+        """随机取出一个客户端未抽到过的文件并记为已抽；没有可抽文件时返回 None
+
+        调用方应随后把结果加入该客户端的历史（seen），两者条数保持一致。
+        """
+        with self._lock:
+            perm = self._perm_for(client, snapshot, seen)
+            idx = perm.take_random()
+            if idx is None:
+                return None
+            perm.synced += 1
+            return snapshot.files[idx]
+
+
+# 权重换算为整数单位，保证 Fenwick 树加减不产生浮点误差
+WEIGHT_SCALE = 1000
+
+
+class FenwickTree:
+    """整数前缀和树：单点更新 / 按前缀和定位均为 O(log n)"""
+
+    def __init__(self, weights: List[int]):
+        n = len(weights)
+        tree = [0] * (n + 1)
+        for i, w in enumerate(weights, 1):
+            tree[i] += w
+            j = i + (i & -i)
+            if j <= n:
+                tree[j] += tree[i]
+        self.n = n
+        self._tree = tree
+        self._total = sum(weights)
+
+    def add(self, i: int, delta: int) -> None:
+        self._total += delta
+        i += 1
+        tree = self._tree
+        while i <= self.n:
+            tree[i] += delta
+            i += i & -i
+
+    def total(self) -> int:
+        return self._total
+
+    def find(self, x: int) -> int:
+        """返回最小的 i，使得前 i+1 项之和 > x（0 <= x < total）"""
+        pos = 0
+        step = 1 << self.n.bit_length()
+        tree = self._tree
+        while step:
+            nxt = pos + step
+            if nxt <= self.n and tree[nxt] <= x:
+                pos = nxt
+                x -= tree[nxt]
+            step >>= 1
+        return pos
+
+
+class WeightedSampler:
+    """带权重与库存的文件抽样
+
+    prizes: {文件名: (weight, stock)}，stock 为 None 表示不限量；未配置的文件按 weight=1、不限量处理。
+    有效权重 = weight（库存为 0 时为 0）。
+    快照或奖品配置 version 变化时重建（O(n)），之后每次抽样/扣减 O(log n)；
+    客户端已抽过的文件在单次抽样中临时扣除权重（O(k log n)，k 为该客户端历史条数）。
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._key = None
+        self._index: Dict[str, int] = {}
+        self._weights: List[int] = []
+        self._stock: List[Optional[int]] = []
+        self._tree = FenwickTree([])
+
+    def reset(self) -> None:
+        with self._lock:
+            self._key = None
+
+    def _ensure(self, snapshot: CatalogSnapshot, prizes: Dict[str, Tuple[float, Optional[int]]], prizes_version) -> None:
+        key = (snapshot.version, prizes_version)
+        if key == self._key:
+            return
+        weights, stock = [], []
+        for f in snapshot.files:
+            w, s = prizes.get(f.name, (1.0, None))
+            units = int(round(max(float(w), 0.0) * WEIGHT_SCALE))
+            weights.append(units)
+            stock.append(s)
+        self._index = {f.name: i for i, f in enumerate(snapshot.files)}
+        self._weights = weights
+        self._stock = stock
+        self._tree = FenwickTree([w if s != 0 else 0 for w, s in zip(weights, stock)])
+        self._key = key
+
+    def _effective(self, i: int) -> int:
+        return self._weights[i] if self._stock[i] != 0 else 0
+
+    def _excluded(self, seen: Iterable[str]) -> List[int]:
+        out = []
+        for name in seen:
+            i = self._index.get(name)
+            if i is not None and self._effective(i):
+                out.append(i)
+        return out
+
+    def available(self, snapshot, prizes, prizes_version, seen: Iterable[str]) -> Tuple[int, int]:
+        """返回 (全局剩余有效权重, 排除该客户端历史后的剩余有效权重)"""
+        with self._lock:
+            self._ensure(snapshot, prizes, prizes_version)
+            total = self._tree.total()
+            return total, total - sum(self._effective(i) for i in self._excluded(seen))
+
+    def sample(self, snapshot, prizes, prizes_version, seen: Iterable[str]) -> Optional[FileEntry]:
+        """按权重抽取一个未在 seen 中的文件（不扣库存）；无可抽文件时返回 None"""
+        with self._lock:
+            self._ensure(snapshot, prizes, prizes_version)
+            tree = self._tree
+            removed = self._excluded(seen)
+            for i in removed:
+                tree.add(i, -self._effective(i))
+            try:
+                total = tree.total()
+                if total <= 0:
+                    return None
+                return snapshot.files[tree.find(random.randrange(total))]
+            finally:
+                for i in removed:
+                    tree.add(i, self._effective(i))
+
+    def consume(self, name: str) -> None:
+        """扣减一件库存，库存归零时权重置 0"""
+        with self._lock:
+            i = self._index.get(name)
+            if i is None or self._stock[i] is None or self._stock[i] <= 0:
+                return
+            self._stock[i] -= 1
+            if self._stock[i] == 0:
+                self._tree.add(i, -self._weights[i])
+
+    def set_stock(self, name: str, stock: Optional[int]) -> None:
+        """以持久化中的库存为准修正本地库存（多进程下库存被其它进程扣减时）"""
+        with self._lock:
+            i = self._index.get(name)
+            if i is None:
+                return
+            before = self._effective(i)
+            self._stock[i] = stock
+            self._tree.add(i, self._effective(i) - before)
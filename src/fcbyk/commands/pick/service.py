@@ -2,30 +2,68 @@
 import click
 import random
 import os
-from typing import Iterable, Dict, Set, List, Optional
+from typing import Iterable, Iterator, Dict, Set, List, Optional, Tuple
 
-from fcbyk.utils import storage, files, common
+from fcbyk.utils import storage, common
 from fcbyk.cli_support import output
+from .catalog import CatalogSnapshot, FileCatalog
+from .prizes import PrizeStore
+from .sampling import NoRepeatSampler, WeightedSampler
+from .journal import REPLAYED_OPS, DrawJournal, apply_record
+from .shared import SharedDrawState
+from .codes import RedeemCodeRegistry, RedeemCodeStore, normalize_code
+from .store import ItemStore, ITEMS_FLUSH_DELAY
 
 
 class PickService:
     """抽奖服务业务逻辑"""
 
-    def __init__(self, config_file: str, default_config: dict):
+    def __init__(self, config_file: str, default_config: dict, items_flush_delay: float = ITEMS_FLUSH_DELAY):
         self.config_file = config_file
         self.default_config = default_config
 
-        # 兑换码持久化文件：~/.fcbyk/data/pick_redeem_codes.json
+        # 抽奖项：进程内共享，修改延迟合并写回 config_file
+        self.items_store = ItemStore(config_file, default_config, flush_delay=items_flush_delay)
+
+        # 兑换码持久化：~/.fcbyk/data/pick_redeem_codes.db（SQLite）
+        # 旧版 pick_redeem_codes.json 会在首次打开时自动导入
         self.redeem_codes_file = storage.get_path('pick_redeem_codes.json', subdir='data')
+        self.redeem_codes_db = storage.get_path('pick_redeem_codes.db', subdir='data')
+        self.code_store = RedeemCodeStore(self.redeem_codes_db, legacy_json_path=self.redeem_codes_file)
+
+        # 奖品权重 / 库存：~/.fcbyk/data/pick_prizes.db（未配置时等概率抽取）
+        self.prize_store = PrizeStore(storage.get_path('pick_prizes.db', subdir='data'))
+
+        # 抽奖日志：files 模式下记录中奖结果，异常退出后重启时据此恢复
+        self.journal = DrawJournal(
+            storage.get_path('pick_journal.ndjson', subdir='data'),
+            storage.get_path('pick_journal_snapshot.json', subdir='data'),
+        )
+
+        # 多进程模式下的共享状态（单进程时为 None），异常退出后同样据此恢复
+        self.shared_db = storage.get_path('pick_shared.db', subdir='data')
+        self.shared: Optional[SharedDrawState] = None
 
         # 抽奖限制模式：
         # - 旧逻辑：按 IP 限制（ip_draw_records），每个 IP 只能抽一次
         # - 新逻辑：按兑换码限制（redeem_codes），当 redeem_codes 不为空时优先生效，每个兑换码只能使用一次
         # - ip_file_history：记录每个 IP 已经抽中过哪些文件，避免同一 IP 重复抽到同一个文件
         self.ip_draw_records: Dict[str, str] = {}                    # {ip: filename}
-        self.redeem_codes: Dict[str, bool] = {}                      # {code: used_flag}
+        self._redeem_codes = RedeemCodeRegistry()                     # {code: used_flag}，带计数器
         self.ip_file_history: Dict[str, Set[str]] = {}               # {ip: {filename, ...}}
         self.code_results: Dict[str, Dict] = {}                      # {code: {file: {...}, download_url: str, timestamp: str}} 保存兑换码的抽奖结果
+        self._file_catalog: Optional[FileCatalog] = None
+        self.file_sampler = NoRepeatSampler()                         # 按 IP 不重复抽样（由 ip_file_history 派生）
+        self.prize_sampler = WeightedSampler()                        # 配置了奖品时按权重 / 库存抽样
+
+    @property
+    def redeem_codes(self) -> RedeemCodeRegistry:
+        return self._redeem_codes
+
+    @redeem_codes.setter
+    def redeem_codes(self, codes: Dict[str, bool]) -> None:
+        # 赋值 dict 时原地替换，保证计数器与 version 连续
+        self._redeem_codes.replace(codes)
 
     def reset_state(self):
         """重置抽奖状态"""
@@ -33,14 +71,137 @@ class PickService:
         self.redeem_codes = {}
         self.ip_file_history = {}
         self.code_results = {}
-
-    def list_files(self, files_mode_root: str) -> List[Dict]:
-        """列出文件模式下可供抽取的文件（支持单文件或目录）"""
-        return files.get_files_metadata(files_mode_root)
-
-    def pick_file(self, candidates: List[Dict]) -> Dict:
-        """从候选文件列表中随机选择一个"""
-        return random.choice(candidates)
+        self.file_sampler.reset()
+        self.prize_sampler.reset()
+
+    def journal_state(self) -> Dict:
+        """当前中奖状态（写日志快照用）"""
+        return {
+            'ip_draw_records': self.ip_draw_records,
+            'ip_file_history': self.ip_file_history,
+            'code_results': self.code_results,
+        }
+
+    def restore_state(self, state: Dict) -> None:
+        """用日志回放得到的状态替换内存中的中奖记录"""
+        self.ip_draw_records = state['ip_draw_records']
+        self.ip_file_history = state['ip_file_history']
+        self.code_results = state['code_results']
+        self.file_sampler.reset()
+        self.prize_sampler.reset()
+
+    def forget_code_result(self, code: Optional[str] = None) -> None:
+        """清除兑换码的抽奖结果（code 为空时清除全部），并记入日志"""
+        if code is None:
+            self.code_results = {}
+            self.record({'op': 'forget_all'})
+        elif self.code_results.pop(code, None) is not None:
+            self.record({'op': 'forget', 'code': code})
+
+    def refund_code_prize(self, code: str) -> Optional[str]:
+        """把兑换码抽中的文件退回奖品库存，返回退回的文件名；没有结果或不限量时返回 None（调用方持有抽奖锁）"""
+        result = self.code_results.get(code) or {}
+        name = (result.get('file') or {}).get('name')
+        if not name:
+            return None
+        stock = self.prize_store.restock(name)
+        if stock is None:
+            return None
+        self.prize_sampler.set_stock(name, stock)
+        self.record({'op': 'restock', 'file': name})
+        return name
+
+    # -------------------- 状态变更记录 / 多进程同步 --------------------
+    def record(self, rec: Dict) -> None:
+        """记录一次状态变更：恢复需要的写入抽奖日志；多进程模式下全部追加到共享日志"""
+        if rec.get('op') in REPLAYED_OPS:
+            self.journal.append(rec)
+        if self.shared is not None:
+            self.shared.append(rec)
+
+    def apply_record(self, rec: Dict) -> None:
+        """应用其它 worker 产生的状态变更（调用方持有抽奖锁）"""
+        op = rec.get('op')
+        if op == 'code':
+            self.redeem_codes[rec['code']] = True
+        elif op == 'codes_add':
+            for c in rec['codes']:
+                if c not in self.redeem_codes:
+                    self.redeem_codes[c] = False
+        elif op == 'code_del':
+            self.redeem_codes.pop(rec['code'], None)
+        elif op == 'code_reset':
+            if rec['code'] in self.redeem_codes:
+                self.redeem_codes[rec['code']] = False
+        elif op == 'codes_clear':
+            self.redeem_codes.clear()
+        elif op in ('prizes', 'restock'):
+            self.prize_store.reload()
+            self.prize_sampler.reset()
+        elif op == 'rescan':
+            if self._file_catalog is not None:
+                self._file_catalog.rescan()
+        apply_record(self.journal_state(), rec)
+
+    def recover_draws(self) -> Tuple[Optional[Dict], Optional[str], int]:
+        """读取上次异常退出留下的中奖记录（单进程抽奖日志或多进程共享库），返回 (state, session_id, replayed)"""
+        state, session_id, replayed = self.journal.recover()
+        if state is None:
+            shared = SharedDrawState(self.shared_db)
+            try:
+                state, session_id, replayed = shared.recover()
+            finally:
+                shared.close()
+        return state, session_id, replayed
+
+    def enable_shared_state(self, session_id: str) -> SharedDrawState:
+        """开启多进程共享状态：清空上一轮的共享数据，以当前中奖记录作为初始状态（调用方持有抽奖锁）"""
+        self.shared = SharedDrawState(self.shared_db)
+        self.shared.begin(session_id, self.journal_state())
+        return self.shared
+
+    def discard_recovery(self) -> None:
+        """服务正常退出：删除抽奖日志并清空共享库，下次启动不再恢复"""
+        self.journal.close()
+        self.discard_shared_state()
+
+    def discard_shared_state(self) -> None:
+        """清空共享库（正常退出，或单进程启动时恢复的记录已写入抽奖日志）"""
+        if self.shared is not None:
+            self.shared.reset()
+        elif os.path.exists(self.shared_db):
+            shared = SharedDrawState(self.shared_db)
+            try:
+                shared.reset()
+            finally:
+                shared.close()
+
+    def sync_shared(self) -> int:
+        """拉取并应用其它 worker 的状态变更，返回应用条数（调用方持有抽奖锁）"""
+        if self.shared is None:
+            return 0
+        return self.shared.poll(self.apply_record)
+
+    def close_connections(self) -> None:
+        """关闭所有 SQLite 连接（fork 前调用，子进程会按需重新连接）"""
+        self.code_store.close()
+        self.prize_store.close()
+        if self.shared is not None:
+            self.shared.close()
+
+    def get_file_catalog(self, files_mode_root: str) -> FileCatalog:
+        """返回 files_mode_root 对应的文件列表缓存（根目录变化时重建）"""
+        catalog = self._file_catalog
+        if catalog is None or catalog.root != files_mode_root:
+            catalog = FileCatalog(files_mode_root)
+            self._file_catalog = catalog
+        return catalog
+
+    def rescan_files(self, files_mode_root: str) -> CatalogSnapshot:
+        """强制重新扫描文件目录，多进程模式下其它 worker 同步时一并重扫（调用方持有抽奖锁）"""
+        snapshot = self.get_file_catalog(files_mode_root).rescan()
+        self.record({'op': 'rescan'})
+        return snapshot
 
     def pick_random_item(self, items: List[str]) -> str:
         """从列表中随机选择一个元素"""
@@ -53,38 +214,9 @@ class PickService:
             codes.add(common.generate_random_string(length))
         return sorted(codes)
 
-    def _load_redeem_codes_data(self) -> Dict:
-        data = storage.load_json(
-            self.redeem_codes_file,
-            default={'codes': {}},
-            create_if_missing=True,
-            strict=False,
-        )
-        if not isinstance(data, dict):
-            return {'codes': {}}
-        if not isinstance(data.get('codes'), dict):
-            data['codes'] = {}
-        return data
-
-    def _save_redeem_codes_data(self, data: Dict) -> None:
-        storage.save_json(self.redeem_codes_file, data)
-
     def load_redeem_codes_from_storage(self) -> Dict[str, bool]:
-        """从持久化文件加载兑换码状态到内存。"""
-        data = self._load_redeem_codes_data()
-        codes = data.get('codes', {})
-        out = {}
-        for k, v in codes.items():
-            code = str(k).strip().upper()
-            if not code:
-                continue
-            used = False
-            if isinstance(v, dict):
-                used = bool(v.get('used'))
-            elif isinstance(v, bool):
-                used = bool(v)
-            out[code] = used
-        return out
+        """从持久化存储加载兑换码状态到内存。"""
+        return self.code_store.load_all()
 
     def export_redeem_codes_from_storage(self, only_unused: bool = False) -> List[Dict]:
         """导出兑换码（从持久化读取，返回 [{code, used}, ...]）。
@@ -92,75 +224,31 @@ class PickService:
         Args:
             only_unused: 为 True 时，只导出未使用的兑换码。
         """
-        data = self._load_redeem_codes_data()
-        codes = data.get('codes', {})
-        out = []
-        if isinstance(codes, dict):
-            for k, v in sorted(codes.items()):
-                code = str(k).strip().upper()
-                if not code:
-                    continue
-                used = False
-                if isinstance(v, dict):
-                    used = bool(v.get('used'))
-                elif isinstance(v, bool):
-                    used = bool(v)
-
-                if only_unused and used:
-                    continue
-
-                out.append({'code': code, 'used': used})
-        return out
+        return self.code_store.export(only_unused=only_unused)
 
-    def add_redeem_code_to_storage(self, code: str) -> bool:
-        """新增兑换码到持久化文件，返回是否新增成功。"""
-        code = str(code or '').strip().upper()
-        if not code:
-            return False
+    def stream_redeem_codes_from_storage(self, only_unused: bool = False) -> Iterator[Tuple[str, bool]]:
+        """流式导出兑换码，逐条产出 (code, used)，不在内存中构造完整列表。"""
+        return self.code_store.stream_codes(only_unused=only_unused)
 
-        data = self._load_redeem_codes_data()
-        codes = data.get('codes', {})
-        if code in codes:
-            return False
-        codes[code] = {'used': False}
-        data['codes'] = codes
-        self._save_redeem_codes_data(data)
-        return True
+    def add_redeem_code_to_storage(self, code: str) -> bool:
+        """新增兑换码到持久化存储，返回是否新增成功。"""
+        return self.code_store.add(code)
 
     def delete_redeem_code_from_storage(self, code: str) -> Optional[bool]:
-        """从持久化文件删除兑换码。
+        """从持久化存储删除兑换码。
 
         Returns:
             - True : 删除成功
             - False: code 不存在
             - None : 参数非法
         """
-        code = str(code or '').strip().upper()
-        if not code:
+        if not normalize_code(code):
             return None
-
-        data = self._load_redeem_codes_data()
-        codes = data.get('codes', {})
-        if code not in codes:
-            return False
-
-        try:
-            del codes[code]
-        except Exception:
-            return False
-
-        data['codes'] = codes
-        self._save_redeem_codes_data(data)
-        return True
+        return self.code_store.delete(code)
 
     def clear_redeem_codes_in_storage(self) -> int:
         """清空所有兑换码（持久化），返回清空前数量。"""
-        data = self._load_redeem_codes_data()
-        codes = data.get('codes', {})
-        n = len(codes) if isinstance(codes, dict) else 0
-        data['codes'] = {}
-        self._save_redeem_codes_data(data)
-        return n
+        return self.code_store.clear()
 
     def reset_redeem_code_unused_in_storage(self, code: str) -> Optional[bool]:
         """将兑换码重置为未使用（持久化）。
@@ -170,112 +258,56 @@ class PickService:
             - False: code 不存在 或 已经是未使用
             - None : 参数非法
         """
-        code = str(code or '').strip().upper()
-        if not code:
+        if not normalize_code(code):
             return None
-
-        data = self._load_redeem_codes_data()
-        codes = data.get('codes', {})
-        if code not in codes:
-            return False
-
-        v = codes.get(code)
-        used = False
-        if isinstance(v, dict):
-            used = bool(v.get('used'))
-        elif isinstance(v, bool):
-            used = bool(v)
-
-        if not used:
-            return False
-
-        # 统一存 dict 结构
-        codes[code] = {'used': False}
-        data['codes'] = codes
-        self._save_redeem_codes_data(data)
-        return True
+        return self.code_store.reset_unused(code)
 
     def mark_redeem_code_used_in_storage(self, code: str) -> bool:
         """标记兑换码已使用（持久化），返回是否标记成功。"""
-        code = str(code or '').strip().upper()
-        if not code:
+        if not normalize_code(code):
             return False
+        return self.code_store.mark_used(code)
 
-        data = self._load_redeem_codes_data()
-        codes = data.get('codes', {})
-        if code not in codes:
-            return False
+    def mint_redeem_codes_in_storage(self, count: int, length: int = 4) -> List[str]:
+        """批量生成新兑换码并分批写入持久化（不更新内存 redeem_codes）
 
-        v = codes.get(code)
-        if isinstance(v, dict):
-            if v.get('used'):
-                return False
-            v['used'] = True
-            codes[code] = v
-        elif isinstance(v, bool):
-            if v:
-                return False
-            codes[code] = True
-        else:
-            codes[code] = {'used': True}
-
-        data['codes'] = codes
-        self._save_redeem_codes_data(data)
-        return True
-
-    def generate_and_add_redeem_codes_to_storage(self, count: int, length: int = 4) -> List[str]:
-        """批量生成并写入持久化（同时更新内存 redeem_codes）。
+        生成方式见 RedeemCodeStore.mint：计数器经带密钥置换得到兑换码，不需要重试与逐个查重。
+        """
+        minted: List[str] = []
+        for fresh in self.iter_mint_redeem_codes_in_storage(count, length):
+            minted.extend(fresh)
+        return minted
 
-        说明：
-        - 由 Web Admin 调用，用于批量生成兑换码。
-        - count 建议由上层限制在 1..100。
+    def iter_mint_redeem_codes_in_storage(self, count: int, length: int = 4) -> Iterator[List[str]]:
+        """同 mint_redeem_codes_in_storage，但每写入一批就产出该批（用于边生成边输出）
 
-        Returns:
-            list[str]: 实际生成的新兑换码列表。
+        length 超出 1..MAX_CODE_LENGTH 时抛出 ValueError。
         """
         try:
             n = int(count)
+            cur_len = int(length)
         except Exception:
-            return []
+            return iter(())
         if n <= 0:
-            return []
-
-        # 读取持久化，确保去重
-        data = self._load_redeem_codes_data()
-        codes = data.get('codes', {})
-        if not isinstance(codes, dict):
-            codes = {}
-
-        existed = set([str(k).strip().upper() for k in codes.keys() if str(k).strip()])
-
-        new_codes = []
-        tries = 0
-        max_tries = max(100, n * 50)
-        extra = 0
-        cur_len = int(length) if int(length) > 0 else 4
-
-        # 生成策略：先用默认长度生成；如果冲突太多，逐步加长
-        while len(new_codes) < n and tries < max_tries:
-            tries += 1
-            code = common.generate_random_string(cur_len)
-            if not code or code in existed:
-                # 冲突较多时，适当提高长度
-                extra += 1
-                if extra >= 20:
-                    extra = 0
-                    cur_len = min(cur_len + 1, 16)
-                continue
-            existed.add(code)
-            new_codes.append(code)
-            codes[code] = {'used': False}
-
-        data['codes'] = codes
-        self._save_redeem_codes_data(data)
-
-        # 同步内存态（本次 server 会话立刻可用）
-        for c in new_codes:
+            return iter(())
+        return self.code_store.iter_mint(n, length=cur_len if cur_len > 0 else 4)
+
+    def register_redeem_codes(self, codes: Iterable[str]) -> None:
+        """把已写入持久化的新兑换码加入内存态（本次 server 会话立刻可用）"""
+        codes = list(codes)
+        for c in codes:
             self.redeem_codes[c] = False
+        if codes:
+            self.record({'op': 'codes_add', 'codes': codes})
+
+    def generate_and_add_redeem_codes_to_storage(self, count: int, length: int = 4) -> List[str]:
+        """批量生成并写入持久化（同时更新内存 redeem_codes）。
 
+        Returns:
+            list[str]: 实际生成的新兑换码列表。
+        """
+        new_codes = self.mint_redeem_codes_in_storage(count, length)
+        self.register_redeem_codes(new_codes)
         return new_codes
 
     def pick_item(self, items: List[str]):
@@ -296,26 +328,13 @@ class PickService:
 
         click.echo("\nPick finished!")
 
-    def _load_items_data(self) -> Dict:
-        """加载物品列表数据"""
-        if not self.config_file:
-            return {'items': []}
-        data = storage.load_json(
-            self.config_file,
-            default=self.default_config or {'items': []},
-            create_if_missing=True,
-            strict=False,
-        )
-        if not isinstance(data, dict):
-            return {'items': []}
-        if 'items' not in data or not isinstance(data.get('items'), list):
-            data['items'] = []
-        return data
+    def get_items(self) -> List[str]:
+        """返回当前抽奖项列表"""
+        return self.items_store.items()
 
-    def _save_items_data(self, data: Dict) -> None:
-        """保存物品列表数据"""
-        if self.config_file:
-            storage.save_json(self.config_file, data)
+    def flush_items(self) -> None:
+        """立即写回尚未落盘的抽奖项修改"""
+        self.items_store.flush()
 
     def add_item(self, item: str) -> bool:
         """添加单个元素到列表
@@ -329,17 +348,7 @@ class PickService:
         if not item or not item.strip():
             return False
             
-        item = item.strip()
-        data = self._load_items_data()
-        items = data.get('items', [])
-        
-        if item in items:
-            return False
-            
-        items.append(item)
-        data['items'] = items
-        self._save_items_data(data)
-        return True
+        return self.items_store.add(item.strip())
 
     def add_items(self, items: List[str]) -> List[str]:
         """批量添加元素
@@ -350,26 +359,8 @@ class PickService:
         Returns:
             List[str]: 重复的元素列表
         """
-        duplicates = []
-        data = self._load_items_data()
-        existing_items = set(data.get('items', []))
-        
-        new_items = []
-        for item in items:
-            if not item or not item.strip():
-                continue
-            item = item.strip()
-            if item in existing_items:
-                duplicates.append(item)
-            else:
-                new_items.append(item)
-                existing_items.add(item)
-        
-        if new_items:
-            data['items'].extend(new_items)
-            self._save_items_data(data)
-        
-        return duplicates
+        cleaned = [item.strip() for item in items if item and item.strip()]
+        return self.items_store.add_many(cleaned)
 
     def remove_item(self, item: str) -> bool:
         """删除元素
@@ -383,17 +374,7 @@ class PickService:
         if not item or not item.strip():
             return False
             
-        item = item.strip()
-        data = self._load_items_data()
-        items = data.get('items', [])
-        
-        if item not in items:
-            return False
-            
-        items.remove(item)
-        data['items'] = items
-        self._save_items_data(data)
-        return True
+        return self.items_store.remove(item.strip())
 
     def clear_items(self) -> int:
         """清空列表
@@ -401,11 +382,7 @@ class PickService:
         Returns:
             int: 清空前的元素数量
         """
-        data = self._load_items_data()
-        count = len(data.get('items', []))
-        data['items'] = []
-        self._save_items_data(data)
-        return count
+        return self.items_store.clear()
 
     def update_items(self, items: List[str]) -> None:
         """更新整个列表
@@ -413,6 +390,4 @@ class PickService:
         Args:
             items: 新的元素列表
         """
-        data = self._load_items_data()
-        data['items'] = [item.strip() for item in items if item and item.strip()]
-        self._save_items_data(data)
+        self.items_store.replace([item.strip() for item in items if item and item.strip()])
@@ -0,0 +1,207 @@
+"""
+pick 多进程共享状态
+多个 worker 进程共用一个 SQLite（WAL）库：
+- ip_claims：IP 模式“每个 IP 一次”的全局占位，INSERT OR IGNORE 保证只有一个 worker 成功；
+- draw_log：所有会改变抽奖状态的操作按序追加，各 worker 通过 PRAGMA data_version
+  发现其它进程的提交后，只读取新增记录并应用到自己的内存索引；
+- meta：本轮的会话 ID。服务正常退出时清空整个库，崩溃或被强制结束后
+  再次启动会先回放 draw_log 恢复中奖记录（与单进程抽奖日志相同）。
+"""
+import json
+import os
+import threading
+from typing import Callable, Dict, Optional, Tuple
+
+from fcbyk.utils import storage
+
+from .journal import REPLAYED_OPS, apply_record, dump_state, empty_state
+
+
+# 后台同步线程检查其它 worker 提交的间隔（秒）
+SHARED_POLL_INTERVAL = 0.2
+
+
+class SharedDrawState:
+    """worker 间共享的抽奖状态，线程安全；连接在首次使用时打开（fork 之后各进程各自连接）"""
+
+    def __init__(self, db_path: str, origin: Optional[str] = None):
+        self.db_path = db_path
+        self.origin = origin or str(os.getpid())
+        self._lock = threading.RLock()
+        self._conn = None
+        self._last_seq = 0
+        self._data_version = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _connect(self):
+        if self._conn is None:
+            conn = storage.connect_sqlite(self.db_path)
+            conn.execute("CREATE TABLE IF NOT EXISTS ip_claims (ip TEXT PRIMARY KEY, file TEXT) WITHOUT ROWID")
+            conn.execute(
+                "CREATE TABLE IF NOT EXISTS draw_log ("
+                " seq INTEGER PRIMARY KEY AUTOINCREMENT,"
+                " origin TEXT NOT NULL,"
+                " rec TEXT NOT NULL)"
+            )
+            conn.execute("CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT) WITHOUT ROWID")
+            self._conn = conn
+        return self._conn
+
+    def close(self) -> None:
+        self.stop_follower()
+        with self._lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
+
+    def recover(self) -> Tuple[Optional[Dict], Optional[str], int]:
+        """回放上一轮留下的共享日志，返回 (state, session_id, replayed)
+
+        库不存在或上一轮已正常退出（没有会话 ID）时返回 (None, None, 0)。
+        """
+        if not os.path.exists(self.db_path):
+            return None, None, 0
+        with self._lock:
+            conn = self._connect()
+            row = conn.execute("SELECT value FROM meta WHERE key = 'session_id'").fetchone()
+            if row is None:
+                return None, None, 0
+            rows = conn.execute("SELECT rec FROM draw_log ORDER BY seq").fetchall()
+            claims = conn.execute("SELECT ip, file FROM ip_claims WHERE file IS NOT NULL").fetchall()
+
+        state = empty_state()
+        replayed = 0
+        for (rec,) in rows:
+            rec = json.loads(rec)
+            if rec.get('op') in REPLAYED_OPS or rec.get('op') == 'restore':
+                apply_record(state, rec)
+                replayed += 1
+        # 占位已写入文件名但日志未来得及追加（进程恰好在两步之间被结束）
+        for ip, name in claims:
+            if ip not in state['ip_draw_records']:
+                apply_record(state, {'op': 'ip', 'ip': ip, 'file': name})
+        return state, row[0], replayed
+
+    def begin(self, session_id: str, state: Dict) -> None:
+        """开始新一轮：清空共享库，写入会话 ID，并以 state（启动时恢复的记录）作为初始状态"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._clear_locked(conn)
+                conn.execute("INSERT INTO meta (key, value) VALUES ('session_id', ?)", (session_id,))
+                conn.executemany(
+                    "INSERT INTO ip_claims (ip, file) VALUES (?, ?)", list(state['ip_draw_records'].items())
+                )
+                if any(state.values()):
+                    conn.execute(
+                        "INSERT INTO draw_log (origin, rec) VALUES (?, ?)",
+                        (self.origin, json.dumps({'op': 'restore', 'state': dump_state(state)},
+                                                 ensure_ascii=False, separators=(',', ':'))),
+                    )
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            row = conn.execute("SELECT MAX(seq) FROM draw_log").fetchone()
+            self._last_seq = row[0] or 0
+
+    def reset(self) -> None:
+        """清空共享库（服务正常退出，本轮抽奖结束，不再需要恢复）"""
+        with self._lock:
+            conn = self._connect()
+            conn.execute("BEGIN IMMEDIATE")
+            try:
+                self._clear_locked(conn)
+                conn.execute("COMMIT")
+            except Exception:
+                conn.execute("ROLLBACK")
+                raise
+            self._last_seq = 0
+
+    @staticmethod
+    def _clear_locked(conn) -> None:
+        conn.execute("DELETE FROM ip_claims")
+        conn.execute("DELETE FROM draw_log")
+        conn.execute("DELETE FROM meta")
+
+    def reopen(self, origin: str) -> None:
+        """fork 之后在子进程中调用：丢弃继承来的连接，以新的 origin 重新连接"""
+        self._conn = None
+        self._thread = None
+        self._stop = threading.Event()
+        self._data_version = None
+        self.origin = origin
+
+    # -------------------- IP 占位 --------------------
+    def claim_ip(self, ip: str) -> bool:
+        """占用该 IP 的唯一抽奖机会，已被占用返回 False"""
+        with self._lock:
+            cur = self._connect().execute("INSERT OR IGNORE INTO ip_claims (ip, file) VALUES (?, NULL)", (ip,))
+        return cur.rowcount == 1
+
+    def release_ip(self, ip: str) -> None:
+        """抽取失败时释放占位"""
+        with self._lock:
+            self._connect().execute("DELETE FROM ip_claims WHERE ip = ? AND file IS NULL", (ip,))
+
+    def set_ip_file(self, ip: str, name: str) -> None:
+        with self._lock:
+            self._connect().execute("UPDATE ip_claims SET file = ? WHERE ip = ?", (name, ip))
+
+    def get_ip_file(self, ip: str) -> Optional[str]:
+        with self._lock:
+            row = self._connect().execute("SELECT file FROM ip_claims WHERE ip = ?", (ip,)).fetchone()
+        return row[0] if row else None
+
+    # -------------------- 操作日志 --------------------
+    def append(self, rec: Dict) -> None:
+        with self._lock:
+            self._connect().execute(
+                "INSERT INTO draw_log (origin, rec) VALUES (?, ?)",
+                (self.origin, json.dumps(rec, ensure_ascii=False, separators=(',', ':'))),
+            )
+
+    def poll(self, apply: Callable[[Dict], None]) -> int:
+        """应用其它 worker 新提交的记录，返回应用条数
+
+        data_version 未变化（没有其它连接提交过）时只执行一次 PRAGMA，不读表。
+        """
+        with self._lock:
+            conn = self._connect()
+            version = conn.execute("PRAGMA data_version").fetchone()[0]
+            if version == self._data_version:
+                return 0
+            self._data_version = version
+            rows = conn.execute(
+                "SELECT seq, origin, rec FROM draw_log WHERE seq > ? ORDER BY seq", (self._last_seq,)
+            ).fetchall()
+            if rows:
+                self._last_seq = rows[-1][0]
+        applied = 0
+        for _seq, origin, rec in rows:
+            if origin == self.origin:
+                continue
+            apply(json.loads(rec))
+            applied += 1
+        return applied
+
+    def start_follower(self, sync: Callable[[], None], interval: float = SHARED_POLL_INTERVAL) -> None:
+        """启动后台线程定期调用 sync（通常是持锁后 poll），让空闲 worker 也能及时推送事件"""
+        if self._thread is not None:
+            return
+
+        def run():
+            while not self._stop.wait(interval):
+                try:
+                    sync()
+                except Exception:
+                    pass
+
+        self._thread = threading.Thread(target=run, name='pick-shared-follower', daemon=True)
+        self._thread.start()
+
+    def stop_follower(self) -> None:
+        self._stop.set()
+        self._thread = None
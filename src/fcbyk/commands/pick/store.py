@@ -0,0 +1,175 @@
+"""
+pick 抽奖项存储
+进程内共享一份抽奖项列表：只在首次使用或文件 mtime 变化时读盘，
+修改先落在内存里，再由后台定时器合并写回（write-behind）。
+"""
+import atexit
+import copy
+import os
+import threading
+from typing import Dict, List, Optional
+
+from fcbyk.utils import storage
+
+
+# 修改后延迟多久写回磁盘（秒），窗口内的多次修改只写一次
+ITEMS_FLUSH_DELAY = 1.0
+
+
+class ItemStore:
+    """线程安全的抽奖项存储
+
+    - 读：返回内存中的列表副本；仅当文件 mtime 变化（被外部修改）时重新加载。
+    - 写：修改内存后标记 dirty，由定时器在 flush_delay 秒后批量写回。
+    - flush_delay <= 0 时退化为同步写回。
+    - path 为空时只在内存中保存（与旧逻辑 config_file 为空时一致）。
+    """
+
+    def __init__(self, path: Optional[str], default: Optional[Dict] = None, flush_delay: float = ITEMS_FLUSH_DELAY):
+        self.path = path
+        self.default = default or {'items': []}
+        self.flush_delay = flush_delay
+
+        self._lock = threading.RLock()
+        self._data: Dict = {}              # 文件中的其它字段，写回时原样保留
+        self._items: List[str] = []
+        self._index = set()                # 与 _items 同步，O(1) 判重
+        self._mtime = None                 # 最近一次读/写后的文件 mtime
+        self._loaded = False
+        self._dirty = False
+        self._timer = None
+        self._atexit_registered = False
+
+    # -------------------- 内部工具 --------------------
+    def _stat_mtime(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    def _load(self) -> None:
+        data = storage.load_json(
+            self.path,
+            default=copy.deepcopy(self.default),
+            create_if_missing=True,
+            strict=False,
+        )
+        if not isinstance(data, dict):
+            data = {}
+        items = data.get('items')
+        if not isinstance(items, list):
+            items = []
+        self._data = data
+        # 文件可能被手工编辑出重复项，按首次出现的顺序去重，与 _index 保持一致
+        self._items = list(dict.fromkeys(str(x) for x in items))
+        self._index = set(self._items)
+        self._mtime = self._stat_mtime()
+        self._loaded = True
+
+    def _ensure_fresh(self) -> None:
+        """按需加载：首次访问，或文件被外部修改且本地没有未写回的改动。"""
+        if not self.path:
+            self._loaded = True
+            return
+        if not self._loaded:
+            self._load()
+            return
+        if self._dirty:
+            # 本地改动优先，写回后再以磁盘为准
+            return
+        if self._stat_mtime() != self._mtime:
+            self._load()
+
+    def _mark_dirty(self) -> None:
+        if not self.path:
+            return
+        self._dirty = True
+        if self.flush_delay <= 0:
+            self.flush()
+            return
+        if not self._atexit_registered:
+            atexit.register(self.flush)
+            self._atexit_registered = True
+        if self._timer is None:
+            self._timer = threading.Timer(self.flush_delay, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    # -------------------- 公共接口 --------------------
+    def items(self) -> List[str]:
+        """返回当前抽奖项（副本）"""
+        with self._lock:
+            self._ensure_fresh()
+            return list(self._items)
+
+    def add(self, item: str) -> bool:
+        """添加单个元素，已存在返回 False"""
+        with self._lock:
+            self._ensure_fresh()
+            if item in self._index:
+                return False
+            self._items.append(item)
+            self._index.add(item)
+            self._mark_dirty()
+            return True
+
+    def add_many(self, items: List[str]) -> List[str]:
+        """批量添加元素，返回重复的元素列表"""
+        duplicates = []
+        with self._lock:
+            self._ensure_fresh()
+            added = False
+            for item in items:
+                if item in self._index:
+                    duplicates.append(item)
+                    continue
+                self._items.append(item)
+                self._index.add(item)
+                added = True
+            if added:
+                self._mark_dirty()
+        return duplicates
+
+    def remove(self, item: str) -> bool:
+        """删除元素，不存在返回 False"""
+        with self._lock:
+            self._ensure_fresh()
+            if item not in self._index:
+                return False
+            self._items.remove(item)
+            self._index.discard(item)
+            self._mark_dirty()
+            return True
+
+    def clear(self) -> int:
+        """清空列表，返回清空前数量"""
+        with self._lock:
+            self._ensure_fresh()
+            count = len(self._items)
+            self._items = []
+            self._index = set()
+            self._mark_dirty()
+            return count
+
+    def replace(self, items: List[str]) -> None:
+        """整体替换列表（重复项只保留第一个）"""
+        with self._lock:
+            self._ensure_fresh()
+            self._items = list(dict.fromkeys(items))
+            self._index = set(self._items)
+            self._mark_dirty()
+
+    def flush(self) -> None:
+        """把未写回的改动写入磁盘"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if not self._dirty or not self.path:
+                return
+            data = dict(self._data)
+            data['items'] = list(self._items)
+            storage.save_json(self.path, data)
+            self._data = data
+            self._mtime = self._stat_mtime()
+            self._dirty = False
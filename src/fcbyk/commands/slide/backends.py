@@ -0,0 +1,309 @@
+"""
+slide 输入注入后端
+SlideService 的键盘 / 鼠标操作都经由这里的后端完成：
+- pyautogui：跨平台默认实现（关闭每次调用后的 PAUSE 停顿）；
+- xtest：Linux X11 下直接通过 XTest 扩展注入，省去 pyautogui 的位置查询与安全检查；
+- mock：只记录调用，供测试与压测使用。
+"""
+import abc
+import os
+import sys
+from typing import Dict, List, Tuple
+
+
+# 在 CI 环境中，如果没有 DISPLAY 环境变量，设置一个默认值以避免导入 pyautogui 时出错
+if 'DISPLAY' not in os.environ:
+    os.environ['DISPLAY'] = ':0'
+
+try:
+    import pyautogui
+except Exception:
+    # 在 CI 环境中，如果 pyautogui 导入失败（例如没有 X 服务器或 Xlib 错误），创建一个模拟对象
+    # 捕获所有异常，包括 Xlib.error.DisplayConnectionError, ImportError, OSError 等
+    class MockPyAutoGUI:
+        FAILSAFE = False
+        PAUSE = 0
+
+        @staticmethod
+        def press(*args, **kwargs):
+            pass
+
+        @staticmethod
+        def position():
+            return (0, 0)
+
+        @staticmethod
+        def moveTo(*args, **kwargs):
+            pass
+
+        @staticmethod
+        def click(*args, **kwargs):
+            pass
+
+        @staticmethod
+        def rightClick(*args, **kwargs):
+            pass
+
+        @staticmethod
+        def scroll(*args, **kwargs):
+            pass
+
+        @staticmethod
+        def hscroll(*args, **kwargs):
+            pass
+
+        @staticmethod
+        def mouseDown(*args, **kwargs):
+            pass
+
+        @staticmethod
+        def mouseUp(*args, **kwargs):
+            pass
+
+    pyautogui = MockPyAutoGUI()
+
+
+class BackendUnavailable(RuntimeError):
+    """当前环境无法使用该后端（缺少依赖、没有显示服务器等）"""
+
+
+class InputBackend(abc.ABC):
+    """输入注入后端接口，方法失败时直接抛出异常（由 SlideService 转为错误信息）
+
+    缺少任一抽象方法的后端在创建时即报错，不会等到演示中途调用时才失败。
+    """
+
+    name = 'base'
+
+    @abc.abstractmethod
+    def press(self, key: str) -> None:
+        """按下并释放一个键（pyautogui 键名）"""
+
+    @abc.abstractmethod
+    def move(self, dx: int, dy: int) -> None:
+        """相对移动鼠标"""
+
+    @abc.abstractmethod
+    def click(self) -> None:
+        """左键单击"""
+
+    @abc.abstractmethod
+    def right_click(self) -> None:
+        """右键单击"""
+
+    @abc.abstractmethod
+    def mouse_down(self) -> None:
+        """按下左键"""
+
+    @abc.abstractmethod
+    def mouse_up(self) -> None:
+        """释放左键"""
+
+    @abc.abstractmethod
+    def scroll(self, clicks: int) -> None:
+        """垂直滚动，正数向上"""
+
+    @abc.abstractmethod
+    def hscroll(self, clicks: int) -> None:
+        """水平滚动，正数向右"""
+
+    def close(self) -> None:
+        pass
+
+
+class PyAutoGUIBackend(InputBackend):
+    """pyautogui 实现"""
+
+    name = 'pyautogui'
+
+    def __init__(self):
+        # 防止 pyautogui 的安全机制（如果鼠标移到屏幕角落会触发异常）
+        pyautogui.FAILSAFE = False
+        # pyautogui 默认每次调用后 sleep 0.1 秒，远程控制场景不需要
+        pyautogui.PAUSE = 0
+
+    def press(self, key: str) -> None:
+        pyautogui.press(key)
+
+    def move(self, dx: int, dy: int) -> None:
+        current_x, current_y = pyautogui.position()
+        pyautogui.moveTo(current_x + dx, current_y + dy, duration=0)
+
+    def click(self) -> None:
+        pyautogui.click()
+
+    def right_click(self) -> None:
+        pyautogui.rightClick()
+
+    def mouse_down(self) -> None:
+        pyautogui.mouseDown()
+
+    def mouse_up(self) -> None:
+        pyautogui.mouseUp()
+
+    def scroll(self, clicks: int) -> None:
+        pyautogui.scroll(clicks)
+
+    def hscroll(self, clicks: int) -> None:
+        pyautogui.hscroll(clicks)
+
+
+# pyautogui 键名 -> X11 keysym 名称
+_XTEST_KEYSYMS = {
+    'right': 'Right',
+    'left': 'Left',
+    'up': 'Up',
+    'down': 'Down',
+    'home': 'Home',
+    'end': 'End',
+    'pageup': 'Prior',
+    'pagedown': 'Next',
+    'space': 'space',
+    'enter': 'Return',
+    'esc': 'Escape',
+    'shift': 'Shift_L',
+}
+
+
+class XTestBackend(InputBackend):
+    """X11 XTest 实现（依赖 python-xlib，Linux 下随 pyautogui 一起安装）
+
+    相对移动由 X 服务器完成，不需要先查询指针位置；每个操作只 flush 一次，不等待往返。
+    """
+
+    name = 'xtest'
+
+    def __init__(self, display_name: str = None):
+        if not sys.platform.startswith('linux'):
+            raise BackendUnavailable('xtest backend requires Linux/X11')
+        try:
+            from Xlib import X, XK, display as xdisplay
+            from Xlib.ext import xtest
+            # 同一个 Display 会被多个线程（waitress / socketio 的请求线程与输入泵）共用，
+            # python-xlib 默认使用空锁，必须在创建 Display 之前启用线程安全的锁
+            import Xlib.threaded  # noqa: F401
+        except ImportError as e:
+            raise BackendUnavailable('python-xlib is not installed: %s' % e)
+        try:
+            self._display = xdisplay.Display(display_name)
+        except Exception as e:
+            raise BackendUnavailable('cannot open X display: %s' % e)
+        if not self._display.has_extension('XTEST'):
+            self._display.close()
+            raise BackendUnavailable('X server has no XTEST extension')
+        self._X = X
+        self._XK = XK
+        self._fake_input = xtest.fake_input
+        self._keycodes: Dict[str, int] = {}
+
+    def _keycode(self, key: str) -> int:
+        code = self._keycodes.get(key)
+        if code is None:
+            keysym = self._XK.string_to_keysym(_XTEST_KEYSYMS.get(key, key))
+            code = self._display.keysym_to_keycode(keysym) if keysym else 0
+            if not code:
+                raise ValueError('unknown key: %s' % key)
+            self._keycodes[key] = code
+        return code
+
+    def press(self, key: str) -> None:
+        code = self._keycode(key)
+        self._fake_input(self._display, self._X.KeyPress, code)
+        self._fake_input(self._display, self._X.KeyRelease, code)
+        self._display.flush()
+
+    def move(self, dx: int, dy: int) -> None:
+        # MotionNotify 的 detail=True 表示相对移动
+        self._fake_input(self._display, self._X.MotionNotify, detail=True, x=int(dx), y=int(dy))
+        self._display.flush()
+
+    def _button(self, button: int, down: bool = True, up: bool = True, times: int = 1) -> None:
+        for _ in range(times):
+            if down:
+                self._fake_input(self._display, self._X.ButtonPress, button)
+            if up:
+                self._fake_input(self._display, self._X.ButtonRelease, button)
+        self._display.flush()
+
+    def click(self) -> None:
+        self._button(1)
+
+    def right_click(self) -> None:
+        self._button(3)
+
+    def mouse_down(self) -> None:
+        self._button(1, up=False)
+
+    def mouse_up(self) -> None:
+        self._button(1, down=False)
+
+    def scroll(self, clicks: int) -> None:
+        # X11 用按钮 4/5 表示上/下滚动
+        self._button(4 if clicks > 0 else 5, times=abs(int(clicks)))
+
+    def hscroll(self, clicks: int) -> None:
+        # 按钮 6/7 表示左/右滚动
+        self._button(7 if clicks > 0 else 6, times=abs(int(clicks)))
+
+    def close(self) -> None:
+        try:
+            self._display.close()
+        except Exception:
+            pass
+
+
+class MockBackend(InputBackend):
+    """只记录调用的后端，events 中为 (方法名, 参数...) 元组"""
+
+    name = 'mock'
+
+    def __init__(self):
+        self.events: List[Tuple] = []
+
+    def press(self, key: str) -> None:
+        self.events.append(('press', key))
+
+    def move(self, dx: int, dy: int) -> None:
+        self.events.append(('move', dx, dy))
+
+    def click(self) -> None:
+        self.events.append(('click',))
+
+    def right_click(self) -> None:
+        self.events.append(('right_click',))
+
+    def mouse_down(self) -> None:
+        self.events.append(('mouse_down',))
+
+    def mouse_up(self) -> None:
+        self.events.append(('mouse_up',))
+
+    def scroll(self, clicks: int) -> None:
+        self.events.append(('scroll', clicks))
+
+    def hscroll(self, clicks: int) -> None:
+        self.events.append(('hscroll', clicks))
+
+
+BACKENDS = {
+    'pyautogui': PyAutoGUIBackend,
+    'xtest': XTestBackend,
+    'mock': MockBackend,
+}
+
+# auto 模式下按顺序尝试的后端
+_AUTO_ORDER = ('xtest', 'pyautogui') if sys.platform.startswith('linux') else ('pyautogui',)
+
+
+def create_backend(name: str = 'auto') -> InputBackend:
+    """按名称创建后端；auto 时优先使用当前平台更快的实现，不可用时回退到 pyautogui"""
+    if name != 'auto':
+        if name not in BACKENDS:
+            raise ValueError('unknown input backend: %s' % name)
+        return BACKENDS[name]()
+    for candidate in _AUTO_ORDER:
+        try:
+            return BACKENDS[candidate]()
+        except BackendUnavailable:
+            continue
+    return PyAutoGUIBackend()
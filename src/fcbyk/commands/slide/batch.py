@@ -0,0 +1,111 @@
+"""
+slide 批量指令
+一次请求提交按顺序执行的动作列表（可为每步设置执行前的等待时间），
+例如“回到第一页，再翻 5 页”只需一次往返，服务端返回每一步的结果与耗时。
+"""
+import math
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+
+
+# 单次批量最多步数
+BATCH_MAX_STEPS = 50
+# 单步等待上限与整批等待总和上限（毫秒），避免请求长时间占用
+BATCH_MAX_DELAY_MS = 5000
+BATCH_MAX_TOTAL_DELAY_MS = 15000
+
+# 动作名 -> 是否带 dx / dy 参数
+BATCH_ACTIONS = {
+    'next': False,
+    'prev': False,
+    'home': False,
+    'end': False,
+    'move': True,
+    'click': False,
+    'down': False,
+    'up': False,
+    'rightclick': False,
+    'scroll': True,
+}
+
+
+def _number(value, name: str, index: int):
+    if value is None:
+        return 0
+    # JSON 解析允许 NaN / Infinity，它们能通过所有范围比较，需单独排除
+    if isinstance(value, bool) or not isinstance(value, (int, float)) or not math.isfinite(value):
+        raise ValueError('step %d: %s must be a finite number' % (index, name))
+    return value
+
+
+def parse_batch(steps) -> List[Dict]:
+    """校验并规范化动作列表，不合法时抛出 ValueError（整批都不执行）"""
+    if not isinstance(steps, list) or not steps:
+        raise ValueError('steps must be a non-empty list')
+    if len(steps) > BATCH_MAX_STEPS:
+        raise ValueError('too many steps (max %d)' % BATCH_MAX_STEPS)
+
+    parsed = []
+    total_delay = 0
+    for index, step in enumerate(steps):
+        if isinstance(step, str):
+            step = {'action': step}
+        if not isinstance(step, dict):
+            raise ValueError('step %d: must be an object' % index)
+        action = step.get('action')
+        if action not in BATCH_ACTIONS:
+            raise ValueError('step %d: unknown action %r' % (index, action))
+        delay_ms = _number(step.get('delay_ms'), 'delay_ms', index)
+        if delay_ms < 0 or delay_ms > BATCH_MAX_DELAY_MS:
+            raise ValueError('step %d: delay_ms must be between 0 and %d' % (index, BATCH_MAX_DELAY_MS))
+        total_delay += delay_ms
+        item = {'action': action, 'delay_ms': delay_ms}
+        if BATCH_ACTIONS[action]:
+            item['dx'] = _number(step.get('dx'), 'dx', index)
+            item['dy'] = _number(step.get('dy'), 'dy', index)
+        parsed.append(item)
+
+    if total_delay > BATCH_MAX_TOTAL_DELAY_MS:
+        raise ValueError('total delay_ms exceeds %d' % BATCH_MAX_TOTAL_DELAY_MS)
+    return parsed
+
+
+def run_batch(
+    steps: List[Dict],
+    execute: Callable[[Dict], Tuple[bool, Optional[str]]],
+    stop_on_error: bool = True,
+    sleep: Callable[[float], None] = time.sleep,
+    clock: Callable[[], float] = time.perf_counter,
+) -> Dict:
+    """依次执行 parse_batch 的结果
+
+    execute(step) 返回 (success, error)。每步结果包含相对批量开始的时刻 at_ms
+    与执行耗时 elapsed_ms；stop_on_error 时遇到失败即停止，之后的步骤不执行。
+    """
+    results = []
+    started = clock()
+    for index, step in enumerate(steps):
+        if step['delay_ms']:
+            sleep(step['delay_ms'] / 1000.0)
+        step_started = clock()
+        try:
+            success, error = execute(step)
+        except Exception as e:
+            success, error = False, str(e)
+        finished = clock()
+        results.append({
+            'index': index,
+            'action': step['action'],
+            'success': bool(success),
+            'error': None if success else (error or '%s failed' % step['action']),
+            'at_ms': round((step_started - started) * 1000, 3),
+            'elapsed_ms': round((finished - step_started) * 1000, 3),
+        })
+        if not success and stop_on_error:
+            break
+    return {
+        'steps': results,
+        'completed': sum(1 for r in results if r['success']),
+        'total': len(steps),
+        'elapsed_ms': round((clock() - started) * 1000, 3),
+    }
@@ -0,0 +1,211 @@
+"""
+slide 屏幕快照（可选功能，依赖 Pillow）
+每次翻页后由后台线程截取演示屏幕，缩小并编码为 JPEG，按页码缓存并推送给所有控制端。
+截图先比较缩略图像素摘要，画面没有变化时不重新编码、不重复推送。
+页码以“首页”为 0：服务启动时不知道演示停在哪一页，按过 home 之后才开始按页缓存。
+"""
+import hashlib
+import io
+import threading
+import time
+from collections import OrderedDict
+from typing import Callable, Dict, Optional
+
+
+# 缩略图最大宽度（像素）
+CAPTURE_MAX_WIDTH = 480
+CAPTURE_JPEG_QUALITY = 60
+# 翻页后等待切换动画结束再截图（秒）
+CAPTURE_SETTLE_DELAY = 0.35
+# 最多缓存多少页的缩略图
+CAPTURE_CACHE_SLIDES = 64
+
+
+def capture_unavailable_reason() -> Optional[str]:
+    """截图依赖缺失时返回原因，可用时返回 None"""
+    try:
+        from PIL import Image, ImageGrab  # noqa: F401
+    except ImportError:
+        return "slide capture requires Pillow: pip install Pillow"
+    return None
+
+
+def grab_screen():
+    from PIL import ImageGrab
+    return ImageGrab.grab()
+
+
+def blocking_executor(async_mode: str = 'threading') -> Callable[[Callable[[], object]], object]:
+    """返回在系统线程中执行阻塞调用的函数 run(fn) -> fn()
+
+    eventlet / gevent 打补丁后 threading.Thread 只是协程，截图与缩放、JPEG 编码
+    会阻塞整个事件循环，需交给各自的原生线程池；threading 模式直接在当前线程执行。
+    """
+    if async_mode == 'eventlet':
+        from eventlet import tpool
+        return tpool.execute
+    if async_mode == 'gevent':
+        from gevent import get_hub
+        return lambda fn: get_hub().threadpool.apply(fn)
+    return lambda fn: fn()
+
+
+class SlideCapture:
+    """翻页快照管线，线程安全
+
+    - navigate() 记录翻页并唤醒后台线程，连续翻页只截最后一次；
+    - 页码未知（启动后尚未 home，或 end 之后）时截图照常推送，但不按页缓存；
+    - 目标页已有缓存时先推送缓存的缩略图，截图结果相同则不再推送；
+    - 截图、缩放与编码经 run_blocking 执行（协程模式下放到原生线程池）；
+    - publish 收到的 frame 为 dict：index / digest / width / height / image(JPEG bytes)。
+    """
+
+    def __init__(
+        self,
+        publish: Callable[[Dict], None],
+        grab: Callable[[], object] = grab_screen,
+        max_width: int = CAPTURE_MAX_WIDTH,
+        quality: int = CAPTURE_JPEG_QUALITY,
+        settle_delay: float = CAPTURE_SETTLE_DELAY,
+        cache_slides: int = CAPTURE_CACHE_SLIDES,
+        run_blocking: Optional[Callable[[Callable[[], object]], object]] = None,
+    ):
+        self._publish = publish
+        self.grab = grab
+        self._run_blocking = run_blocking or blocking_executor()
+        self.max_width = max_width
+        self.quality = quality
+        self.settle_delay = settle_delay
+        self.cache_slides = cache_slides
+        self._lock = threading.Lock()
+        self._wake = threading.Condition(self._lock)
+        self._cache: 'OrderedDict[int, Dict]' = OrderedDict()
+        self._index: Optional[int] = None
+        self._generation = 0
+        self._captured_generation = 0
+        self._latest: Optional[Dict] = None
+        self._thread = None
+        self._stopped = False
+        self.captured = 0
+        self.skipped = 0
+        self.errors = 0
+
+    # -------------------- 翻页 --------------------
+    def navigate(self, action: str) -> None:
+        """记录一次翻页（next / prev / home / end）并安排截图"""
+        cached = None
+        with self._lock:
+            index = self._index
+            if action == 'home':
+                index = 0
+            elif action == 'end':
+                # 不知道总页数，之后的相对翻页也无法确定页码（直到再次 home）
+                index = None
+            elif index is not None:
+                index = index + 1 if action == 'next' else max(index - 1, 0)
+            self._index = index
+            if index is not None and index in self._cache:
+                cached = self._cache[index]
+                self._cache.move_to_end(index)
+                if self._latest is not None and self._latest['digest'] == cached['digest']:
+                    cached = None
+                else:
+                    self._latest = cached
+            self._generation += 1
+            if self._thread is None and not self._stopped:
+                self._thread = threading.Thread(target=self._run, name='slide-capture', daemon=True)
+                self._thread.start()
+            self._wake.notify()
+        if cached is not None:
+            self._publish(cached)
+
+    @property
+    def index(self) -> Optional[int]:
+        with self._lock:
+            return self._index
+
+    def latest(self) -> Optional[Dict]:
+        with self._lock:
+            return self._latest
+
+    # -------------------- 截图 --------------------
+    def capture_once(self) -> Optional[Dict]:
+        """截图一次；画面与最近推送的相同时返回 None"""
+        thumb, digest = self._run_blocking(self._grab_thumbnail)
+
+        with self._lock:
+            index = self._index
+            if self._latest is not None and self._latest['digest'] == digest:
+                self.skipped += 1
+                if index is not None:
+                    self._cache[index] = dict(self._latest, index=index)
+                    self._cache.move_to_end(index)
+                return None
+
+        frame = {
+            'index': index,
+            'digest': digest,
+            'width': thumb.width,
+            'height': thumb.height,
+            'image': self._run_blocking(lambda: self._encode(thumb)),
+        }
+        with self._lock:
+            self._latest = frame
+            self.captured += 1
+            if index is not None:
+                self._cache[index] = frame
+                self._cache.move_to_end(index)
+                while len(self._cache) > self.cache_slides:
+                    self._cache.popitem(last=False)
+        self._publish(frame)
+        return frame
+
+    def _grab_thumbnail(self):
+        image = self.grab()
+        thumb = image.convert('RGB')
+        if thumb.width > self.max_width:
+            height = max(1, round(thumb.height * self.max_width / thumb.width))
+            thumb = thumb.resize((self.max_width, height))
+        return thumb, hashlib.blake2b(thumb.tobytes(), digest_size=8).hexdigest()
+
+    def _encode(self, thumb) -> bytes:
+        buf = io.BytesIO()
+        thumb.save(buf, format='JPEG', quality=self.quality)
+        return buf.getvalue()
+
+    def _run(self) -> None:
+        while True:
+            with self._lock:
+                while self._generation == self._captured_generation and not self._stopped:
+                    self._wake.wait()
+                if self._stopped:
+                    return
+            # 等待切换动画；期间又有翻页则重新等待，只截最后一页
+            while True:
+                with self._lock:
+                    generation = self._generation
+                time.sleep(self.settle_delay)
+                with self._lock:
+                    if self._generation == generation:
+                        self._captured_generation = generation
+                        break
+            try:
+                self.capture_once()
+            except Exception:
+                with self._lock:
+                    self.errors += 1
+
+    def stop(self) -> None:
+        with self._lock:
+            self._stopped = True
+            self._wake.notify_all()
+
+    def stats(self) -> Dict:
+        with self._lock:
+            return {
+                'index': self._index,
+                'cached_slides': len(self._cache),
+                'captured': self.captured,
+                'skipped': self.skipped,
+                'errors': self.errors,
+            }
@@ -2,15 +2,22 @@
 slide 命令行接口模块
 提供 PPT 远程控制的 CLI 命令
 """
+import os
+import sys
+
 import click
 import webbrowser
 import fcbyk.svc as svc_core
+from fcbyk.utils import asyncmode
 
 from fcbyk.utils.network import get_private_networks
 from fcbyk.cli_support.guard import check_port
 
 from .service import SlideService
-from .controller import create_slide_app
+from .backends import BACKENDS, create_backend
+from .controller import create_slide_app, resolve_async_mode
+from .gesture import DEFAULT_POINTER_ACCEL, POINTER_FILTERS
+from .capture import capture_unavailable_reason
 from fcbyk.cli_support.output import echo_network_urls, copy_to_clipboard
 
 
@@ -34,9 +41,58 @@ from fcbyk.cli_support.output import echo_network_urls, copy_to_clipboard
     hidden=True
 )
 @click.option("-nb", "--no-browser", is_flag=True, help="Disable automatic browser opening")
-def slide(port, daemon, password, no_browser):
+@click.option(
+    "--backend",
+    type=click.Choice(["auto"] + sorted(n for n in BACKENDS if n != "mock")),
+    default="auto",
+    show_default=True,
+    help="Input injection backend (auto prefers xtest on Linux, falls back to pyautogui)",
+)
+@click.option(
+    "--async-mode",
+    type=click.Choice(["threading", "eventlet", "gevent"]),
+    default="threading",
+    show_default=True,
+    help="Socket.IO server mode (eventlet: pip install fcbyk-cli[async]; gevent: install gevent and gevent-websocket manually)",
+)
+@click.option(
+    "--pointer-filter",
+    type=click.Choice(POINTER_FILTERS),
+    default="one-euro",
+    show_default=True,
+    help="Smoothing filter applied to touchpad movement",
+)
+@click.option(
+    "--pointer-accel",
+    type=click.FloatRange(min=0),
+    default=DEFAULT_POINTER_ACCEL,
+    show_default=True,
+    help="Pointer acceleration strength (0 disables acceleration)",
+)
+@click.option(
+    "--capture",
+    is_flag=True,
+    help="Send a thumbnail of the presentation screen to controllers after each slide change (requires Pillow)",
+)
+def slide(port, daemon, password, no_browser, backend, async_mode, pointer_filter, pointer_accel, capture):
     """启动 PPT 远程控制服务器"""
 
+    try:
+        async_mode = resolve_async_mode(async_mode)
+    except RuntimeError as e:
+        click.echo(f" Error: {e}")
+        return
+    if async_mode != "threading" and asyncmode.patched_mode() != async_mode:
+        if os.environ.get(asyncmode.ASYNC_MODE_ENV) == async_mode:
+            # 已经是重新启动后的进程，补丁仍未生效：不再重复启动
+            click.echo(f" Error: failed to enable async mode '{async_mode}'")
+            return
+        # 协程补丁只能在进程入口完成：前台运行时带上 FCBYK_ASYNC_MODE 重新启动本命令，
+        # 后台运行时由子进程继承该环境变量
+        if not daemon:
+            sys.exit(asyncmode.relaunch(async_mode))
+        os.environ[asyncmode.ASYNC_MODE_ENV] = async_mode
+
     if not password:
         while True:
             password = click.prompt(
@@ -52,13 +108,25 @@ def slide(port, daemon, password, no_browser):
     if not check_port(port):
         return
 
+    if capture:
+        reason = capture_unavailable_reason()
+        if reason:
+            click.echo(f" Error: {reason}")
+            return
+
     click.echo()
 
     # 创建服务
-    service = SlideService(password)
+    service = SlideService(password, backend=create_backend(backend))
 
     # 创建 Flask 应用和 SocketIO
-    app, socketio = create_slide_app(service)
+    app, socketio = create_slide_app(
+        service,
+        async_mode=async_mode,
+        pointer_filter=pointer_filter,
+        pointer_accel=pointer_accel,
+        capture=capture,
+    )
     
     # 获取网络信息
     private_networks = get_private_networks()
@@ -77,10 +145,21 @@ def slide(port, daemon, password, no_browser):
     click.echo()
 
     if not daemon:
-        socketio.run(app, host='0.0.0.0', port=port, allow_unsafe_werkzeug=True)
+        if async_mode == "threading":
+            socketio.run(app, host='0.0.0.0', port=port, allow_unsafe_werkzeug=True)
+        else:
+            # eventlet / gevent 自带生产级 WSGI + WebSocket 服务器
+            socketio.run(app, host='0.0.0.0', port=port, log_output=False)
         return
 
     args = ["--port", str(port), "--daemon-password", password]
     if no_browser:
         args.append("--no-browser")
+    if backend != "auto":
+        args.extend(["--backend", backend])
+    args.extend(["--async-mode", async_mode])
+    args.extend(["--pointer-filter", pointer_filter, "--pointer-accel", str(pointer_accel)])
+    if capture:
+        args.append("--capture")
     svc_core.start_service("slide", args)
+
@@ -2,23 +2,54 @@
 slide 控制器层
 处理 Flask 路由、WebSocket 事件和 HTTP 请求/响应
 """
+import importlib.util
 import os
-import secrets
 import subprocess
 import sys
+import threading
 import time
 from functools import wraps
-from flask import request, session, current_app, redirect
-from flask_socketio import SocketIO, disconnect
+from flask import request, session, current_app, redirect, g, Response
+from flask_socketio import SocketIO, disconnect, emit
 
 from fcbyk.web.app import create_spa
 from fcbyk.web.R import R
 from fcbyk.utils.network import get_private_networks
 from .service import SlideService
+from .pump import InputPump
+from .protocol import decode_move_frame, seq_is_newer
+from .metrics import SlideMetrics
+from .gesture import DEFAULT_POINTER_ACCEL, POINTER_IDLE_RESET, PointerPipeline
+from .tokens import QR_TOKEN_TTL_SECONDS, TokenStore
+from .netinfo import NetworkInfo
+from .capture import SlideCapture, blocking_executor
+from .batch import parse_batch, run_batch
 
 
-QR_LOGIN_TOKENS = {}
-QR_TOKEN_TTL_SECONDS = 120
+# 扫码登录令牌（有效期 QR_TOKEN_TTL_SECONDS，数量有上限）
+qr_tokens = TokenStore(ttl=QR_TOKEN_TTL_SECONDS)
+
+# 异步服务模式 -> 需要的模块（gevent 需要 gevent-websocket 才支持 WebSocket）
+ASYNC_MODE_MODULES = {
+    'eventlet': ('eventlet',),
+    'gevent': ('gevent', 'geventwebsocket'),
+}
+
+
+def resolve_async_mode(mode: str = 'threading') -> str:
+    """
+    校验 Socket.IO 服务模式
+    
+    eventlet / gevent 为可选依赖，需显式指定；缺少依赖时抛出 RuntimeError。
+    """
+    if mode in ASYNC_MODE_MODULES and not all(
+        importlib.util.find_spec(m) is not None for m in ASYNC_MODE_MODULES[mode]
+    ):
+        raise RuntimeError(
+            "async mode '%s' requires: pip install %s"
+            % (mode, ' '.join(m.replace('geventwebsocket', 'gevent-websocket') for m in ASYNC_MODE_MODULES[mode]))
+        )
+    return mode
 
 
 def _collect_local_ips():
@@ -92,42 +123,72 @@ def _is_local_request():
     client_ip = request.remote_addr or ""
     if client_ip in ("127.0.0.1", "::1"):
         return True
-    local_ips = current_app.config.get("SLIDE_LOCAL_IPS") or []
+    network_info = getattr(current_app, "network_info", None)
+    local_ips = network_info.local_ips() if network_info is not None else []
     return client_ip in local_ips
 
 
 def _create_login_token():
-    token = secrets.token_urlsafe(16)
-    QR_LOGIN_TOKENS[token] = time.time()
-    return token
+    return qr_tokens.create()
 
 
 def _consume_login_token(token):
-    created_at = QR_LOGIN_TOKENS.pop(token, None)
-    if not created_at:
-        return False
-    if time.time() - created_at > QR_TOKEN_TTL_SECONDS:
-        return False
-    return True
+    return qr_tokens.consume(token)
 
 
-def create_slide_app(service: SlideService):
+def create_slide_app(
+    service: SlideService,
+    async_mode: str = 'threading',
+    pointer_filter: str = 'one-euro',
+    pointer_accel: float = DEFAULT_POINTER_ACCEL,
+    capture: bool = False,
+):
     """
     创建 slide Flask 应用
     
     Args:
         service: SlideService 实例
+        async_mode: Socket.IO 服务模式（threading / eventlet / gevent）
+        pointer_filter: 指针平滑滤波（one-euro / ema / none）
+        pointer_accel: 指针加速强度，0 表示不加速
+        capture: 是否在翻页后截取屏幕缩略图推送给控制端（需要 Pillow）
         
     Returns:
         (Flask应用, SocketIO实例)
     """
     app = create_spa("slide.html")
     app.secret_key = os.urandom(24)
-    app.config["SLIDE_LOCAL_IPS"] = _collect_local_ips()
-    socketio = SocketIO(app, cors_allowed_origins="*", async_mode='threading', manage_session=False)
+    # Wi-Fi 名称与本机 IP 走缓存，后台刷新，轮询接口不等待子进程
+    app.network_info = NetworkInfo(
+        wifi_fn=lambda: _get_wifi_name(),
+        ips_fn=lambda: _collect_local_ips(),
+    )
+    app.network_info.refresh_async()
+    options = {}
+    if async_mode != 'threading':
+        # 异步模式只接受 WebSocket：客户端直接建立 WebSocket，不经过长轮询再升级
+        options['transports'] = ['websocket']
+    socketio = SocketIO(
+        app, cors_allowed_origins="*", async_mode=async_mode, manage_session=False, **options
+    )
     app.slide_service = service
+    # socket 的鼠标移动经 InputPump 合并后按固定频率注入
+    app.input_pump = InputPump(lambda dx, dy: service.move_mouse(dx, dy))
+    app.slide_metrics = SlideMetrics()
+    app.slide_capture = None
+    if capture:
+        app.slide_capture = SlideCapture(
+            lambda frame: socketio.emit('slide_frame', frame),
+            run_blocking=blocking_executor(async_mode),
+        )
     register_routes(app, service)
-    register_socketio_events(socketio, service)
+    pointer_factory = None
+    if pointer_filter != 'none' or pointer_accel > 0:
+        pointer_factory = lambda: PointerPipeline(pointer_filter, pointer_accel)  # noqa: E731
+        pointer_factory()  # 参数不合法时在启动阶段报错
+    register_socketio_events(
+        socketio, service, app.input_pump, app.slide_metrics, pointer_factory=pointer_factory
+    )
     return app, socketio
 
 
@@ -150,6 +211,26 @@ def require_socketio_auth(f):
 
 
 def register_routes(app, service: SlideService):
+    metrics = getattr(app, 'slide_metrics', None)
+
+    def after_navigation(action):
+        capture = getattr(app, 'slide_capture', None)
+        if capture is not None:
+            capture.navigate(action)
+
+    if metrics is not None:
+        @app.before_request
+        def _start_timer():
+            g.slide_started_at = time.perf_counter()
+
+        @app.after_request
+        def _record_timer(response):
+            # 只统计控制类接口（/api/...），按 http:<endpoint> 分类
+            started = g.pop('slide_started_at', None)
+            if started is not None and request.endpoint and request.path.startswith('/api/'):
+                metrics.record('http:' + request.endpoint, time.perf_counter() - started)
+            return response
+
     @app.route('/api/login', methods=['POST'])
     def login():
         data = request.get_json()
@@ -177,7 +258,8 @@ def register_routes(app, service: SlideService):
         token = _create_login_token()
         base_url = request.host_url.rstrip('/')
         login_url = base_url + '/auto-login?token=' + token
-        wifi_name = _get_wifi_name()
+        network_info = getattr(app, 'network_info', None)
+        wifi_name = network_info.wifi_name() if network_info is not None else ''
         data = {"login_url": login_url}
         if wifi_name:
             data["wifi_name"] = wifi_name
@@ -190,12 +272,25 @@ def register_routes(app, service: SlideService):
         token = request.args.get('token') or ''
         if not token:
             return R.success({"valid": False})
-        created_at = QR_LOGIN_TOKENS.get(token)
-        if not created_at:
-            return R.success({"valid": False})
-        if time.time() - created_at > QR_TOKEN_TTL_SECONDS:
-            return R.success({"valid": False})
-        return R.success({"valid": True})
+        return R.success({"valid": qr_tokens.is_valid(token)})
+    
+    @app.route('/internal/metrics', methods=['GET'])
+    def internal_metrics():
+        if not _is_local_request() or metrics is None:
+            return "", 404
+        data = metrics.snapshot()
+        pump = getattr(app, 'input_pump', None)
+        data["pump"] = pump.stats() if pump is not None else None
+        capture = getattr(app, 'slide_capture', None)
+        data["capture"] = capture.stats() if capture is not None else None
+        return R.success(data)
+    
+    @app.route('/internal/metrics/reset', methods=['POST'])
+    def internal_metrics_reset():
+        if not _is_local_request() or metrics is None:
+            return "", 404
+        metrics.reset()
+        return R.success(message="Metrics reset")
     
     @app.route('/auto-login', methods=['GET'])
     def auto_login():
@@ -212,6 +307,7 @@ def register_routes(app, service: SlideService):
     def next_slide():
         success, error = service.next_slide()
         if success:
+            after_navigation("next")
             return R.success({"action": "next"})
         else:
             return R.error(error or "next failed", 500)
@@ -221,6 +317,7 @@ def register_routes(app, service: SlideService):
     def prev_slide():
         success, error = service.prev_slide()
         if success:
+            after_navigation("prev")
             return R.success({"action": "prev"})
         else:
             return R.error(error or "prev failed", 500)
@@ -230,6 +327,7 @@ def register_routes(app, service: SlideService):
     def home_slide():
         success, error = service.home_slide()
         if success:
+            after_navigation("home")
             return R.success({"action": "home"})
         else:
             return R.error(error or "home failed", 500)
@@ -239,10 +337,78 @@ def register_routes(app, service: SlideService):
     def end_slide():
         success, error = service.end_slide()
         if success:
+            after_navigation("end")
             return R.success({"action": "end"})
         else:
             return R.error(error or "end failed", 500)
     
+    # 批量动作名 -> 对应的服务方法
+    batch_handlers = {
+        'next': lambda step: service.next_slide(),
+        'prev': lambda step: service.prev_slide(),
+        'home': lambda step: service.home_slide(),
+        'end': lambda step: service.end_slide(),
+        'move': lambda step: service.move_mouse(step['dx'], step['dy']),
+        'click': lambda step: service.click_mouse(),
+        'down': lambda step: service.mouse_down(),
+        'up': lambda step: service.mouse_up(),
+        'rightclick': lambda step: service.right_click_mouse(),
+        'scroll': lambda step: service.scroll_mouse(step['dx'], step['dy']),
+    }
+    # 同一时间只执行一个批量请求（整批最长约 15 秒，后来的请求直接返回 409，不占用线程等待）；
+    # 单个动作接口不受此锁限制，可能穿插在批量步骤之间执行
+    batch_lock = threading.Lock()
+
+    def execute_batch_step(step):
+        action = step['action']
+        pump = getattr(app, 'input_pump', None)
+        if pump is not None:
+            # 先注入之前累积的指针移动，保证顺序
+            pump.flush()
+        started = time.perf_counter()
+        success, error = batch_handlers[action](step)
+        if metrics is not None:
+            metrics.record('batch:' + action, time.perf_counter() - started)
+        if success and action in ('next', 'prev', 'home', 'end'):
+            after_navigation(action)
+        return success, error
+
+    @app.route('/api/batch', methods=['POST'])
+    @require_auth
+    def batch():
+        data = request.get_json(silent=True) or {}
+        try:
+            steps = parse_batch(data.get('steps'))
+        except ValueError as e:
+            return R.error(str(e), 400)
+        stop_on_error = data.get('stop_on_error', True) is not False
+        if not batch_lock.acquire(blocking=False):
+            return R.error("Another batch is running", 409)
+        try:
+            result = run_batch(steps, execute_batch_step, stop_on_error=stop_on_error)
+        finally:
+            batch_lock.release()
+        failed = next((r for r in result['steps'] if not r['success']), None)
+        if failed is not None:
+            message = "step %d (%s) failed: %s" % (failed['index'], failed['action'], failed['error'])
+            return R.error(message, 500, result)
+        return R.success(result)
+    
+    @app.route('/api/slide/frame', methods=['GET'])
+    @require_auth
+    def slide_frame():
+        capture = getattr(app, 'slide_capture', None)
+        frame = capture.latest() if capture is not None else None
+        if frame is None:
+            return R.error("No frame", 404)
+        etag = '"%s"' % frame['digest']
+        headers = {'ETag': etag, 'Cache-Control': 'no-cache'}
+        if frame['index'] is not None:
+            headers['X-Slide-Index'] = str(frame['index'])
+        if request.headers.get('If-None-Match') == etag:
+            return Response(status=304, headers=headers)
+        return Response(frame['image'], mimetype='image/jpeg', headers=headers)
+    
     @app.route('/api/mouse/move', methods=['POST'])
     @require_auth
     def mouse_move():
@@ -304,48 +470,142 @@ def register_routes(app, service: SlideService):
             return R.error(error or "scroll failed", 500)
 
 
-def register_socketio_events(socketio: SocketIO, service: SlideService):
+def register_socketio_events(
+    socketio: SocketIO,
+    service: SlideService,
+    pump: InputPump,
+    metrics: SlideMetrics,
+    pointer_factory=None,
+):
+    # 每个连接最后处理的二进制帧序号
+    last_move_seq = {}
+    # 每个连接独立的指针平滑 / 加速状态
+    pointers = {}
+    # 正在等待滑动结束的连接（每次滑动只有一个后台任务）
+    settling = set()
+    settling_lock = threading.Lock()
+
+    def settle_pointer(sid, pointer):
+        # 滑动结束（空闲超过 POINTER_IDLE_RESET）后补发滤波滞留的位移
+        while True:
+            socketio.sleep(POINTER_IDLE_RESET)
+            with settling_lock:
+                rest = pointer.flush_if_idle()
+                if rest is None:
+                    continue
+                settling.discard(sid)
+            if any(rest):
+                pump.push(*rest)
+            return
+
+    def push_move(dx, dy):
+        if pointer_factory is not None:
+            sid = getattr(request, 'sid', None)
+            pointer = pointers.get(sid)
+            if pointer is None:
+                pointer = pointers.setdefault(sid, pointer_factory())
+            try:
+                dx, dy = pointer.process(float(dx or 0), float(dy or 0))
+            except (TypeError, ValueError):
+                return
+            with settling_lock:
+                if sid not in settling:
+                    settling.add(sid)
+                    socketio.start_background_task(settle_pointer, sid, pointer)
+        pump.push(dx, dy)
+
+    def flush_moves():
+        # 补发滤波滞留的位移后立即注入
+        if pointer_factory is not None:
+            pointer = pointers.get(getattr(request, 'sid', None))
+            if pointer is not None:
+                rest = pointer.flush()
+                if any(rest):
+                    pump.push(*rest)
+        pump.flush()
+
     @socketio.on('connect')
     def handle_connect():
         if not session.get('authenticated'):
             disconnect()
             return False
+        # 新连接的控制端先收到当前画面
+        capture = getattr(current_app, 'slide_capture', None)
+        frame = capture.latest() if capture is not None else None
+        if frame is not None:
+            emit('slide_frame', frame)
+    
+    @socketio.on('disconnect')
+    def handle_disconnect():
+        sid = getattr(request, 'sid', None)
+        last_move_seq.pop(sid, None)
+        pointers.pop(sid, None)
     
     @socketio.on('mouse_move')
     @require_socketio_auth
+    @metrics.timed('socket:mouse_move')
     def handle_mouse_move(data):
         dx = data.get('dx', 0)
         dy = data.get('dy', 0)
-        service.move_mouse(dx, dy)
+        push_move(dx, dy)
+    
+    @socketio.on('mouse_move_bin')
+    @require_socketio_auth
+    @metrics.timed('socket:mouse_move_bin')
+    def handle_mouse_move_bin(data):
+        try:
+            seq, dx, dy, _count = decode_move_frame(data)
+        except ValueError:
+            return
+        sid = getattr(request, 'sid', None)
+        if not seq_is_newer(seq, last_move_seq.get(sid)):
+            return
+        last_move_seq[sid] = seq
+        push_move(dx, dy)
     
+    # 其它鼠标操作前先注入尚未注入的位移，保证先移动再点击
     @socketio.on('mouse_click')
     @require_socketio_auth
+    @metrics.timed('socket:mouse_click')
     def handle_mouse_click():
+        flush_moves()
         service.click_mouse()
     
     @socketio.on('mouse_down')
     @require_socketio_auth
+    @metrics.timed('socket:mouse_down')
     def handle_mouse_down():
+        flush_moves()
         service.mouse_down()
     
     @socketio.on('mouse_up')
     @require_socketio_auth
+    @metrics.timed('socket:mouse_up')
     def handle_mouse_up():
+        flush_moves()
         service.mouse_up()
     
     @socketio.on('mouse_rightclick')
     @require_socketio_auth
+    @metrics.timed('socket:mouse_rightclick')
     def handle_mouse_rightclick():
+        flush_moves()
         service.right_click_mouse()
     
     @socketio.on('mouse_scroll')
     @require_socketio_auth
+    @metrics.timed('socket:mouse_scroll')
     def handle_mouse_scroll(data):
         dx = data.get('dx', 0)
         dy = data.get('dy', 0)
+        flush_moves()
         service.scroll_mouse(dx, dy)
     
     @socketio.on('ping_server')
     @require_socketio_auth
-    def handle_ping_server():
+    @metrics.timed('socket:ping_server')
+    def handle_ping_server(data=None):
+        # 客户端在下一次 ping 时附带上一次测得的往返延迟
+        if isinstance(data, dict):
+            metrics.record_rtt(data.get('rtt'))
         return 'pong'
@@ -0,0 +1,167 @@
+"""
+slide 指针处理管线
+手机端发来的是原始位移。服务端先把位移换算成速度，用 One Euro / EMA 滤波平滑抖动，
+再按速度套用加速曲线（慢速精确、快速跨屏），最后输出带小数的位移交给 InputPump 累加注入。
+滤波有滞后，一次滑动结束时输出总和会少于实际位移，差值在滑动结束（空闲或按键）时由 flush() 补发。
+"""
+import math
+import threading
+import time
+from typing import Callable, Optional, Tuple
+
+
+# 两次事件间隔超过该秒数视为新的一次滑动，滤波器重新开始
+POINTER_IDLE_RESET = 0.25
+# 单次事件间隔的取值范围（秒），避免极端间隔放大速度
+POINTER_MIN_DT = 0.001
+POINTER_MAX_DT = 0.1
+# 新一次滑动的第一个事件按该间隔估算速度
+POINTER_DEFAULT_DT = 1.0 / 60
+
+# 加速曲线：速度（输入像素/秒）低于 ACCEL_LOW 时增益为 1，达到 ACCEL_HIGH 时为 1 + accel
+ACCEL_LOW = 200.0
+ACCEL_HIGH = 1500.0
+DEFAULT_POINTER_ACCEL = 1.0
+
+POINTER_FILTERS = ('one-euro', 'ema', 'none')
+
+
+def _alpha(cutoff: float, dt: float) -> float:
+    tau = 1.0 / (2 * math.pi * cutoff)
+    return 1.0 / (1.0 + tau / dt)
+
+
+class OneEuroFilter:
+    """One Euro 滤波器：慢速时强平滑去抖，快速时降低平滑减少滞后"""
+
+    def __init__(self, min_cutoff: float = 3.0, beta: float = 0.01, d_cutoff: float = 1.0):
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.d_cutoff = d_cutoff
+        self.reset()
+
+    def reset(self) -> None:
+        self._x: Optional[float] = None
+        self._dx = 0.0
+
+    def __call__(self, x: float, dt: float) -> float:
+        if self._x is None:
+            self._x = x
+            return x
+        dx = (x - self._x) / dt
+        self._dx += _alpha(self.d_cutoff, dt) * (dx - self._dx)
+        cutoff = self.min_cutoff + self.beta * abs(self._dx)
+        self._x += _alpha(cutoff, dt) * (x - self._x)
+        return self._x
+
+
+class EMAFilter:
+    """指数移动平均"""
+
+    def __init__(self, alpha: float = 0.5):
+        self.alpha = alpha
+        self.reset()
+
+    def reset(self) -> None:
+        self._x: Optional[float] = None
+
+    def __call__(self, x: float, dt: float) -> float:
+        if self._x is None:
+            self._x = x
+        else:
+            self._x += self.alpha * (x - self._x)
+        return self._x
+
+
+class _Passthrough:
+    def reset(self) -> None:
+        pass
+
+    def __call__(self, x: float, dt: float) -> float:
+        return x
+
+
+def _make_filter(name: str):
+    if name == 'one-euro':
+        return OneEuroFilter()
+    if name == 'ema':
+        return EMAFilter()
+    if name == 'none':
+        return _Passthrough()
+    raise ValueError('unknown pointer filter: %s' % name)
+
+
+def acceleration_gain(speed: float, accel: float) -> float:
+    """速度（像素/秒）对应的增益，在 ACCEL_LOW ~ ACCEL_HIGH 之间线性增加"""
+    if accel <= 0 or speed <= ACCEL_LOW:
+        return 1.0
+    ratio = min((speed - ACCEL_LOW) / (ACCEL_HIGH - ACCEL_LOW), 1.0)
+    return 1.0 + accel * ratio
+
+
+class PointerPipeline:
+    """单个控制端的指针处理状态，线程安全
+
+    process() 输入原始位移，返回平滑并加速后的位移（浮点，小数部分由 InputPump 保留）；
+    滤波滞留的位移累计在 _rest 中，由 flush() / flush_if_idle() 取出。
+    """
+
+    def __init__(
+        self,
+        filter: str = 'one-euro',
+        accel: float = DEFAULT_POINTER_ACCEL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.accel = accel
+        self._fx = _make_filter(filter)
+        self._fy = _make_filter(filter)
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._last_at: Optional[float] = None
+        self._rest_x = 0.0
+        self._rest_y = 0.0
+
+    def process(self, dx: float, dy: float) -> Tuple[float, float]:
+        now = self._clock()
+        with self._lock:
+            if self._last_at is None or now - self._last_at > POINTER_IDLE_RESET:
+                # 上一次滑动未被 flush 的滞留位移随本次输出补发
+                carry_x, carry_y = self._take_rest()
+                self._fx.reset()
+                self._fy.reset()
+                dt = POINTER_DEFAULT_DT
+            else:
+                carry_x = carry_y = 0.0
+                dt = min(max(now - self._last_at, POINTER_MIN_DT), POINTER_MAX_DT)
+            self._last_at = now
+
+            # 在速度域滤波，事件频率变化时结果保持一致
+            vx = self._fx(dx / dt, dt)
+            vy = self._fy(dy / dt, dt)
+            self._rest_x += dx - vx * dt
+            self._rest_y += dy - vy * dt
+            gain = acceleration_gain(math.hypot(vx, vy), self.accel)
+            return vx * dt * gain + carry_x, vy * dt * gain + carry_y
+
+    def _take_rest(self) -> Tuple[float, float]:
+        rest = (self._rest_x, self._rest_y)
+        self._rest_x = self._rest_y = 0.0
+        return rest
+
+    def _flush_locked(self) -> Tuple[float, float]:
+        self._fx.reset()
+        self._fy.reset()
+        self._last_at = None
+        return self._take_rest()
+
+    def flush(self) -> Tuple[float, float]:
+        """结束当前滑动：返回滤波滞留的位移（不加速）并重置滤波器"""
+        with self._lock:
+            return self._flush_locked()
+
+    def flush_if_idle(self) -> Optional[Tuple[float, float]]:
+        """距上一次事件超过 POINTER_IDLE_RESET 时 flush()，滑动仍在进行时返回 None"""
+        with self._lock:
+            if self._last_at is not None and self._clock() - self._last_at <= POINTER_IDLE_RESET:
+                return None
+            return self._flush_locked()
@@ -0,0 +1,70 @@
+"""
+slide 延迟统计
+按事件类型记录服务端处理耗时，并记录客户端上报的往返延迟（RTT），
+均保存在固定大小的直方图中（微秒），通过本机可访问的 /internal/metrics 查看。
+"""
+import threading
+import time
+from functools import wraps
+from typing import Dict
+
+from fcbyk.utils.histogram import LatencyHistogram
+
+
+class SlideMetrics:
+    """事件处理耗时与 RTT 直方图集合，线程安全"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._events: Dict[str, LatencyHistogram] = {}
+        self.rtt = LatencyHistogram()
+
+    def _histogram(self, event: str) -> LatencyHistogram:
+        hist = self._events.get(event)
+        if hist is None:
+            with self._lock:
+                hist = self._events.setdefault(event, LatencyHistogram())
+        return hist
+
+    def record(self, event: str, seconds: float) -> None:
+        """记录一次事件处理耗时（秒）"""
+        self._histogram(event).record(seconds * 1000000)
+
+    def record_rtt(self, ms) -> None:
+        """记录客户端上报的往返延迟（毫秒），非法值忽略"""
+        try:
+            ms = float(ms)
+        except (TypeError, ValueError):
+            return
+        if ms > 0:
+            self.rtt.record(ms * 1000)
+
+    def timed(self, event: str):
+        """装饰器：记录被装饰函数的执行耗时"""
+        def decorator(f):
+            @wraps(f)
+            def wrapper(*args, **kwargs):
+                start = time.perf_counter()
+                try:
+                    return f(*args, **kwargs)
+                finally:
+                    self.record(event, time.perf_counter() - start)
+            return wrapper
+        return decorator
+
+    def snapshot(self) -> Dict:
+        """各直方图汇总（毫秒）"""
+        with self._lock:
+            events = dict(self._events)
+        return {
+            'unit': 'ms',
+            'events': {name: hist.snapshot(scale=0.001) for name, hist in sorted(events.items())},
+            'rtt': self.rtt.snapshot(scale=0.001),
+        }
+
+    def reset(self) -> None:
+        with self._lock:
+            events = list(self._events.values())
+        for hist in events:
+            hist.reset()
+        self.rtt.reset()
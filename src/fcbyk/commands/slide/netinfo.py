@@ -0,0 +1,97 @@
+"""
+slide 网络环境缓存
+Wi-Fi 名称需要调用 netsh / airport / iwgetid / nmcli 等子进程获取，本机 IP 需要枚举网卡。
+二维码页面会持续轮询，NetworkInfo 把结果缓存 ttl 秒，过期后在后台线程刷新并继续返回旧值，
+请求线程不会等待子进程。
+"""
+import threading
+import time
+from typing import Callable, List, Optional
+
+
+# 网络信息缓存有效期（秒）
+NETWORK_INFO_TTL = 30.0
+
+
+class NetworkInfo:
+    """缓存的 Wi-Fi 名称与本机 IP 列表，线程安全"""
+
+    def __init__(
+        self,
+        wifi_fn: Callable[[], str],
+        ips_fn: Callable[[], List[str]],
+        ttl: float = NETWORK_INFO_TTL,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self._wifi_fn = wifi_fn
+        self._ips_fn = ips_fn
+        self.ttl = ttl
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._wifi_name = ''
+        self._local_ips: Optional[List[str]] = None
+        self._loaded_at: Optional[float] = None
+        self._refreshing = False
+        self.refreshes = 0
+
+    def refresh(self) -> None:
+        """同步刷新（后台线程或启动时调用）；获取失败时保留旧值"""
+        try:
+            ips = list(self._ips_fn() or [])
+        except Exception:
+            ips = None
+        try:
+            wifi = self._wifi_fn() or ''
+        except Exception:
+            wifi = None
+        with self._lock:
+            if ips is not None:
+                self._local_ips = ips
+            if wifi is not None:
+                self._wifi_name = wifi
+            self._loaded_at = self._clock()
+            self.refreshes += 1
+
+    def _run_refresh(self) -> None:
+        try:
+            self.refresh()
+        finally:
+            with self._lock:
+                self._refreshing = False
+
+    def refresh_async(self) -> bool:
+        """在后台线程刷新；已有刷新在进行时不重复启动，返回是否启动了新线程"""
+        with self._lock:
+            if self._refreshing:
+                return False
+            self._refreshing = True
+        threading.Thread(target=self._run_refresh, name='slide-netinfo', daemon=True).start()
+        return True
+
+    def _maybe_refresh(self) -> None:
+        with self._lock:
+            stale = self._loaded_at is None or self._clock() - self._loaded_at >= self.ttl
+        if stale:
+            self.refresh_async()
+
+    def wifi_name(self) -> str:
+        """当前 Wi-Fi 名称（可能是上一次的结果，尚未获取到时为空字符串）"""
+        self._maybe_refresh()
+        with self._lock:
+            return self._wifi_name
+
+    def local_ips(self) -> List[str]:
+        """本机 IP 列表；首次调用时同步枚举网卡（不涉及子进程），之后同样走缓存"""
+        with self._lock:
+            ips = self._local_ips
+        if ips is None:
+            try:
+                ips = list(self._ips_fn() or [])
+            except Exception:
+                ips = []
+            with self._lock:
+                if self._local_ips is None:
+                    self._local_ips = ips
+        else:
+            self._maybe_refresh()
+        return ips
@@ -0,0 +1,68 @@
+"""
+slide 二进制指针协议
+手机端把一段时间内的多次位移打包成一个二进制帧，通过 Socket.IO 的二进制事件 mouse_move_bin 发送，
+减少拥挤 Wi-Fi 下的包数。帧格式（小端）：
+
+    uint8  version   协议版本，当前为 1
+    uint8  kind      帧类型，1 = 相对位移
+    uint16 seq       帧序号（按 65536 回绕），服务端丢弃重复或乱序到达的旧帧
+    uint16 count     位移对数量
+    int16  dx, dy    × count
+"""
+import struct
+import sys
+from array import array
+from typing import Optional, Tuple
+
+
+PROTOCOL_VERSION = 1
+FRAME_MOVE = 1
+
+FRAME_HEADER = struct.Struct('<BBHH')
+# 单帧最多携带的位移对数量
+MAX_FRAME_PAIRS = 512
+
+_SEQ_MOD = 1 << 16
+
+
+def encode_move_frame(seq: int, pairs) -> bytes:
+    """按协议打包位移对（供测试与压测脚本使用，前端有对应的 TypeScript 实现）"""
+    pairs = list(pairs)
+    values = array('h', [v for pair in pairs for v in pair])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return FRAME_HEADER.pack(PROTOCOL_VERSION, FRAME_MOVE, seq % _SEQ_MOD, len(pairs)) + values.tobytes()
+
+
+def decode_move_frame(data) -> Tuple[int, int, int, int]:
+    """
+    解析位移帧
+
+    Returns:
+        (seq, dx 之和, dy 之和, 位移对数量)
+
+    Raises:
+        ValueError: 帧格式不正确
+    """
+    if not isinstance(data, (bytes, bytearray, memoryview)):
+        raise ValueError('frame must be binary')
+    if len(data) < FRAME_HEADER.size:
+        raise ValueError('frame too short')
+    version, kind, seq, count = FRAME_HEADER.unpack_from(data)
+    if version != PROTOCOL_VERSION or kind != FRAME_MOVE:
+        raise ValueError('unsupported frame %d/%d' % (version, kind))
+    if count > MAX_FRAME_PAIRS or len(data) != FRAME_HEADER.size + 4 * count:
+        raise ValueError('bad frame length')
+    values = array('h')
+    values.frombytes(memoryview(data)[FRAME_HEADER.size:])
+    if sys.byteorder == 'big':
+        values.byteswap()
+    return seq, sum(values[0::2]), sum(values[1::2]), count
+
+
+def seq_is_newer(seq: int, last: Optional[int]) -> bool:
+    """按回绕序号比较 seq 是否晚于 last（last 为 None 表示尚未收到过帧）"""
+    if last is None:
+        return True
+    diff = (seq - last) % _SEQ_MOD
+    return 0 < diff < _SEQ_MOD // 2
@@ -0,0 +1,156 @@
+"""
+slide 鼠标移动泵
+手机端每秒会发出 60~120 个 mouse_move 事件，逐个同步注入会在注入变慢时积压、指针滞后。
+InputPump 把收到的 dx/dy 累加起来，由后台线程按固定频率（默认与常见屏幕刷新率一致的 60Hz）
+一次性注入；积压超过 stale_after 秒仍未注入的位移直接丢弃，并统计事件到注入的延迟（LatencyHistogram，微秒）。
+"""
+import threading
+import time
+from typing import Callable, Dict, Optional
+
+from fcbyk.utils.histogram import LatencyHistogram
+
+
+# 注入频率（次/秒）
+PUMP_RATE_HZ = 60
+# 累计位移最早一次事件距今超过该秒数仍未注入时丢弃
+PUMP_STALE_AFTER = 0.25
+
+
+class InputPump:
+    """合并鼠标相对位移并按固定频率注入，线程安全
+
+    - push() 只做累加，不阻塞 socket 事件处理；
+    - 小数位移的余数保留到下一次注入，慢速移动不会被取整吃掉；
+    - 点击等其它操作前调用 flush()，保证“先移动到位再点击”的顺序。
+    """
+
+    def __init__(
+        self,
+        move: Callable[[int, int], object],
+        rate_hz: float = PUMP_RATE_HZ,
+        stale_after: float = PUMP_STALE_AFTER,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if rate_hz <= 0:
+            raise ValueError('rate_hz must be > 0')
+        self._move = move
+        self.interval = 1.0 / rate_hz
+        self.stale_after = stale_after
+        self._clock = clock
+        self._cond = threading.Condition()
+        self._inject_lock = threading.Lock()
+        self._dx = 0.0
+        self._dy = 0.0
+        self._first_at: Optional[float] = None
+        self._pending = 0
+        self._thread = None
+        self._stopped = False
+        self.latency = LatencyHistogram()
+        self.received = 0
+        self.injected = 0
+        self.dropped = 0
+
+    # -------------------- 生产端 --------------------
+    def push(self, dx: float, dy: float) -> None:
+        """累加一次相对位移（首次调用时启动后台线程）"""
+        try:
+            dx = float(dx or 0)
+            dy = float(dy or 0)
+        except (TypeError, ValueError):
+            return
+        with self._cond:
+            if self._thread is None and not self._stopped:
+                self._start_locked()
+            self.received += 1
+            if self._first_at is None:
+                self._first_at = self._clock()
+            self._dx += dx
+            self._dy += dy
+            self._pending += 1
+            self._cond.notify()
+
+    def flush(self) -> None:
+        """立即注入当前累计的位移（调用方线程内完成）"""
+        self._drain()
+
+    # -------------------- 注入 --------------------
+    def _take(self):
+        """取出可注入的整数位移；没有待处理事件时返回 None"""
+        with self._cond:
+            if not self._pending:
+                return None
+            now = self._clock()
+            first_at = self._first_at
+            pending = self._pending
+            self._first_at = None
+            self._pending = 0
+            if now - first_at > self.stale_after:
+                self._dx = self._dy = 0.0
+                self.dropped += pending
+                return None
+            ix, iy = int(self._dx), int(self._dy)
+            self._dx -= ix
+            self._dy -= iy
+            return ix, iy, first_at, pending
+
+    def _drain(self) -> None:
+        # 注入锁保证后台线程与 flush() 的注入不交错
+        with self._inject_lock:
+            taken = self._take()
+            if taken is None:
+                return
+            ix, iy, first_at, pending = taken
+            if ix or iy:
+                self._move(ix, iy)
+            self.latency.record((self._clock() - first_at) * 1000000)
+            with self._cond:
+                self.injected += pending
+
+    def _run(self) -> None:
+        next_tick = self._clock()
+        while True:
+            with self._cond:
+                while not self._pending and not self._stopped:
+                    self._cond.wait()
+                if self._stopped:
+                    return
+            # 对齐到固定节拍：空闲后的第一批立即注入，之后每 interval 注入一次
+            now = self._clock()
+            if next_tick > now:
+                time.sleep(next_tick - now)
+            else:
+                next_tick = now
+            next_tick += self.interval
+            try:
+                self._drain()
+            except Exception:
+                pass
+
+    def _start_locked(self) -> None:
+        self._thread = threading.Thread(target=self._run, name='slide-input-pump', daemon=True)
+        self._thread.start()
+
+    def stop(self) -> None:
+        with self._cond:
+            self._stopped = True
+            self._cond.notify_all()
+        thread = self._thread
+        if thread is not None and thread is not threading.current_thread():
+            thread.join(timeout=1)
+
+    # -------------------- 统计 --------------------
+    def stats(self) -> Dict:
+        """事件计数与事件到注入延迟（毫秒）"""
+        with self._cond:
+            stats = {
+                'rate_hz': round(1.0 / self.interval, 1),
+                'received': self.received,
+                'injected': self.injected,
+                'dropped': self.dropped,
+                'pending': self._pending,
+            }
+        for name, q in (('p50_ms', 50), ('p99_ms', 99)):
+            value = self.latency.percentile(q)
+            stats[name] = round(value / 1000.0, 3) if value is not None else None
+        return stats
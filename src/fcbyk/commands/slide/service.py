@@ -1,75 +1,25 @@
 """
 slide 业务逻辑层
-封装 pyautogui 操作，提供 PPT 控制和鼠标控制功能
+通过输入注入后端（见 backends.py）提供 PPT 控制和鼠标控制功能
 """
-import os
 from typing import Tuple, Optional
 
-
-# 在 CI 环境中，如果没有 DISPLAY 环境变量，设置一个默认值以避免导入 pyautogui 时出错
-if 'DISPLAY' not in os.environ:
-    os.environ['DISPLAY'] = ':0'
-
-try:
-    import pyautogui
-except Exception:
-    # 在 CI 环境中，如果 pyautogui 导入失败（例如没有 X 服务器或 Xlib 错误），创建一个模拟对象
-    # 捕获所有异常，包括 Xlib.error.DisplayConnectionError, ImportError, OSError 等
-    class MockPyAutoGUI:
-        FAILSAFE = False
-        
-        @staticmethod
-        def press(*args, **kwargs):
-            pass
-        
-        @staticmethod
-        def position():
-            return (0, 0)
-        
-        @staticmethod
-        def moveTo(*args, **kwargs):
-            pass
-        
-        @staticmethod
-        def click(*args, **kwargs):
-            pass
-        
-        @staticmethod
-        def rightClick(*args, **kwargs):
-            pass
-        
-        @staticmethod
-        def scroll(*args, **kwargs):
-            pass
-        
-        @staticmethod
-        def hscroll(*args, **kwargs):
-            pass
-
-        @staticmethod
-        def mouseDown(*args, **kwargs):
-            pass
-
-        @staticmethod
-        def mouseUp(*args, **kwargs):
-            pass
-    
-    pyautogui = MockPyAutoGUI()
+from .backends import InputBackend, PyAutoGUIBackend
 
 
 class SlideService:
     """PPT 远程控制服务"""
         
-    def __init__(self, password: str):
+    def __init__(self, password: str, backend: Optional[InputBackend] = None):
         """
         初始化服务
         
         Args:
             password: 访问密码
+            backend: 输入注入后端，默认使用 pyautogui
         """
         self.password = password
-        # 防止 pyautogui 的安全机制（如果鼠标移到屏幕角落会触发异常）
-        pyautogui.FAILSAFE = False
+        self.backend = backend or PyAutoGUIBackend()
         
     
     def verify_password(self, password: str) -> bool:
@@ -94,7 +44,7 @@ class SlideService:
             (是否成功, 错误信息)
         """
         try:
-            pyautogui.press('right')
+            self.backend.press('right')
             return True, None
         except Exception as e:
             return False, str(e)
@@ -107,7 +57,7 @@ class SlideService:
             (是否成功, 错误信息)
         """
         try:
-            pyautogui.press('left')
+            self.backend.press('left')
             return True, None
         except Exception as e:
             return False, str(e)
@@ -120,7 +70,7 @@ class SlideService:
             (是否成功, 错误信息)
         """
         try:
-            pyautogui.press('home')
+            self.backend.press('home')
             return True, None
         except Exception as e:
             return False, str(e)
@@ -133,7 +83,7 @@ class SlideService:
             (是否成功, 错误信息)
         """
         try:
-            pyautogui.press('end')
+            self.backend.press('end')
             return True, None
         except Exception as e:
             return False, str(e)
@@ -152,8 +102,7 @@ class SlideService:
             (是否成功, 错误信息)
         """
         try:
-            current_x, current_y = pyautogui.position()
-            pyautogui.moveTo(current_x + dx, current_y + dy, duration=0)
+            self.backend.move(dx, dy)
             return True, None
         except Exception as e:
             return False, str(e)
@@ -166,21 +115,21 @@ class SlideService:
             (是否成功, 错误信息)
         """
         try:
-            pyautogui.click()
+            self.backend.click()
             return True, None
         except Exception as e:
             return False, str(e)
     
     def mouse_down(self) -> Tuple[bool, Optional[str]]:
         try:
-            pyautogui.mouseDown()
+            self.backend.mouse_down()
             return True, None
         except Exception as e:
             return False, str(e)
     
     def mouse_up(self) -> Tuple[bool, Optional[str]]:
         try:
-            pyautogui.mouseUp()
+            self.backend.mouse_up()
             return True, None
         except Exception as e:
             return False, str(e)
@@ -193,7 +142,7 @@ class SlideService:
             (是否成功, 错误信息)
         """
         try:
-            pyautogui.rightClick()
+            self.backend.right_click()
             return True, None
         except Exception as e:
             return False, str(e)
@@ -211,18 +160,18 @@ class SlideService:
         """
         try:
             if dy != 0:
-                # pyautogui.scroll 需要整数，且值不能太大，限制在合理范围内
+                # 滚动量需要整数，且值不能太大，限制在合理范围内
                 scroll_clicks = int(round(dy))
                 scroll_clicks = max(-100, min(100, scroll_clicks))
                 if scroll_clicks != 0:
-                    pyautogui.scroll(scroll_clicks)
+                    self.backend.scroll(scroll_clicks)
             
             if dx != 0:
                 # 水平滚动也需要整数
                 hscroll_clicks = int(round(dx))
                 hscroll_clicks = max(-100, min(100, hscroll_clicks))
                 if hscroll_clicks != 0:
-                    pyautogui.hscroll(hscroll_clicks)
+                    self.backend.hscroll(hscroll_clicks)
             
             return True, None
         except Exception as e:
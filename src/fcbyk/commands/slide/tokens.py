@@ -0,0 +1,75 @@
+"""
+slide 扫码登录令牌
+二维码页面会不断轮询 /internal/qr/info，每次都生成新令牌。
+TokenStore 用 dict 保存令牌到过期时间（O(1) 校验），用最小堆按过期时间清理，
+并限制同时有效的令牌数量，内存不会随运行时间增长。
+"""
+import heapq
+import secrets
+import threading
+import time
+from typing import Callable, Dict, List, Tuple
+
+
+QR_TOKEN_TTL_SECONDS = 120
+# 同时有效的令牌上限，超出时淘汰最早过期的令牌
+QR_TOKEN_MAX = 1024
+
+
+class TokenStore:
+    """带过期时间的一次性令牌集合，线程安全"""
+
+    def __init__(
+        self,
+        ttl: float = QR_TOKEN_TTL_SECONDS,
+        max_tokens: int = QR_TOKEN_MAX,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if ttl <= 0 or max_tokens <= 0:
+            raise ValueError('ttl and max_tokens must be > 0')
+        self.ttl = ttl
+        self.max_tokens = max_tokens
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._expires: Dict[str, float] = {}
+        # (过期时间, 令牌)；令牌被提前消费后堆中记录惰性删除
+        self._heap: List[Tuple[float, str]] = []
+
+    def _purge_locked(self, now: float) -> None:
+        heap = self._heap
+        while heap and (heap[0][0] <= now or len(self._expires) > self.max_tokens):
+            expires_at, token = heapq.heappop(heap)
+            if self._expires.get(token) == expires_at:
+                del self._expires[token]
+        # 大量令牌被提前消费时，堆里会积累失效记录，超过有效令牌数两倍时重建
+        if len(heap) > 2 * len(self._expires) + 64:
+            self._heap = [(t, k) for k, t in self._expires.items()]
+            heapq.heapify(self._heap)
+
+    def create(self) -> str:
+        """生成新令牌"""
+        token = secrets.token_urlsafe(16)
+        with self._lock:
+            now = self._clock()
+            expires_at = now + self.ttl
+            self._expires[token] = expires_at
+            heapq.heappush(self._heap, (expires_at, token))
+            self._purge_locked(now)
+        return token
+
+    def is_valid(self, token: str) -> bool:
+        """令牌存在且未过期（不消费）"""
+        with self._lock:
+            expires_at = self._expires.get(token)
+            return expires_at is not None and expires_at > self._clock()
+
+    def consume(self, token: str) -> bool:
+        """消费令牌：有效时返回 True 并使其失效"""
+        with self._lock:
+            expires_at = self._expires.pop(token, None)
+            return expires_at is not None and expires_at > self._clock()
+
+    def __len__(self) -> int:
+        with self._lock:
+            self._purge_locked(self._clock())
+            return len(self._expires)
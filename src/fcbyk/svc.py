@@ -4,7 +4,7 @@ import signal
 import subprocess
 import sys
 import time
-from typing import Any, Dict, List, Optional
+from typing import Any, Callable, Dict, List, Optional
 
 from fcbyk.utils import storage
 
@@ -16,6 +16,24 @@ SERVICE_REGISTRY = {
 }
 
 
+# 服务被 stop / kill 结束后，在执行停止命令的进程中运行的清理函数 {name: [fn, ...]}。
+# Windows 上 taskkill /F 会直接结束进程，被结束的服务来不及执行自己的退出逻辑
+_STOP_HOOKS: Dict[str, List[Callable[[], None]]] = {}
+
+
+def register_stop_hook(name: str, fn: Callable[[], None]) -> None:
+    """注册服务正常停止后的清理函数（例如清除只用于崩溃恢复的数据）"""
+    _STOP_HOOKS.setdefault(name, []).append(fn)
+
+
+def _run_stop_hooks(name: Optional[str]) -> None:
+    for fn in _STOP_HOOKS.get(name or "", ()):
+        try:
+            fn()
+        except Exception:
+            pass
+
+
 def _svc_pid_dir() -> str:
     base = os.path.dirname(storage.get_path("svc_dummy", subdir="temp"))
     path = os.path.join(base, "servers")
@@ -235,6 +253,8 @@ def stop_service(name: str) -> List[Dict[str, Any]]:
         exists = _process_exists(pid)
         terminated = _force_terminate(pid) if exists else False
         status = "terminated" if terminated else ("not_running" if not exists else "alive")
+        if status == "terminated":
+            _run_stop_hooks(info.get("name"))
         if status == "terminated" or status == "not_running":
             _remove_file(path)
         result = {
@@ -336,6 +356,8 @@ def stop_by_pid(pid: int) -> List[Dict[str, Any]]:
         exists = _process_exists(ipid)
         terminated = _force_terminate(ipid) if exists else False
         status = "terminated" if terminated else ("not_running" if not exists else "alive")
+        if status == "terminated":
+            _run_stop_hooks(info.get("name"))
         if status == "terminated" or status == "not_running":
             _remove_file(path)
         result = {
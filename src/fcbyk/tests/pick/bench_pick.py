@@ -0,0 +1,318 @@
+"""
+pick 压测脚本（不随 pytest 自动运行）
+
+在临时目录中准备文件与兑换码，用多个线程模拟并发客户端调用 Flask 应用，
+统计各接口的 p50 / p99 延迟、抽奖吞吐以及每次抽奖写入存储的字节数（写放大）。
+
+用法::
+
+    python -m fcbyk.tests.pick.bench_pick --clients 32 --codes 5000 --out bench.json
+    python -m fcbyk.tests.pick.bench_pick --compare bench.json    # 与上一次结果对比
+"""
+import argparse
+import importlib
+import json
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional
+
+pick_controller = importlib.import_module("fcbyk.commands.pick.controller")
+pick_codes = importlib.import_module("fcbyk.commands.pick.codes")
+pick_prizes = importlib.import_module("fcbyk.commands.pick.prizes")
+pick_journal = importlib.import_module("fcbyk.commands.pick.journal")
+ratelimit = importlib.import_module("fcbyk.utils.ratelimit")
+
+ADMIN_PASSWORD = "bench"
+
+
+def percentile(samples: List[float], q: float) -> float:
+    if not samples:
+        return 0.0
+    s = sorted(samples)
+    idx = min(len(s) - 1, max(0, int(round(q / 100.0 * (len(s) - 1)))))
+    return s[idx]
+
+
+def _dir_bytes(path: str) -> int:
+    total = 0
+    for root, _dirs, names in os.walk(path):
+        for n in names:
+            try:
+                total += os.path.getsize(os.path.join(root, n))
+            except OSError:
+                pass
+    return total
+
+
+def _proc_write_bytes() -> Optional[int]:
+    """Linux 下进程累计写入块设备的字节数（/proc/self/io 的 write_bytes）；不可用时返回 None
+
+    不用 wchar：它统计所有 write() 调用（含 socket、管道与最终被覆盖的页缓存），不反映落盘量。
+    """
+    try:
+        with open("/proc/self/io") as f:
+            for line in f:
+                if line.startswith("write_bytes:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    return None
+
+
+def _git_commit() -> Optional[str]:
+    try:
+        out = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            universal_newlines=True,
+        )
+        return out.stdout.strip() or None
+    except Exception:
+        return None
+
+
+class Bench:
+    """一次压测的运行环境：临时文件目录 + 临时存储 + 放宽限流"""
+
+    def __init__(self, workdir: str, files: int, file_size: int, codes: int, code_length: int):
+        self.workdir = workdir
+        self.files_root = os.path.join(workdir, "files")
+        self.data_dir = os.path.join(workdir, "data")
+        os.makedirs(self.files_root)
+        os.makedirs(self.data_dir)
+        payload = b"x" * file_size
+        for i in range(files):
+            with open(os.path.join(self.files_root, "prize_%05d.bin" % i), "wb") as f:
+                f.write(payload)
+
+        c = pick_controller
+        # controller 是模块级单例，结束后要还原被替换的全局对象
+        self._saved = {
+            "files_mode_root": c.files_mode_root,
+            "ADMIN_PASSWORD": c.ADMIN_PASSWORD,
+            "pick_limiter": c.pick_limiter,
+            "code_fail_limiter": c.code_fail_limiter,
+            "event_broker": c.event_broker,
+        }
+        self._saved_service = {
+            "code_store": c.service.code_store,
+            "prize_store": c.service.prize_store,
+            "journal": c.service.journal,
+        }
+        c.files_mode_root = self.files_root
+        c.ADMIN_PASSWORD = ADMIN_PASSWORD
+        c.service.reset_state()
+        c.service.code_store = pick_codes.RedeemCodeStore(os.path.join(self.data_dir, "codes.db"))
+        c.service.prize_store = pick_prizes.PrizeStore(os.path.join(self.data_dir, "prizes.db"))
+        c.service.journal = pick_journal.DrawJournal(
+            os.path.join(self.data_dir, "journal.ndjson"), os.path.join(self.data_dir, "journal.snap.json")
+        )
+        c.pick_limiter = ratelimit.SlidingWindowLimiter(limit=10 ** 9, window=1)
+        c.code_fail_limiter = ratelimit.SlidingWindowLimiter(limit=10 ** 9, window=1)
+        c.event_broker = pick_controller.EventBroker()
+
+        self.codes = c.service.mint_redeem_codes_in_storage(codes, code_length)
+        c.service.redeem_codes = c.service.load_redeem_codes_from_storage()
+        c.service.get_file_catalog(self.files_root).snapshot()
+        with c.draw_engine.lock:
+            c.service.journal.open("bench", c.service.journal_state)
+        c.app.config["TESTING"] = True
+
+    def close(self) -> None:
+        c = pick_controller
+        c.service.journal.close()
+        c.service.code_store.close()
+        c.service.prize_store.close()
+        c.service.reset_state()
+        for name, value in self._saved.items():
+            setattr(c, name, value)
+        for name, value in self._saved_service.items():
+            setattr(c.service, name, value)
+
+    def run(self, clients: int, jobs: List[Callable], name: str) -> Dict:
+        """clients 个线程并发执行 jobs（每个 job 接收一个 test client，返回 HTTP 状态码）"""
+        lock = threading.Lock()
+        queue = list(reversed(jobs))
+        latencies: List[float] = []
+        statuses: Dict[str, int] = {}
+
+        def worker():
+            client = pick_controller.app.test_client()
+            local: List[float] = []
+            local_statuses: Dict[str, int] = {}
+            while True:
+                with lock:
+                    if not queue:
+                        break
+                    job = queue.pop()
+                t0 = time.perf_counter()
+                status = job(client)
+                local.append(time.perf_counter() - t0)
+                local_statuses[str(status)] = local_statuses.get(str(status), 0) + 1
+            with lock:
+                latencies.extend(local)
+                for k, v in local_statuses.items():
+                    statuses[k] = statuses.get(k, 0) + v
+
+        threads = [threading.Thread(target=worker) for _ in range(clients)]
+        start = time.perf_counter()
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+        elapsed = time.perf_counter() - start
+
+        return {
+            "requests": len(latencies),
+            "seconds": round(elapsed, 4),
+            "rps": round(len(latencies) / elapsed, 1) if elapsed else 0.0,
+            "p50_ms": round(percentile(latencies, 50) * 1000, 3),
+            "p99_ms": round(percentile(latencies, 99) * 1000, 3),
+            "statuses": dict(sorted(statuses.items())),
+            "name": name,
+        }
+
+
+def _admin_headers():
+    return {"X-Admin-Password": ADMIN_PASSWORD}
+
+
+def run_benchmark(
+    clients: int = 16,
+    files: int = 2000,
+    file_size: int = 4096,
+    codes: int = 2000,
+    code_length: int = 6,
+    reads: int = 2000,
+    admin_ops: int = 200,
+) -> Dict:
+    """运行全部场景并返回结果字典"""
+    with tempfile.TemporaryDirectory(prefix="pick-bench-") as workdir:
+        bench = Bench(workdir, files, file_size, codes, code_length)
+        try:
+            scenarios = {}
+
+            # 1) 抽奖：每个兑换码抽一次（文件少于兑换码时多出的请求返回 400，同样计入延迟）
+            disk_before = _dir_bytes(bench.data_dir)
+            io_before = _proc_write_bytes()
+            draw_jobs = [
+                (lambda code: lambda cl: cl.post("/api/files/pick", json={"code": code}).status_code)(code)
+                for code in bench.codes
+            ]
+            scenarios["draw"] = bench.run(clients, draw_jobs, "POST /api/files/pick")
+            io_after = _proc_write_bytes()
+            disk_after = _dir_bytes(bench.data_dir)
+            # 写放大按成功抽奖计算
+            draws = max(scenarios["draw"]["statuses"].get("200", 0), 1)
+
+            # 2) 状态轮询：带 / 不带 If-None-Match
+            etag = pick_controller.app.test_client().get("/api/files").headers.get("ETag")
+            scenarios["files"] = bench.run(
+                clients, [lambda cl: cl.get("/api/files").status_code] * reads, "GET /api/files",
+            )
+            scenarios["files_304"] = bench.run(
+                clients,
+                [lambda cl: cl.get("/api/files", headers={"If-None-Match": etag}).status_code] * reads,
+                "GET /api/files (If-None-Match)",
+            )
+
+            # 3) 管理端：列表、生成、导出混合
+            admin_jobs = []
+            for i in range(admin_ops):
+                if i % 10 == 0:
+                    admin_jobs.append(lambda cl: cl.post(
+                        "/api/admin/codes/gen", json={"count": 10}, headers=_admin_headers()).status_code)
+                elif i % 10 == 1:
+                    admin_jobs.append(lambda cl: cl.get(
+                        "/api/admin/codes/export?format=text", headers=_admin_headers()).status_code)
+                else:
+                    admin_jobs.append(lambda cl: cl.get("/api/admin/codes", headers=_admin_headers()).status_code)
+            scenarios["admin"] = bench.run(clients, admin_jobs, "/api/admin/codes/*")
+        finally:
+            bench.close()
+
+    result = {
+        "commit": _git_commit(),
+        "python": platform.python_version(),
+        "platform": sys.platform,
+        "params": {
+            "clients": clients,
+            "files": files,
+            "file_size": file_size,
+            "codes": codes,
+            "code_length": code_length,
+            "reads": reads,
+            "admin_ops": admin_ops,
+        },
+        "scenarios": scenarios,
+        "draws_per_sec": scenarios["draw"]["rps"],
+        # 写放大：每次成功抽奖带来的存储目录增长 / 进程写入块设备的字节数
+        "storage_growth_bytes_per_draw": round((disk_after - disk_before) / draws, 1),
+        "write_bytes_per_draw": (
+            round((io_after - io_before) / draws, 1) if io_before is not None and io_after is not None else None
+        ),
+    }
+    return result
+
+
+def compare(old: Dict, new: Dict) -> List[str]:
+    """逐场景对比两次结果，返回可读的文本行"""
+    lines = ["%-32s %12s %12s %9s" % ("scenario / metric", "old", "new", "change")]
+    for name, cur in new["scenarios"].items():
+        prev = old.get("scenarios", {}).get(name)
+        if not prev:
+            continue
+        for key in ("rps", "p50_ms", "p99_ms"):
+            a, b = prev.get(key) or 0, cur.get(key) or 0
+            change = ((b - a) / a * 100.0) if a else 0.0
+            lines.append("%-32s %12s %12s %+8.1f%%" % ("%s.%s" % (name, key), a, b, change))
+    for key in ("storage_growth_bytes_per_draw", "write_bytes_per_draw"):
+        lines.append("%-32s %12s %12s" % (key, old.get(key), new.get(key)))
+    return lines
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="pick load-test harness")
+    parser.add_argument("--clients", type=int, default=16)
+    parser.add_argument("--files", type=int, default=2000)
+    parser.add_argument("--file-size", type=int, default=4096)
+    parser.add_argument("--codes", type=int, default=2000)
+    parser.add_argument("--code-length", type=int, default=6)
+    parser.add_argument("--reads", type=int, default=2000)
+    parser.add_argument("--admin-ops", type=int, default=200)
+    parser.add_argument("--out", help="write JSON result to this file")
+    parser.add_argument("--compare", help="previous JSON result to compare with")
+    args = parser.parse_args(argv)
+
+    result = run_benchmark(
+        clients=args.clients,
+        files=args.files,
+        file_size=args.file_size,
+        codes=args.codes,
+        code_length=args.code_length,
+        reads=args.reads,
+        admin_ops=args.admin_ops,
+    )
+    text = json.dumps(result, indent=2, ensure_ascii=False)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as f:
+            old = json.load(f)
+        print()
+        print("\n".join(compare(old, result)))
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
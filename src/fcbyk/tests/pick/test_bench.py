@@ -0,0 +1,40 @@
+import importlib
+
+bench_pick = importlib.import_module("fcbyk.tests.pick.bench_pick")
+pick_controller = importlib.import_module("fcbyk.commands.pick.controller")
+
+
+def test_percentile():
+    samples = [float(i) for i in range(1, 101)]
+    assert bench_pick.percentile(samples, 50) == 51.0
+    assert bench_pick.percentile(samples, 99) == 99.0
+    assert bench_pick.percentile([], 99) == 0.0
+
+
+def test_run_benchmark_smoke():
+    store = pick_controller.service.code_store
+    limiter = pick_controller.pick_limiter
+    root = pick_controller.files_mode_root
+
+    result = bench_pick.run_benchmark(clients=4, files=20, codes=20, reads=20, admin_ops=20)
+
+    draw = result["scenarios"]["draw"]
+    assert draw["requests"] == 20
+    assert draw["statuses"] == {"200": 20}
+    assert result["scenarios"]["files_304"]["statuses"] == {"304": 20}
+    assert "500" not in result["scenarios"]["admin"]["statuses"]
+    assert result["draws_per_sec"] > 0
+    assert result["storage_growth_bytes_per_draw"] > 0
+    assert draw["p99_ms"] >= draw["p50_ms"]
+
+    # 运行结束后全局单例被还原
+    assert pick_controller.service.code_store is store
+    assert pick_controller.pick_limiter is limiter
+    assert pick_controller.files_mode_root == root
+
+
+def test_compare_reports_change():
+    old = {"scenarios": {"draw": {"rps": 100.0, "p50_ms": 1.0, "p99_ms": 2.0}}}
+    new = {"scenarios": {"draw": {"rps": 150.0, "p50_ms": 1.0, "p99_ms": 2.0}}}
+    lines = bench_pick.compare(old, new)
+    assert any(line.startswith("draw.rps") and "+50.0%" in line for line in lines)
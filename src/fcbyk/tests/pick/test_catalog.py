@@ -0,0 +1,88 @@
+import os
+
+import importlib
+
+pick_catalog = importlib.import_module("fcbyk.commands.pick.catalog")
+FileCatalog = pick_catalog.FileCatalog
+
+
+def _bump_mtime(path):
+    st = os.stat(path)
+    os.utime(path, ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+
+
+def test_scan_directory_sorted_files_only(tmp_path):
+    (tmp_path / "b.txt").write_text("b", encoding="utf-8")
+    (tmp_path / "a.txt").write_text("aa", encoding="utf-8")
+    (tmp_path / "sub").mkdir()
+
+    snap = FileCatalog(str(tmp_path)).snapshot()
+    assert [f.name for f in snap] == ["a.txt", "b.txt"]
+    assert snap.get("a.txt").size == 2
+    assert snap.get("sub") is None
+
+
+def test_single_file_and_missing_root(tmp_path):
+    f = tmp_path / "a.txt"
+    f.write_text("hi", encoding="utf-8")
+    assert list(FileCatalog(str(f)).snapshot()) == [pick_catalog.FileEntry("a.txt", str(f), 2)]
+    assert not FileCatalog(str(tmp_path / "missing")).snapshot()
+
+
+def test_snapshot_cached_until_mtime_changes(tmp_path, monkeypatch):
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    catalog = FileCatalog(str(tmp_path), check_interval=0)
+    snap = catalog.snapshot()
+
+    scans = []
+    real_scan = pick_catalog.scan_files
+    monkeypatch.setattr(pick_catalog, "scan_files", lambda root: scans.append(1) or real_scan(root))
+
+    assert catalog.snapshot() is snap
+    assert scans == []
+
+    (tmp_path / "b.txt").write_text("b", encoding="utf-8")
+    _bump_mtime(str(tmp_path))
+    snap2 = catalog.snapshot()
+    assert len(scans) == 1
+    assert [f.name for f in snap2] == ["a.txt", "b.txt"]
+    assert snap2.version != snap.version
+
+
+def test_check_interval_skips_stat(tmp_path, monkeypatch):
+    catalog = FileCatalog(str(tmp_path), check_interval=3600)
+    catalog.snapshot()
+    monkeypatch.setattr(pick_catalog.os, "stat", lambda *_a: (_ for _ in ()).throw(AssertionError("stat")))
+    catalog.snapshot()
+
+
+def test_rescan_detects_in_place_change(tmp_path):
+    f = tmp_path / "a.txt"
+    f.write_text("a", encoding="utf-8")
+    catalog = FileCatalog(str(tmp_path), check_interval=3600)
+    snap = catalog.snapshot()
+
+    f.write_text("abc", encoding="utf-8")
+    assert catalog.snapshot() is snap
+
+    snap2 = catalog.rescan()
+    assert snap2.get("a.txt").size == 3
+    assert snap2.version != snap.version
+
+    # 内容未变化时重扫 version 不变
+    assert catalog.rescan().version == snap2.version
+
+
+def test_version_depends_only_on_content(tmp_path):
+    """各 worker 独立扫描同一目录得到相同的 version（ETag 跨进程一致）"""
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("bb", encoding="utf-8")
+    v1 = FileCatalog(str(tmp_path)).snapshot().version
+    assert FileCatalog(str(tmp_path)).rescan().version == v1
+
+    (tmp_path / "b.txt").write_text("b", encoding="utf-8")
+    v2 = FileCatalog(str(tmp_path)).snapshot().version
+    assert v2 != v1
+
+    (tmp_path / "b.txt").write_text("bb", encoding="utf-8")
+    assert FileCatalog(str(tmp_path)).snapshot().version == v1
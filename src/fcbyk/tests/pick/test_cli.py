@@ -171,3 +171,54 @@ def test_pick_daemon_mode(monkeypatch):
     assert "--port" in called["args"]
     assert "9000" in called["args"]
     assert "--no-browser" in called["args"]
+
+
+def test_pick_gen_codes_prints_and_exits(monkeypatch, tmp_path):
+    pick_cli = importlib.import_module("fcbyk.commands.pick.cli")
+    pick_codes = importlib.import_module("fcbyk.commands.pick.codes")
+    monkeypatch.setattr(pick_cli.service, "code_store", pick_codes.RedeemCodeStore(str(tmp_path / "codes.db")))
+    monkeypatch.setattr(pick_cli, "start_web_server", lambda *a, **k: (_ for _ in ()).throw(AssertionError))
+
+    from click.testing import CliRunner
+
+    r = CliRunner().invoke(pick_cli.pick, ["--gen-codes", "30", "--code-length", "6", "--csv"])
+    assert r.exit_code == 0
+    lines = r.output.splitlines()
+    assert lines[0] == "code"
+    assert len(set(lines[1:])) == 30
+    assert all(len(c) == 6 for c in lines[1:])
+    assert pick_cli.service.code_store.counts() == (30, 0)
+
+    # 超出码长上限：参数校验失败，不抛出异常
+    r = CliRunner().invoke(pick_cli.pick, ["--gen-codes", "5", "--code-length", "17"])
+    assert r.exit_code == 2
+    assert r.exception is None or isinstance(r.exception, SystemExit)
+    assert pick_cli.service.code_store.counts() == (30, 0)
+
+
+def test_pick_trusted_proxy_option(monkeypatch, tmp_path):
+    pick_cli = importlib.import_module("fcbyk.commands.pick.cli")
+    f = tmp_path / "a.txt"
+    f.write_text("hi", encoding="utf-8")
+
+    called = {}
+    monkeypatch.setattr(pick_cli, "start_web_server", lambda **kw: called.update(kw))
+    monkeypatch.setattr(pick_cli, "check_port", lambda *_a, **_k: True)
+    started = {}
+    monkeypatch.setattr(pick_cli.svc_core, "start_service", lambda name, args: started.update(args=list(args)))
+    monkeypatch.setattr(pick_cli, "get_private_networks", lambda: [])
+    monkeypatch.setattr(pick_cli, "echo_network_urls", lambda *a, **k: None)
+    monkeypatch.setattr(pick_cli, "copy_to_clipboard", lambda *_: None)
+
+    from click.testing import CliRunner
+
+    r = CliRunner().invoke(pick_cli.pick, ["-f", str(f), "--trusted-proxy", "10.0.0.1", "--trusted-proxy", "fd00::/8"])
+    assert r.exit_code == 0
+    assert called["trusted_proxies"] == ("10.0.0.1", "fd00::/8")
+
+    r = CliRunner().invoke(pick_cli.pick, ["-f", str(f), "-D", "--trusted-proxy", "10.0.0.1"])
+    assert r.exit_code == 0
+    assert "--trusted-proxy" in started["args"] and "10.0.0.1" in started["args"]
+
+    r = CliRunner().invoke(pick_cli.pick, ["-f", str(f), "--trusted-proxy", "nope"])
+    assert r.exit_code != 0
@@ -0,0 +1,200 @@
+import json
+
+import importlib
+
+import pytest
+
+pick_codes = importlib.import_module("fcbyk.commands.pick.codes")
+RedeemCodeStore = pick_codes.RedeemCodeStore
+
+
+def _store(tmp_path, legacy=None):
+    return RedeemCodeStore(str(tmp_path / "codes.db"), legacy_json_path=legacy)
+
+
+def test_add_get_delete(tmp_path):
+    s = _store(tmp_path)
+    assert s.get("abcd") is None
+    assert s.add(" abcd ") is True
+    assert s.add("ABCD") is False
+    assert s.add("") is False
+    assert s.get("ABCD") is False
+    assert s.delete("abcd") is True
+    assert s.delete("abcd") is False
+
+
+def test_mark_used_is_compare_and_set(tmp_path):
+    s = _store(tmp_path)
+    s.add("AAAA")
+    assert s.mark_used("aaaa") is True
+    assert s.mark_used("AAAA") is False
+    assert s.mark_used("NONE") is False
+    assert s.get("AAAA") is True
+
+    assert s.reset_unused("AAAA") is True
+    assert s.reset_unused("AAAA") is False
+    assert s.get("AAAA") is False
+
+
+def test_add_many_counts_and_clear(tmp_path):
+    s = _store(tmp_path)
+    s.add("B")
+    assert s.add_many(["a", "b", "c", ""]) == 2
+    s.mark_used("C")
+    assert s.counts() == (3, 1)
+    assert s.load_all() == {"A": False, "B": False, "C": True}
+    assert s.clear() == 3
+    assert s.counts() == (0, 0)
+
+
+def test_iter_and_export_sorted_in_batches(tmp_path):
+    s = _store(tmp_path)
+    s.add_many(["C", "A", "E", "B", "D"])
+    s.mark_used("B")
+
+    assert [c for c, _ in s.iter_codes(batch_size=2)] == ["A", "B", "C", "D", "E"]
+    assert s.export(only_unused=True) == [
+        {"code": "A", "used": False},
+        {"code": "C", "used": False},
+        {"code": "D", "used": False},
+        {"code": "E", "used": False},
+    ]
+
+
+def test_imports_legacy_json_once(tmp_path):
+    legacy = tmp_path / "pick_redeem_codes.json"
+    legacy.write_text(
+        json.dumps({"codes": {"aaaa": {"used": True}, "BBBB": False, " ": {"used": False}}}),
+        encoding="utf-8",
+    )
+
+    s = _store(tmp_path, legacy=str(legacy))
+    assert s.load_all() == {"AAAA": True, "BBBB": False}
+    s.delete("BBBB")
+    s.close()
+
+    # 再次打开不会重复导入
+    s2 = _store(tmp_path, legacy=str(legacy))
+    assert s2.load_all() == {"AAAA": True}
+
+
+def test_persists_across_instances(tmp_path):
+    s = _store(tmp_path)
+    s.add("XYZ1")
+    s.mark_used("XYZ1")
+    s.close()
+
+    assert _store(tmp_path).get("XYZ1") is True
+
+
+def test_registry_counters_and_version():
+    r = pick_codes.RedeemCodeRegistry({"A": False, "B": True})
+    assert r.stats()[:2] == (2, 1)
+    v = r.version
+
+    r["C"] = False
+    r["A"] = True
+    assert (r.total, r.used) == (3, 2)
+    v2 = r.version
+    assert v2 != v
+
+    # 值未变化时 version 不变
+    r["A"] = True
+    assert r.version == v2
+
+    del r["B"]
+    assert (r.total, r.used) == (2, 1)
+    assert dict(r) == {"A": True, "C": False}
+
+    # version 只由内容决定：恢复原内容后回到原值，与变更顺序无关
+    r["A"] = False
+    del r["C"]
+    r["B"] = True
+    assert r.version == v
+    assert pick_codes.RedeemCodeRegistry({"B": True, "A": False}).version == v
+
+    r.clear()
+    assert r.stats() == (0, 0, 0)
+    assert not r
+
+
+def test_code_permutation_is_bijective():
+    p = pick_codes.CodePermutation(b"k" * 16, 3)
+    assert len({p.permute(i) for i in range(p.size)}) == p.size
+    assert all(len(p.code_at(i)) == 3 for i in range(100))
+
+
+def test_mint_unique_and_counter_persists(tmp_path):
+    s = _store(tmp_path)
+    first = s.mint(500)
+    s.close()
+
+    s = _store(tmp_path)
+    second = s.mint(500)
+    assert len(set(first + second)) == 1000
+    assert all(len(c) == 4 for c in first + second)
+    assert s.counts() == (1000, 0)
+
+
+def test_mint_skips_existing_and_grows_length(tmp_path):
+    s = _store(tmp_path)
+    s.mint(1, length=1)
+    key = bytes.fromhex(s._connect().execute("SELECT value FROM meta WHERE key = 'mint_key'").fetchone()[0])
+    taken = pick_codes.CodePermutation(key, 1).code_at(1)
+    s.add(taken)
+
+    # 1 位码空间共 36 个：已生成 1 个、手动占用 1 个，剩余 34 个用完后自动加长
+    codes = s.mint(40, length=1)
+    assert len(codes) == 40
+    assert taken not in codes
+    assert sum(1 for c in codes if len(c) == 1) == 34
+    assert sum(1 for c in codes if len(c) == 2) == 6
+
+
+def test_stream_codes_is_a_consistent_snapshot(tmp_path):
+    s = _store(tmp_path)
+    s.add_many(["A", "B", "C", "D"])
+
+    it = s.stream_codes(batch_size=1)
+    assert next(it) == ("A", False)
+    # 导出过程中的写入不影响本次导出，也不会被阻塞
+    s.add("AA")
+    s.mark_used("C")
+    assert list(it) == [("B", False), ("C", False), ("D", False)]
+    assert [c for c, _ in s.stream_codes(only_unused=True)] == ["A", "AA", "B", "D"]
+
+
+def test_mint_releases_lock_between_batches(tmp_path):
+    s = _store(tmp_path)
+    real_chunk = s._mint_chunk
+    redeemed = []
+
+    def _chunk(length, want):
+        # 每批开始前锁都是空闲的，上一批生成的兑换码此时已可核销
+        assert s._lock.acquire(blocking=False)
+        s._lock.release()
+        fresh, exhausted = real_chunk(length, want)
+        redeemed.append(fresh[0])
+        return fresh, exhausted
+
+    s._mint_chunk = _chunk
+    codes = s.mint(250, batch_size=100)
+    assert len(codes) == 250
+    assert len(redeemed) == 3
+    assert all(s.mark_used(c) for c in redeemed)
+    assert s.counts() == (250, 3)
+
+
+def test_iter_mint_yields_each_committed_batch(tmp_path):
+    s = RedeemCodeStore(str(tmp_path / "codes.db"))
+    batches = s.iter_mint(250, batch_size=100)
+    first = next(batches)
+    # 第一批产出时已提交，之后的批次尚未生成
+    assert len(first) == 100
+    assert s.counts() == (100, 0)
+    rest = list(batches)
+    assert [len(b) for b in rest] == [100, 50]
+    assert s.counts() == (250, 0)
+
+    with pytest.raises(ValueError):
+        list(s.iter_mint(1, length=17))
@@ -1,17 +1,36 @@
+import json
 import os
 
 import pytest
 import importlib
 
 pick_controller = importlib.import_module("fcbyk.commands.pick.controller")
+pick_sampling = importlib.import_module("fcbyk.commands.pick.sampling")
+pick_codes = importlib.import_module("fcbyk.commands.pick.codes")
+pick_catalog = importlib.import_module("fcbyk.commands.pick.catalog")
+pick_prizes = importlib.import_module("fcbyk.commands.pick.prizes")
 
 
 @pytest.fixture
-def client(monkeypatch):
+def client(monkeypatch, tmp_path):
     # 隔离全局状态（controller 模块是全局单例 app/service）
     pick_controller.files_mode_root = None
     pick_controller.ADMIN_PASSWORD = None
+    pick_controller.TRUSTED_PROXIES = ()
     pick_controller.service.reset_state()
+    pick_controller.pick_limiter.reset()
+    pick_controller.code_fail_limiter.reset()
+    # 兑换码持久化写到临时目录，避免污染用户数据
+    monkeypatch.setattr(
+        pick_controller.service,
+        "code_store",
+        pick_codes.RedeemCodeStore(str(tmp_path / "data" / "pick_redeem_codes.db")),
+    )
+    monkeypatch.setattr(
+        pick_controller.service,
+        "prize_store",
+        pick_prizes.PrizeStore(str(tmp_path / "data" / "pick_prizes.db")),
+    )
 
     pick_controller.app.config["TESTING"] = True
     with pick_controller.app.test_client() as c:
@@ -25,40 +44,60 @@ def test_api_info_default(client):
 
 
 def test_api_items_reads_config(monkeypatch, client):
-    monkeypatch.setattr(pick_controller.storage, "load_json", lambda *a, **k: {"items": ["a", "b"]})
+    monkeypatch.setattr(pick_controller.service, "get_items", lambda: ["a", "b"])
     r = client.get("/api/items")
     assert r.status_code == 200
     assert r.json == {"items": ["a", "b"]}
 
 
-def test_get_client_ip_prefers_xff(client):
-    # 直接调用函数（需要请求上下文）
+def test_client_ip_ignores_xff_without_trusted_proxy(client):
     with pick_controller.app.test_request_context(
         "/api/items",
         headers={"X-Forwarded-For": "9.9.9.9, 8.8.8.8"},
         environ_base={"REMOTE_ADDR": "1.1.1.1"},
     ):
-        assert pick_controller._get_client_ip() == "9.9.9.9"
+        assert pick_controller._client_ip() == "1.1.1.1"
 
 
-def test_get_client_ip_fallback_remote_addr(client):
+def test_client_ip_fallback_remote_addr(client):
     with pick_controller.app.test_request_context(
         "/api/items",
         headers={},
         environ_base={"REMOTE_ADDR": "2.2.2.2"},
     ):
-        assert pick_controller._get_client_ip() == "2.2.2.2"
+        assert pick_controller._client_ip() == "2.2.2.2"
+
+
+def test_spoofed_xff_does_not_grant_extra_ip_draws(tmp_path, client):
+    pick_controller.files_mode_root = str(tmp_path)
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (tmp_path / name).write_text(name, encoding="utf-8")
+    local = {"REMOTE_ADDR": "127.0.0.1"}
+
+    r = client.post("/api/files/pick", json={}, headers={"X-Forwarded-For": "10.0.0.0"}, environ_base=local)
+    assert r.status_code == 200
+    picked = r.json["file"]["name"]
+    # 未配置 --trusted-proxy：换一个伪造的 X-Forwarded-For 仍是同一个客户端
+    for fake in ("10.0.0.1", "10.0.0.2"):
+        r = client.post("/api/files/pick", json={}, headers={"X-Forwarded-For": fake}, environ_base=local)
+        assert r.status_code == 429
+        assert r.json["picked"] == picked
+    assert pick_controller.service.ip_draw_records == {"127.0.0.1": picked}
+    assert set(pick_controller.service.ip_file_history) == {"127.0.0.1"}
+
+    r = client.get("/api/files", headers={"X-Forwarded-For": "10.0.0.9"}, environ_base=local)
+    assert r.json["ip_picked"] == picked
 
 
 def test_api_pick_item_no_items(monkeypatch, client):
-    monkeypatch.setattr(pick_controller.storage, "load_json", lambda *a, **k: {"items": []})
+    monkeypatch.setattr(pick_controller.service, "get_items", lambda: [])
     r = client.post("/api/pick")
     assert r.status_code == 400
     assert r.json["error"] == "no items available"
 
 
 def test_api_pick_item_success(monkeypatch, client):
-    monkeypatch.setattr(pick_controller.storage, "load_json", lambda *a, **k: {"items": ["a", "b"]})
+    monkeypatch.setattr(pick_controller.service, "get_items", lambda: ["a", "b"])
     monkeypatch.setattr(pick_controller.service, "pick_random_item", lambda items: "b")
 
     r = client.post("/api/pick")
@@ -84,8 +123,8 @@ def test_api_files_code_mode_invalid_cases(tmp_path, client, monkeypatch):
     pick_controller.service.reset_state()
     pick_controller.service.redeem_codes = {"ABCD": False}
 
-    monkeypatch.setattr(pick_controller.service, "list_files", lambda root: [{"name": "a.txt", "path": "x", "size": 1}])
-    monkeypatch.setattr(pick_controller, "_get_client_ip", lambda: "1.2.3.4")
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    monkeypatch.setattr(pick_controller, "_client_ip", lambda: "1.2.3.4")
 
     # 缺少 code
     r = client.post("/api/files/pick", json={})
@@ -114,21 +153,15 @@ def test_api_files_pick_code_mode_happy_path(tmp_path, client, monkeypatch):
     pick_controller.service.reset_state()
     pick_controller.service.redeem_codes = {"ABCD": False}
 
-    monkeypatch.setattr(
-        pick_controller.service,
-        "list_files",
-        lambda root: [
-            {"name": "a.txt", "path": str(f1), "size": 1},
-            {"name": "b.txt", "path": str(f2), "size": 2},
-        ],
-    )
-    monkeypatch.setattr(pick_controller, "_get_client_ip", lambda: "1.2.3.4")
-    monkeypatch.setattr(pick_controller.service, "pick_file", lambda files: files[0])
+    monkeypatch.setattr(pick_controller, "_client_ip", lambda: "1.2.3.4")
+    # 固定随机数：排列总是取游标处的文件，即按名称排序的剩余第一个
+    monkeypatch.setattr(pick_sampling.random, "randrange", lambda n: 0)
 
     r = client.post("/api/files/pick", json={"code": "ABCD"})
     assert r.status_code == 200
     assert r.json["mode"] == "code"
     assert r.json["code"] == "ABCD"
+    assert r.json["file"]["name"] == "a.txt"
 
 
 def test_api_files_result_not_found(client):
@@ -145,19 +178,15 @@ def test_api_files_pick_ip_mode_and_already_picked(tmp_path, client, monkeypatch
     pick_controller.service.reset_state()
     pick_controller.service.redeem_codes = {}
 
-    monkeypatch.setattr(
-        pick_controller.service,
-        "list_files",
-        lambda root: [
-            {"name": "a.txt", "path": "x", "size": 1},
-        ],
-    )
-    monkeypatch.setattr(pick_controller, "_get_client_ip", lambda: "1.2.3.4")
-    monkeypatch.setattr(pick_controller.service, "pick_file", lambda files: files[0])
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("b", encoding="utf-8")
+    monkeypatch.setattr(pick_controller, "_client_ip", lambda: "1.2.3.4")
+    monkeypatch.setattr(pick_sampling.random, "randrange", lambda n: n - 1)
 
     # first pick ok
     r = client.post("/api/files/pick", json={})
     assert r.status_code == 200
+    assert r.json["file"]["name"] == "b.txt"
 
     # second pick should be limited
     r2 = client.post("/api/files/pick", json={})
@@ -208,3 +237,380 @@ def test_admin_login_and_codes_add(client, monkeypatch):
         json={"code": "ABCD"},
     )
     assert r3.status_code == 200
+
+
+def test_admin_code_changes_see_other_workers_first(client, monkeypatch, tmp_path):
+    pick_shared = importlib.import_module("fcbyk.commands.pick.shared")
+    pick_controller.ADMIN_PASSWORD = "123"
+    headers = {"X-Admin-Password": "123"}
+    db = str(tmp_path / "shared.db")
+    monkeypatch.setattr(pick_controller.service, "shared", pick_shared.SharedDrawState(db, origin="w1"))
+    pick_controller.service.shared.reset()
+    other = pick_shared.SharedDrawState(db, origin="w2")
+    pick_controller.service.redeem_codes = {"ABCD": False}
+
+    # 其它 worker 新增 / 删除的兑换码在判断前先同步进来
+    other.append({"op": "codes_add", "codes": ["WXYZ"]})
+    r = client.post("/api/admin/codes/add", headers=headers, json={"code": "WXYZ"})
+    assert r.status_code == 400
+
+    other.append({"op": "code_del", "code": "ABCD"})
+    assert client.post("/api/admin/codes/ABCD/reset", headers=headers).status_code == 404
+    assert client.delete("/api/admin/codes/ABCD", headers=headers).status_code == 404
+    assert "ABCD" not in pick_controller.service.redeem_codes
+
+
+def test_admin_codes_etag_skips_unchanged_polls(client):
+    pick_controller.ADMIN_PASSWORD = "123"
+    pick_controller.service.redeem_codes = {"ABCD": False, "EFGH": True}
+    headers = {"X-Admin-Password": "123"}
+
+    r = client.get("/api/admin/codes", headers=headers)
+    assert r.status_code == 200
+    assert r.json["total_codes"] == 2 and r.json["used_codes"] == 1
+    etag = r.headers["ETag"]
+
+    r2 = client.get("/api/admin/codes", headers=dict(headers, **{"If-None-Match": etag}))
+    assert r2.status_code == 304
+
+    pick_controller.service.redeem_codes["ABCD"] = True
+    r3 = client.get("/api/admin/codes", headers=dict(headers, **{"If-None-Match": etag}))
+    assert r3.status_code == 200
+    assert r3.json["used_codes"] == 2
+
+
+def test_api_files_uses_catalog_and_etag(tmp_path, client, monkeypatch):
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    pick_controller.files_mode_root = str(tmp_path)
+    pick_controller.service.redeem_codes = {"ABCD": False}
+
+    r = client.get("/api/files")
+    assert r.status_code == 200
+    assert r.json["files"] == [{"name": "a.txt", "size": 1}]
+    assert r.json["mode"] == "code"
+    etag = r.headers["ETag"]
+
+    # 缓存期内不再访问文件系统
+    monkeypatch.setattr(pick_catalog.os, "scandir", lambda *_a: (_ for _ in ()).throw(AssertionError("scan")))
+    r2 = client.get("/api/files", headers={"If-None-Match": etag})
+    assert r2.status_code == 304
+
+    pick_controller.service.redeem_codes["ABCD"] = True
+    r3 = client.get("/api/files", headers={"If-None-Match": etag})
+    assert r3.status_code == 200
+    assert r3.json["used_codes"] == 1
+
+
+def test_admin_files_rescan(tmp_path, client):
+    pick_controller.ADMIN_PASSWORD = "123"
+    pick_controller.files_mode_root = str(tmp_path)
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+
+    r = client.post("/api/admin/files/rescan", headers={"X-Admin-Password": "123"})
+    assert r.status_code == 200
+    assert r.json["count"] == 1
+
+
+def test_admin_prizes_roundtrip_and_weighted_draw(tmp_path, client, monkeypatch):
+    pick_controller.ADMIN_PASSWORD = "123"
+    pick_controller.files_mode_root = str(tmp_path)
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("b", encoding="utf-8")
+    monkeypatch.setattr(pick_controller, "_client_ip", lambda: "1.2.3.4")
+    headers = {"X-Admin-Password": "123"}
+
+    r = client.put("/api/admin/prizes", headers=headers, json={"prizes": [{"name": "a.txt", "stock": -1}]})
+    assert r.status_code == 400
+
+    r = client.put(
+        "/api/admin/prizes",
+        headers=headers,
+        json={"prizes": [{"name": "a.txt", "weight": 0}, {"name": "b.txt", "weight": 2, "stock": 1}]},
+    )
+    assert r.status_code == 200
+
+    r = client.get("/api/admin/prizes", headers=headers)
+    assert r.json["prizes"] == [
+        {"name": "a.txt", "stock": None, "weight": 0.0},
+        {"name": "b.txt", "stock": 1, "weight": 2.0},
+    ]
+
+    r = client.post("/api/files/pick", json={})
+    assert r.status_code == 200
+    assert r.json["file"]["name"] == "b.txt"
+    assert pick_controller.service.prize_store.snapshot()[0]["b.txt"] == (2.0, 0)
+
+
+def test_admin_code_reset_refunds_prize_stock(tmp_path, client, monkeypatch):
+    pick_controller.ADMIN_PASSWORD = "123"
+    pick_controller.files_mode_root = str(tmp_path)
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    (tmp_path / "b.txt").write_text("b", encoding="utf-8")
+    monkeypatch.setattr(pick_controller, "_client_ip", lambda: "1.2.3.4")
+    headers = {"X-Admin-Password": "123"}
+    pick_controller.service.prize_store.replace({"a.txt": (0, None), "b.txt": (1, 1)})
+    pick_controller.service.code_store.add_many(["ABCD", "EFGH"])
+    pick_controller.service.redeem_codes = {"ABCD": False, "EFGH": False}
+
+    r = client.post("/api/files/pick", json={"code": "ABCD"})
+    assert r.json["file"]["name"] == "b.txt"
+    assert pick_controller.service.prize_store.snapshot()[0]["b.txt"] == (1.0, 0)
+
+    r = client.post("/api/admin/codes/ABCD/reset", headers=headers)
+    assert r.json["prize_refunded"] == "b.txt"
+    assert pick_controller.service.prize_store.snapshot()[0]["b.txt"] == (1.0, 1)
+
+    # 已经是未使用时重复重置不会再退回
+    r = client.post("/api/admin/codes/ABCD/reset", headers=headers)
+    assert r.json["prize_refunded"] is None
+    assert pick_controller.service.prize_store.snapshot()[0]["b.txt"] == (1.0, 1)
+
+    # 退回的库存可以再次被抽中（同一 IP 不会再抽到同一个文件，换一个客户端）
+    monkeypatch.setattr(pick_controller, "_client_ip", lambda: "5.6.7.8")
+    r = client.post("/api/files/pick", json={"code": "EFGH"})
+    assert r.status_code == 200
+    assert r.json["file"]["name"] == "b.txt"
+
+
+def test_admin_codes_gen_bulk_streams_csv(client):
+    pick_controller.ADMIN_PASSWORD = "123"
+    headers = {"X-Admin-Password": "123"}
+
+    r = client.post("/api/admin/codes/gen/bulk", headers=headers, json={"count": 0})
+    assert r.status_code == 400
+    for length in (0, 17):
+        r = client.post("/api/admin/codes/gen/bulk", headers=headers, json={"count": 1, "length": length})
+        assert r.status_code == 400
+        assert r.json["error"] == "length must be in 1..16"
+
+    r = client.post("/api/admin/codes/gen/bulk", headers=headers, json={"count": 2500, "format": "csv"})
+    assert r.status_code == 200
+    assert r.is_streamed
+    assert r.mimetype == "text/csv"
+    assert r.headers["X-Requested-Count"] == "2500"
+    # 每提交一批输出一批，不先攒出完整列表
+    chunks = list(r.response)
+    assert len(chunks) == 1 + 5
+    lines = b"".join(chunks).decode("utf-8").splitlines()
+    assert lines[0] == "code"
+    assert len(set(lines[1:])) == 2500
+
+    assert pick_controller.service.redeem_codes.total == 2500
+    assert pick_controller.service.code_store.counts() == (2500, 0)
+
+
+def test_admin_codes_export_streams_all_formats(client):
+    pick_controller.ADMIN_PASSWORD = "123"
+    headers = {"X-Admin-Password": "123"}
+    store = pick_controller.service.code_store
+    store.add_many(["B", "A", "C"])
+    store.mark_used("B")
+
+    r = client.get("/api/admin/codes/export", headers=headers)
+    assert r.is_streamed
+    assert r.json == {
+        "codes": [{"code": "A", "used": False}, {"code": "B", "used": True}, {"code": "C", "used": False}],
+        "total_codes": 3,
+        "used_codes": 1,
+        "left_codes": 2,
+    }
+
+    r = client.get("/api/admin/codes/export?format=text&only_unused=1", headers=headers)
+    assert r.get_data(as_text=True) == "A\nC\n"
+
+    r = client.get("/api/admin/codes/export?format=csv", headers=headers)
+    assert r.mimetype == "text/csv"
+    assert r.get_data(as_text=True) == "code,used\nA,0\nB,1\nC,0\n"
+
+    r = client.get("/api/admin/codes/export?format=ndjson&only_unused=1", headers=headers)
+    assert [json.loads(line) for line in r.get_data(as_text=True).splitlines()] == [
+        {"code": "A", "used": False},
+        {"code": "C", "used": False},
+    ]
+
+    r = client.get("/api/admin/codes/export?format=xml", headers=headers)
+    assert r.status_code == 400
+
+
+def test_admin_codes_export_empty_json(client):
+    pick_controller.ADMIN_PASSWORD = "123"
+    r = client.get("/api/admin/codes/export", headers={"X-Admin-Password": "123"})
+    assert r.json == {"codes": [], "total_codes": 0, "used_codes": 0, "left_codes": 0}
+
+
+def _sse_events(body):
+    events = []
+    for block in body.split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if ": " in line and not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields.get("id"), fields["event"], json.loads(fields["data"])))
+    return events
+
+
+def test_api_files_events_pushes_draws(tmp_path, client, monkeypatch):
+    pick_controller.files_mode_root = str(tmp_path)
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    monkeypatch.setattr(pick_controller, "SSE_STREAM_SECONDS", 0.2)
+    monkeypatch.setattr(pick_controller, "event_broker", pick_controller.EventBroker())
+    monkeypatch.setattr(pick_controller, "_client_ip", lambda: "1.2.3.4")
+
+    r = client.get("/api/files/events")
+    assert r.mimetype == "text/event-stream"
+    body = r.get_data(as_text=True)
+    assert body.startswith("retry: ")
+    events = _sse_events(body)
+    assert events[0][1] == "stats"
+    assert events[0][2]["mode"] == "ip" and events[0][2]["draw_count"] == 0
+    last_id = events[0][0]
+
+    assert client.post("/api/files/pick", json={}).status_code == 200
+
+    # 断线重连：按 Last-Event-ID 续传错过的事件
+    r = client.get("/api/files/events", headers={"Last-Event-ID": last_id})
+    events = _sse_events(r.get_data(as_text=True))
+    assert [e[1] for e in events] == ["draw"]
+    assert events[0][2]["file"] == "a.txt"
+    assert events[0][2]["draw_count"] == 1
+
+
+def test_api_files_events_caps_listeners(tmp_path, client, monkeypatch):
+    pick_controller.files_mode_root = str(tmp_path)
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    monkeypatch.setattr(pick_controller, "SSE_STREAM_SECONDS", 0.05)
+    monkeypatch.setattr(pick_controller, "sse_slots", pick_controller.threading.BoundedSemaphore(1))
+
+    first = client.get("/api/files/events", buffered=False)
+    assert first.status_code == 200
+
+    # 名额用完：不占用工作线程，提示客户端改为轮询
+    r = client.get("/api/files/events")
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == str(pick_controller.SSE_FALLBACK_POLL_SECONDS)
+    assert r.json["poll_interval"] == pick_controller.SSE_FALLBACK_POLL_SECONDS
+
+    # 连接关闭（即使没有读取任何数据）后名额释放
+    first.close()
+    r = client.get("/api/files/events")
+    assert r.status_code == 200
+    r.get_data()
+    r.close()
+    assert pick_controller.sse_slots.acquire(blocking=False)
+
+
+def _limit_key(remote, xff=None):
+    headers = {"X-Forwarded-For": xff} if xff else {}
+    with pick_controller.app.test_request_context("/", headers=headers, environ_base={"REMOTE_ADDR": remote}):
+        return pick_controller._client_ip()
+
+
+def test_client_ip_direct_and_behind_trusted_proxy(client, monkeypatch):
+    # 默认：只看 TCP 对端地址，伪造的 X-Forwarded-For 不起作用
+    assert _limit_key("1.1.1.1", "9.9.9.9") == "1.1.1.1"
+
+    monkeypatch.setattr(
+        pick_controller, "TRUSTED_PROXIES", pick_controller.parse_trusted_proxies(["10.0.0.1", "172.16.0.0/12"])
+    )
+    # 不受信任的对端仍按对端地址计数
+    assert _limit_key("1.1.1.1", "9.9.9.9") == "1.1.1.1"
+    # 经受信任代理：从右向左跳过代理，客户端伪造的左侧部分被忽略
+    assert _limit_key("10.0.0.1", "6.6.6.6, 9.9.9.9") == "9.9.9.9"
+    assert _limit_key("10.0.0.1", "9.9.9.9, 172.16.5.5") == "9.9.9.9"
+    # 代理没有附带 X-Forwarded-For 时退回对端地址
+    assert _limit_key("10.0.0.1") == "10.0.0.1"
+
+    with pytest.raises(ValueError):
+        pick_controller.parse_trusted_proxies(["not-an-ip"])
+
+
+def test_api_files_pick_limits_per_client_behind_proxy(tmp_path, client, monkeypatch):
+    pick_controller.files_mode_root = str(tmp_path)
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    pick_controller.service.redeem_codes = {"GOOD": False}
+    monkeypatch.setattr(pick_controller, "code_fail_limiter", pick_controller.SlidingWindowLimiter(limit=2, window=60))
+    proxy = {"REMOTE_ADDR": "10.0.0.1"}
+
+    def _pick(client_addr, code):
+        return client.post(
+            "/api/files/pick", json={"code": code},
+            headers={"X-Forwarded-For": client_addr}, environ_base=proxy,
+        )
+
+    # 未配置受信任代理：所有客户端共用代理地址，一个人输错就锁住所有人
+    for _ in range(2):
+        assert _pick("9.9.9.9", "BAD1").status_code == 400
+    assert _pick("8.8.8.8", "GOOD").status_code == 429
+
+    pick_controller.code_fail_limiter.reset()
+    monkeypatch.setattr(pick_controller, "TRUSTED_PROXIES", pick_controller.parse_trusted_proxies(["10.0.0.1"]))
+    for _ in range(2):
+        assert _pick("9.9.9.9", "BAD1").status_code == 400
+    assert _pick("9.9.9.9", "GOOD").status_code == 429
+    assert _pick("8.8.8.8", "GOOD").status_code == 200
+
+
+def test_api_files_pick_throttles_wrong_codes_before_draw(tmp_path, client, monkeypatch):
+    pick_controller.files_mode_root = str(tmp_path)
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    pick_controller.service.redeem_codes = {"GOOD": False}
+    limiter = pick_controller.SlidingWindowLimiter(limit=10, window=60)
+    monkeypatch.setattr(pick_controller, "code_fail_limiter", limiter)
+
+    for i in range(limiter.limit):
+        r = client.post("/api/files/pick", json={"code": "BAD%d" % i})
+        assert r.status_code == 400
+
+    def _no_draw(*_a, **_k):
+        raise AssertionError("should be rejected before drawing")
+
+    monkeypatch.setattr(pick_controller.draw_engine, "draw_with_code", _no_draw)
+    r = client.post("/api/files/pick", json={"code": "GOOD"})
+    assert r.status_code == 429
+    assert int(r.headers["Retry-After"]) >= 1
+    assert limiter.stats()["allowed"] == limiter.limit
+
+
+def test_api_files_pick_request_rate_limit(tmp_path, client, monkeypatch):
+    pick_controller.files_mode_root = str(tmp_path)
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    monkeypatch.setattr(pick_controller, "pick_limiter", pick_controller.SlidingWindowLimiter(limit=3, window=60))
+
+    results = [client.post("/api/files/pick", json={}) for _ in range(5)]
+    assert results[0].status_code == 200
+    assert [r.json.get("picked") for r in results[1:3]] == ["a.txt", "a.txt"]
+    assert [r.status_code for r in results[3:]] == [429, 429]
+    assert all("retry_after" in r.json for r in results[3:])
+    assert pick_controller.pick_limiter.stats()["rejected"] == 2
+
+
+def test_sigterm_stop_discards_journal(tmp_path, client, monkeypatch):
+    import signal
+
+    pick_journal = importlib.import_module("fcbyk.commands.pick.journal")
+    (tmp_path / "a.txt").write_text("a", encoding="utf-8")
+    journal = pick_journal.DrawJournal(str(tmp_path / "j.ndjson"), str(tmp_path / "j.snap.json"), fsync_interval=0)
+    monkeypatch.setattr(pick_controller.service, "journal", journal)
+    monkeypatch.setattr(pick_controller.service, "shared_db", str(tmp_path / "shared.db"))
+    monkeypatch.setattr(pick_controller, "get_private_networks", lambda: [])
+
+    served = {}
+
+    def _fake_serve(app, **kwargs):
+        # 与 waitress 一样：收到 KeyboardInterrupt 后停止服务并正常返回
+        assert (tmp_path / "j.ndjson").exists()
+        try:
+            os.kill(os.getpid(), signal.SIGTERM)
+            for _ in range(100):
+                pick_controller.time.sleep(0.01)
+        except KeyboardInterrupt:
+            served["stopped"] = True
+
+    monkeypatch.setattr("waitress.serve", _fake_serve)
+    previous = signal.getsignal(signal.SIGTERM)
+    try:
+        pick_controller.start_web_server(0, True, files_root=str(tmp_path), admin_password="x")
+    finally:
+        signal.signal(signal.SIGTERM, previous)
+
+    assert served == {"stopped": True}
+    assert not (tmp_path / "j.ndjson").exists()
+    assert journal.recover() == (None, None, 0)
@@ -0,0 +1,177 @@
+import threading
+
+import pytest
+import importlib
+
+pick_draw = importlib.import_module("fcbyk.commands.pick.draw")
+pick_codes = importlib.import_module("fcbyk.commands.pick.codes")
+pick_prizes = importlib.import_module("fcbyk.commands.pick.prizes")
+PickService = importlib.import_module("fcbyk.commands.pick.service").PickService
+pick_catalog = importlib.import_module("fcbyk.commands.pick.catalog")
+
+FILES = tuple(pick_catalog.FileEntry("f%d.txt" % i, "x", i) for i in range(20))
+SNAP = pick_catalog.CatalogSnapshot(FILES, 1)
+
+
+def _url(name):
+    return "/d/" + name
+
+
+@pytest.fixture
+def engine(tmp_path):
+    service = PickService(None, {"items": []})
+    service.code_store = pick_codes.RedeemCodeStore(str(tmp_path / "codes.db"))
+    service.prize_store = pick_prizes.PrizeStore(str(tmp_path / "prizes.db"))
+    return pick_draw.DrawEngine(service)
+
+
+def _run_concurrently(n, fn):
+    barrier = threading.Barrier(n)
+    results = []
+    lock = threading.Lock()
+
+    def worker(i):
+        barrier.wait()
+        try:
+            out = fn(i)
+        except pick_draw.DrawError as e:
+            out = e
+        with lock:
+            results.append(out)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(n)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    return results
+
+
+def test_code_draw_success_and_reuse(engine):
+    engine.service.redeem_codes = {"AAAA": False}
+    engine.service.code_store.add("AAAA")
+
+    r = engine.draw_with_code("AAAA", "1.1.1.1", SNAP, _url)
+    assert r.mode == "code"
+    assert r.used_codes == 1 and r.total_codes == 1
+    assert r.download_url == "/d/" + r.file["name"]
+    assert engine.service.code_results["AAAA"]["file"] == r.file
+    assert engine.service.code_store.get("AAAA") is True
+
+    with pytest.raises(pick_draw.DrawError) as ei:
+        engine.draw_with_code("AAAA", "1.1.1.1", SNAP, _url)
+    assert ei.value.status == 429
+
+    with pytest.raises(pick_draw.DrawError) as ei:
+        engine.draw_with_code("ZZZZ", "1.1.1.1", SNAP, _url)
+    assert ei.value.status == 400
+
+
+def test_code_used_by_other_process_is_rejected(engine):
+    engine.service.redeem_codes = {"AAAA": False}
+    engine.service.code_store.add("AAAA")
+    engine.service.code_store.mark_used("AAAA")
+
+    with pytest.raises(pick_draw.DrawError) as ei:
+        engine.draw_with_code("AAAA", "1.1.1.1", SNAP, _url)
+    assert ei.value.status == 429
+    assert engine.service.redeem_codes["AAAA"] is True
+
+
+def test_ip_draw_once(engine):
+    r = engine.draw_by_ip("1.1.1.1", SNAP, _url)
+    with pytest.raises(pick_draw.DrawError) as ei:
+        engine.draw_by_ip("1.1.1.1", SNAP, _url)
+    assert ei.value.status == 429
+    assert ei.value.extra == {"picked": r.file["name"]}
+
+
+def test_no_candidates_does_not_consume_code(engine):
+    engine.service.redeem_codes = {"AAAA": False}
+    engine.service.code_store.add("AAAA")
+    engine.service.ip_file_history["1.1.1.1"] = {f.name for f in FILES}
+
+    with pytest.raises(pick_draw.DrawError):
+        engine.draw_with_code("AAAA", "1.1.1.1", SNAP, _url)
+    assert engine.service.redeem_codes["AAAA"] is False
+    assert engine.service.code_store.get("AAAA") is False
+
+
+def test_concurrent_same_code_single_winner(engine):
+    """压力测试：大量线程同时使用同一个兑换码，只能成功一次"""
+    engine.service.redeem_codes = {"AAAA": False}
+    engine.service.code_store.add("AAAA")
+
+    results = _run_concurrently(32, lambda i: engine.draw_with_code("AAAA", "10.0.0.%d" % i, SNAP, _url))
+    wins = [r for r in results if isinstance(r, pick_draw.DrawResult)]
+    assert len(wins) == 1
+    assert all(r.status == 429 for r in results if isinstance(r, pick_draw.DrawError))
+
+
+def test_concurrent_burst_many_codes_no_double_spend(engine):
+    """压力测试：多个线程抢同一批兑换码，每个兑换码恰好成功一次"""
+    codes = ["C%03d" % i for i in range(50)]
+    engine.service.redeem_codes = {c: False for c in codes}
+    engine.service.code_store.add_many(codes)
+
+    def attempt(i):
+        wins = []
+        for c in codes:
+            try:
+                engine.draw_with_code(c, "10.0.%d.1" % i, SNAP, _url)
+                wins.append(c)
+            except pick_draw.DrawError:
+                pass
+        return wins
+
+    results = _run_concurrently(16, attempt)
+    won = [c for wins in results for c in wins]
+    assert sorted(won) == codes
+    assert engine.service.code_store.counts() == (50, 50)
+    assert set(engine.service.code_results) == set(codes)
+
+
+def test_concurrent_same_ip_single_winner(engine):
+    results = _run_concurrently(32, lambda i: engine.draw_by_ip("1.2.3.4", SNAP, _url))
+    wins = [r for r in results if isinstance(r, pick_draw.DrawResult)]
+    assert len(wins) == 1
+    assert len(engine.service.ip_draw_records) == 1
+
+
+def test_ip_history_exhausts_all_files_without_repeat(engine):
+    """同一 IP 用多个兑换码抽取，直到所有文件都被抽到过"""
+    codes = ["K%02d" % i for i in range(len(FILES) + 1)]
+    engine.service.redeem_codes = {c: False for c in codes}
+    engine.service.code_store.add_many(codes)
+
+    names = [engine.draw_with_code(c, "1.1.1.1", SNAP, _url).file["name"] for c in codes[:-1]]
+    assert sorted(names) == sorted(f.name for f in FILES)
+
+    with pytest.raises(pick_draw.DrawError):
+        engine.draw_with_code(codes[-1], "1.1.1.1", SNAP, _url)
+    assert engine.service.redeem_codes[codes[-1]] is False
+
+
+def test_weighted_draw_respects_stock_under_concurrency(engine):
+    """压力测试：库存有限的奖品在并发抽取下不会超发"""
+    engine.service.prize_store.replace({"f0.txt": (1000, 5), "f1.txt": (1, 0)})
+
+    results = _run_concurrently(40, lambda i: engine.draw_by_ip("10.1.0.%d" % i, SNAP, _url))
+    names = [r.file["name"] for r in results if isinstance(r, pick_draw.DrawResult)]
+    assert names.count("f0.txt") == 5
+    assert "f1.txt" not in names
+    assert engine.service.prize_store.snapshot()[0]["f0.txt"] == (1000.0, 0)
+
+
+def test_weighted_draw_all_stock_gone(engine):
+    files = (pick_catalog.FileEntry("only.txt", "x", 1),)
+    snap = pick_catalog.CatalogSnapshot(files, 7)
+    engine.service.prize_store.replace({"only.txt": (1, 1)})
+    engine.service.redeem_codes = {"A": False, "B": False}
+    engine.service.code_store.add_many(["A", "B"])
+
+    engine.draw_with_code("A", "1.1.1.1", snap, _url)
+    with pytest.raises(pick_draw.DrawError) as ei:
+        engine.draw_with_code("B", "2.2.2.2", snap, _url)
+    assert ei.value.message == "奖品已全部抽完"
+    assert engine.service.code_store.get("B") is False
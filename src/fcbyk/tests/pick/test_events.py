@@ -0,0 +1,49 @@
+import threading
+
+import importlib
+
+pick_events = importlib.import_module("fcbyk.commands.pick.events")
+
+
+def test_publish_and_wait_in_order():
+    b = pick_events.EventBroker()
+    assert b.wait(0, 0) == ([], 0, False)
+
+    b.publish("stats", {"n": 1})
+    b.publish("draw", {"file": "中.txt"})
+    messages, latest, missed = b.wait(0, 0)
+    assert latest == 2 and missed is False
+    assert messages == [
+        'id: 1\nevent: stats\ndata: {"n":1}\n\n',
+        'id: 2\nevent: draw\ndata: {"file":"中.txt"}\n\n',
+    ]
+    assert b.wait(1, 0)[0] == messages[1:]
+
+
+def test_wait_reports_missed_events_when_buffer_overflows():
+    b = pick_events.EventBroker(capacity=3)
+    for i in range(5):
+        b.publish("stats", {"n": i})
+    messages, latest, missed = b.wait(0, 0)
+    assert missed is True and latest == 5
+    assert len(messages) == 3
+    assert b.wait(2, 0)[2] is False
+
+
+def test_wait_wakes_all_listeners_on_publish():
+    b = pick_events.EventBroker()
+    results = []
+    started = threading.Barrier(9)
+
+    def listener():
+        started.wait()
+        results.append(b.wait(0, 5)[1])
+
+    threads = [threading.Thread(target=listener) for _ in range(8)]
+    for t in threads:
+        t.start()
+    started.wait()
+    b.publish("draw", {})
+    for t in threads:
+        t.join()
+    assert results == [1] * 8
@@ -0,0 +1,112 @@
+import json
+import importlib
+
+pick_journal = importlib.import_module("fcbyk.commands.pick.journal")
+pick_draw = importlib.import_module("fcbyk.commands.pick.draw")
+pick_codes = importlib.import_module("fcbyk.commands.pick.codes")
+pick_prizes = importlib.import_module("fcbyk.commands.pick.prizes")
+pick_catalog = importlib.import_module("fcbyk.commands.pick.catalog")
+PickService = importlib.import_module("fcbyk.commands.pick.service").PickService
+
+FILES = tuple(pick_catalog.FileEntry("f%d.txt" % i, "x", i) for i in range(5))
+SNAP = pick_catalog.CatalogSnapshot(FILES, 1)
+
+
+def _journal(tmp_path, **kw):
+    kw.setdefault("fsync_interval", 0)
+    return pick_journal.DrawJournal(str(tmp_path / "j.ndjson"), str(tmp_path / "j.snap.json"), **kw)
+
+
+def _service(tmp_path, **kw):
+    s = PickService(None, {"items": []})
+    s.code_store = pick_codes.RedeemCodeStore(str(tmp_path / "codes.db"))
+    s.prize_store = pick_prizes.PrizeStore(str(tmp_path / "prizes.db"))
+    s.journal = _journal(tmp_path, **kw)
+    return s
+
+
+def test_nothing_to_recover(tmp_path):
+    assert _journal(tmp_path).recover() == (None, None, 0)
+
+
+def test_append_is_noop_until_opened(tmp_path):
+    j = _journal(tmp_path)
+    j.append({"op": "ip", "ip": "1", "file": "a"})
+    assert not (tmp_path / "j.ndjson").exists()
+
+
+def test_only_replayed_ops_are_journaled(tmp_path):
+    s = _service(tmp_path)
+    s.journal.open("sess-1", s.journal_state)
+    shared = []
+    s.shared = type("Shared", (), {"append": lambda self, rec: shared.append(rec)})()
+
+    s.record({"op": "codes_add", "codes": ["C%d" % i for i in range(1000)]})
+    s.record({"op": "code_del", "code": "C1"})
+    s.record({"op": "prizes"})
+    s.record({"op": "forget", "code": "C2"})
+
+    lines = (tmp_path / "j.ndjson").read_text(encoding="utf-8").splitlines()
+    assert [json.loads(line)["op"] for line in lines] == ["session", "forget"]
+    # 其它 worker 仍需收到全部变更
+    assert [r["op"] for r in shared] == ["codes_add", "code_del", "prizes", "forget"]
+
+
+def test_draws_recovered_after_crash(tmp_path):
+    s = _service(tmp_path)
+    s.journal.open("sess-1", s.journal_state)
+    engine = pick_draw.DrawEngine(s)
+    s.redeem_codes = {"AAAA": False, "BBBB": False}
+    s.code_store.add_many(["AAAA", "BBBB"])
+
+    r1 = engine.draw_with_code("AAAA", "1.1.1.1", SNAP, lambda n: "/d/" + n)
+    engine.draw_with_code("BBBB", "1.1.1.1", SNAP, lambda n: "/d/" + n)
+    r3 = engine.draw_by_ip("2.2.2.2", SNAP, lambda n: "/d/" + n)
+    s.forget_code_result("BBBB")
+    # 模拟崩溃：不调用 close
+
+    s2 = _service(tmp_path)
+    state, session_id, replayed = s2.journal.recover()
+    assert session_id == "sess-1"
+    assert replayed == 4
+    s2.restore_state(state)
+    assert s2.code_results == {"AAAA": s.code_results["AAAA"]}
+    assert s2.code_results["AAAA"]["file"] == r1.file
+    assert s2.ip_draw_records == {"2.2.2.2": r3.file["name"]}
+    assert s2.ip_file_history == s.ip_file_history
+
+
+def test_snapshot_truncates_journal_and_recovers(tmp_path):
+    j = _journal(tmp_path, snapshot_every=3)
+    state = pick_journal.empty_state()
+
+    def record(rec):
+        pick_journal.apply_record(state, rec)
+        j.append(rec)
+
+    j.open("s", lambda: state)
+    for i in range(7):
+        record({"op": "ip", "ip": "10.0.0.%d" % i, "file": "f%d" % i})
+
+    lines = (tmp_path / "j.ndjson").read_text(encoding="utf-8").splitlines()
+    assert len(lines) == 2   # 会话头 + 快照之后的 1 条
+
+    recovered, _sid, replayed = _journal(tmp_path).recover()
+    assert replayed == 1
+    assert recovered == state
+
+
+def test_torn_tail_and_clean_close(tmp_path):
+    j = _journal(tmp_path)
+    state = pick_journal.empty_state()
+    j.open("s", lambda: state)
+    j.append({"op": "ip", "ip": "a", "file": "x"})
+    with open(str(tmp_path / "j.ndjson"), "a", encoding="utf-8") as f:
+        f.write('{"op":"ip","ip":"b","fi')
+
+    recovered, _sid, replayed = _journal(tmp_path).recover()
+    assert replayed == 1
+    assert recovered["ip_draw_records"] == {"a": "x"}
+
+    j.close()
+    assert _journal(tmp_path).recover() == (None, None, 0)
@@ -0,0 +1,50 @@
+import importlib
+
+PrizeStore = importlib.import_module("fcbyk.commands.pick.prizes").PrizeStore
+
+
+def test_replace_snapshot_and_persist(tmp_path):
+    s = PrizeStore(str(tmp_path / "prizes.db"))
+    assert s.enabled() is False
+    v = s.snapshot()[1]
+
+    s.replace({"a": (2, None), "b": (0.5, 3)})
+    prizes, v2 = s.snapshot()
+    assert prizes == {"a": (2.0, None), "b": (0.5, 3)}
+    assert v2 > v
+    s.close()
+
+    assert PrizeStore(str(tmp_path / "prizes.db")).snapshot()[0] == prizes
+
+
+def test_consume_is_compare_and_set(tmp_path):
+    s = PrizeStore(str(tmp_path / "prizes.db"))
+    s.replace({"a": (1, 1), "b": (1, None)})
+
+    assert s.consume("a") == (True, 0)
+    assert s.consume("a") == (False, 0)
+    assert s.consume("b") == (True, None)
+    assert s.consume("missing") == (True, None)
+
+
+def test_consume_sees_stock_taken_by_other_instance(tmp_path):
+    s1 = PrizeStore(str(tmp_path / "prizes.db"))
+    s2 = PrizeStore(str(tmp_path / "prizes.db"))
+    s1.replace({"a": (1, 1)})
+    assert s2.snapshot()[0]["a"] == (1.0, 1)
+
+    assert s1.consume("a") == (True, 0)
+    assert s2.consume("a") == (False, 0)
+    assert s2.snapshot()[0]["a"] == (1.0, 0)
+
+
+def test_restock_returns_one_item(tmp_path):
+    s1 = PrizeStore(str(tmp_path / "prizes.db"))
+    s2 = PrizeStore(str(tmp_path / "prizes.db"))
+    s1.replace({"a": (1, 1), "b": (1, None)})
+    assert s1.consume("a") == (True, 0)
+
+    assert s2.restock("a") == 1
+    assert s2.restock("b") is None
+    assert s2.restock("missing") is None
+    assert s1.consume("a") == (True, 0)
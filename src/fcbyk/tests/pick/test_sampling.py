@@ -0,0 +1,106 @@
+import random
+
+import importlib
+
+pick_sampling = importlib.import_module("fcbyk.commands.pick.sampling")
+pick_catalog = importlib.import_module("fcbyk.commands.pick.catalog")
+
+
+def _snap(n, version=1):
+    files = tuple(pick_catalog.FileEntry("f%03d" % i, "x", i) for i in range(n))
+    return pick_catalog.CatalogSnapshot(files, version)
+
+
+def _drain(sampler, client, snap, seen):
+    out = []
+    while True:
+        f = sampler.sample(client, snap, seen)
+        if f is None:
+            return out
+        seen.add(f.name)
+        out.append(f.name)
+
+
+def test_permutation_visits_every_file_once():
+    random.seed(1)
+    snap = _snap(100)
+    s = pick_sampling.NoRepeatSampler()
+    seen = set()
+    names = _drain(s, "a", snap, seen)
+    assert sorted(names) == [f.name for f in snap]
+    assert s.remaining("a", snap, seen) == 0
+
+
+def test_respects_existing_history_and_clients_are_independent():
+    snap = _snap(10)
+    s = pick_sampling.NoRepeatSampler()
+    seen_a = {"f000", "f001", "f009", "gone.txt"}
+    assert s.remaining("a", snap, seen_a) == 7
+    names = _drain(s, "a", snap, seen_a)
+    assert set(names).isdisjoint({"f000", "f001", "f009"})
+    assert len(names) == 7
+
+    assert s.remaining("b", snap, set()) == 10
+
+
+def test_rebuilds_on_snapshot_or_history_change():
+    s = pick_sampling.NoRepeatSampler()
+    seen = set()
+    first = s.sample("a", _snap(5), seen)
+    seen.add(first.name)
+
+    # 文件列表变化：按历史重新排除
+    bigger = _snap(8, version=2)
+    assert s.remaining("a", bigger, seen) == 7
+
+    # 外部清空历史：排列随之重建
+    seen.clear()
+    assert s.remaining("a", bigger, seen) == 8
+
+    s.reset()
+    assert s.remaining("a", bigger, {"f000"}) == 7
+
+
+def test_sampling_is_roughly_uniform():
+    random.seed(2)
+    snap = _snap(4)
+    counts = dict.fromkeys((f.name for f in snap), 0)
+    s = pick_sampling.NoRepeatSampler()
+    for i in range(4000):
+        counts[s.sample("c%d" % i, snap, set()).name] += 1
+    assert all(800 < v < 1200 for v in counts.values())
+
+
+def test_fenwick_find_and_update():
+    t = pick_sampling.FenwickTree([3, 0, 5, 2])
+    assert t.total() == 10
+    assert [t.find(x) for x in range(10)] == [0, 0, 0, 2, 2, 2, 2, 2, 3, 3]
+    t.add(2, -5)
+    assert t.total() == 5
+    assert [t.find(x) for x in range(5)] == [0, 0, 0, 3, 3]
+
+
+def test_weighted_sampler_weights_stock_and_exclusion():
+    random.seed(3)
+    snap = _snap(3)
+    prizes = {"f000": (3.0, None), "f001": (1.0, 2), "f002": (0.0, None)}
+    s = pick_sampling.WeightedSampler()
+
+    counts = {"f000": 0, "f001": 0, "f002": 0}
+    for _ in range(4000):
+        counts[s.sample(snap, prizes, 1, ()).name] += 1
+    assert counts["f002"] == 0
+    assert 2700 < counts["f000"] < 3300
+
+    # 排除客户端历史
+    assert s.sample(snap, prizes, 1, {"f000"}).name == "f001"
+
+    # 库存扣完后权重归零
+    s.consume("f001")
+    s.consume("f001")
+    assert s.available(snap, prizes, 1, ()) == (3000, 3000)
+    assert s.sample(snap, prizes, 1, {"f000"}) is None
+
+    # 以持久化库存修正
+    s.set_stock("f001", 1)
+    assert s.available(snap, prizes, 1, {"f000"}) == (4000, 1000)
@@ -8,36 +8,6 @@ pick_service_mod = importlib.import_module("fcbyk.commands.pick.service")
 PickService = pick_service_mod.PickService
 
 
-def test_list_files_returns_empty_on_none():
-    s = PickService("cfg.json", {"items": []})
-    assert s.list_files(None) == []
-
-
-def test_list_files_single_file(tmp_path):
-    f = tmp_path / "a.txt"
-    f.write_text("hi", encoding="utf-8")
-
-    s = PickService("cfg.json", {"items": []})
-    out = s.list_files(str(f))
-    assert out == [{"name": "a.txt", "path": str(f), "size": 2}]
-
-
-def test_list_files_directory_sorted(tmp_path):
-    (tmp_path / "b.txt").write_text("b", encoding="utf-8")
-    (tmp_path / "a.txt").write_text("aa", encoding="utf-8")
-
-    s = PickService("cfg.json", {"items": []})
-    out = s.list_files(str(tmp_path))
-
-    assert [x["name"] for x in out] == ["a.txt", "b.txt"]
-
-
-def test_list_files_dir_not_found(tmp_path):
-    s = PickService("cfg.json", {"items": []})
-    out = s.list_files(str(tmp_path / "missing"))
-    assert out == []
-
-
 def test_generate_redeem_codes_properties():
     s = PickService("cfg.json", {"items": []})
     codes = list(s.generate_redeem_codes(10, length=4))
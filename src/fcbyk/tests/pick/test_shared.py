@@ -0,0 +1,308 @@
+import importlib
+import json
+import os
+import signal
+import time
+
+import pytest
+
+pick_shared = importlib.import_module("fcbyk.commands.pick.shared")
+pick_draw = importlib.import_module("fcbyk.commands.pick.draw")
+pick_codes = importlib.import_module("fcbyk.commands.pick.codes")
+pick_prizes = importlib.import_module("fcbyk.commands.pick.prizes")
+pick_catalog = importlib.import_module("fcbyk.commands.pick.catalog")
+PickService = importlib.import_module("fcbyk.commands.pick.service").PickService
+
+FILES = tuple(pick_catalog.FileEntry("f%d.txt" % i, "x", i) for i in range(3))
+SNAP = pick_catalog.CatalogSnapshot(FILES, 1)
+
+
+def _url(name):
+    return "/d/" + name
+
+
+def test_claim_ip_is_exclusive(tmp_path):
+    a = pick_shared.SharedDrawState(str(tmp_path / "s.db"), origin="a")
+    b = pick_shared.SharedDrawState(str(tmp_path / "s.db"), origin="b")
+    a.reset()
+
+    assert a.claim_ip("1.1.1.1") is True
+    assert b.claim_ip("1.1.1.1") is False
+    a.set_ip_file("1.1.1.1", "x")
+    assert b.get_ip_file("1.1.1.1") == "x"
+
+    assert b.claim_ip("2.2.2.2") is True
+    b.release_ip("2.2.2.2")
+    assert a.claim_ip("2.2.2.2") is True
+
+
+def test_poll_applies_only_other_origins(tmp_path):
+    a = pick_shared.SharedDrawState(str(tmp_path / "s.db"), origin="a")
+    b = pick_shared.SharedDrawState(str(tmp_path / "s.db"), origin="b")
+    a.reset()
+    seen = []
+
+    b.poll(seen.append)
+    a.append({"op": "ip", "ip": "1", "file": "x"})
+    b.append({"op": "ip", "ip": "2", "file": "y"})
+    assert b.poll(seen.append) == 1
+    assert seen == [{"op": "ip", "ip": "1", "file": "x"}]
+
+    # 没有新的提交时不读表
+    assert b.poll(seen.append) == 0
+
+
+@pytest.fixture
+def workers(tmp_path):
+    """同一进程内用两个 PickService 模拟两个 worker"""
+    out = []
+    for name in ("w1", "w2"):
+        s = PickService(None, {"items": []})
+        s.code_store = pick_codes.RedeemCodeStore(str(tmp_path / "codes.db"))
+        s.prize_store = pick_prizes.PrizeStore(str(tmp_path / "prizes.db"))
+        s.shared = pick_shared.SharedDrawState(str(tmp_path / "shared.db"), origin=name)
+        out.append(pick_draw.DrawEngine(s))
+    out[0].service.shared.reset()
+    return out
+
+
+def test_ip_mode_once_across_workers(workers):
+    e1, e2 = workers
+    r = e1.draw_by_ip("1.1.1.1", SNAP, _url)
+    with pytest.raises(pick_draw.DrawError) as ei:
+        e2.draw_by_ip("1.1.1.1", SNAP, _url)
+    assert ei.value.status == 429
+    assert ei.value.extra == {"picked": r.file["name"]}
+    assert e2.service.ip_draw_records == {"1.1.1.1": r.file["name"]}
+
+
+def test_code_state_synced_across_workers(workers):
+    e1, e2 = workers
+    e1.service.code_store.add_many(["AAAA", "BBBB"])
+    e1.service.register_redeem_codes(["AAAA", "BBBB"])
+
+    r = e1.draw_with_code("AAAA", "1.1.1.1", SNAP, _url)
+    with pytest.raises(pick_draw.DrawError) as ei:
+        e2.draw_with_code("AAAA", "2.2.2.2", SNAP, _url)
+    assert ei.value.status == 429
+    assert e2.service.code_results["AAAA"]["file"] == r.file
+    assert e2.service.redeem_codes.stats()[:2] == (2, 1)
+
+    # 同一 IP 在另一个 worker 上不会再抽到同一个文件
+    r2 = e2.draw_with_code("BBBB", "1.1.1.1", SNAP, _url)
+    assert r2.file["name"] != r.file["name"]
+
+
+def test_versions_agree_across_workers(workers, tmp_path):
+    """兑换码与文件列表的 version 只由内容决定，rescan 同步到其它 worker"""
+    e1, e2 = workers
+    e1.service.register_redeem_codes(["AAAA", "BBBB"])
+    e1.draw_with_code("AAAA", "1.1.1.1", SNAP, _url)
+    with e2.lock:
+        e2.service.sync_shared()
+    assert e2.service.redeem_codes.version == e1.service.redeem_codes.version
+
+    root = tmp_path / "files"
+    root.mkdir()
+    f = root / "a.txt"
+    f.write_text("a", encoding="utf-8")
+    cat1 = e1.service.get_file_catalog(str(root))
+    cat2 = e2.service.get_file_catalog(str(root))
+    assert cat1.snapshot().version == cat2.snapshot().version
+
+    # 原地替换内容（目录 mtime 不变），只在 w1 上重扫
+    f.write_text("abc", encoding="utf-8")
+    with e1.lock:
+        snap = e1.service.rescan_files(str(root))
+    assert snap.get("a.txt").size == 3
+    with e2.lock:
+        e2.service.sync_shared()
+    assert cat2.snapshot().version == snap.version
+
+
+def test_recover_replays_unfinished_round(tmp_path):
+    db = str(tmp_path / "s.db")
+    assert pick_shared.SharedDrawState(db).recover() == (None, None, 0)
+
+    a = pick_shared.SharedDrawState(db, origin="a")
+    a.begin("sess", {"ip_draw_records": {"9.9.9.9": "old"}, "ip_file_history": {"9.9.9.9": {"old"}}, "code_results": {}})
+    a.append({"op": "ip", "ip": "1.1.1.1", "file": "x"})
+    a.append({"op": "codes_add", "codes": ["AAAA"]})
+    a.append({"op": "code", "code": "AAAA", "ip": "2.2.2.2", "result": {"file": {"name": "y", "size": 1}}})
+    # 占位已写入文件名、日志未追加时进程被结束
+    assert a.claim_ip("3.3.3.3")
+    a.set_ip_file("3.3.3.3", "z")
+    a.close()
+
+    state, session_id, replayed = pick_shared.SharedDrawState(db).recover()
+    assert session_id == "sess"
+    assert replayed == 3
+    assert state["ip_draw_records"] == {"9.9.9.9": "old", "1.1.1.1": "x", "3.3.3.3": "z"}
+    assert state["ip_file_history"]["2.2.2.2"] == {"y"}
+    assert state["code_results"]["AAAA"]["file"]["name"] == "y"
+
+    # 新一轮以恢复的状态开始：IP 占位保留，其它 worker 不会重复抽取
+    b = pick_shared.SharedDrawState(db, origin="b")
+    b.begin("sess", state)
+    assert b.claim_ip("1.1.1.1") is False
+    assert b.recover()[0] == state
+
+    # 正常退出后不再恢复
+    b.reset()
+    assert b.recover() == (None, None, 0)
+
+
+_SERVE_SCRIPT = """
+import sys
+from fcbyk.commands.pick.controller import start_web_server
+start_web_server(int(sys.argv[1]), True, files_root=sys.argv[2], admin_password="x", workers=2)
+"""
+
+
+def _free_port():
+    import socket
+
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_workers(tmp_path, port):
+    import subprocess
+    import sys
+
+    env = dict(os.environ, HOME=str(tmp_path), USERPROFILE=str(tmp_path))
+    return subprocess.Popen(
+        [sys.executable, "-c", _SERVE_SCRIPT, str(port), str(tmp_path / "files")],
+        env=env,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.STDOUT,
+        start_new_session=True,
+    )
+
+
+def _request(port, method, path, body=None, headers=None):
+    import urllib.error
+    import urllib.request
+
+    data = json.dumps(body).encode("utf-8") if body is not None else None
+    req = urllib.request.Request(
+        "http://127.0.0.1:%d%s" % (port, path), data=data, method=method,
+        headers=dict({"Content-Type": "application/json"}, **(headers or {})),
+    )
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            return resp.status, json.loads(resp.read().decode("utf-8"))
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read().decode("utf-8"))
+
+
+def _files_etag(port, etag=None):
+    """GET /api/files，返回 (状态码, ETag)；每次新建连接，请求会落到任意 worker"""
+    import urllib.error
+    import urllib.request
+
+    req = urllib.request.Request("http://127.0.0.1:%d/api/files" % port)
+    if etag:
+        req.add_header("If-None-Match", etag)
+    try:
+        with urllib.request.urlopen(req, timeout=5) as resp:
+            resp.read()
+            return resp.status, resp.headers["ETag"]
+    except urllib.error.HTTPError as e:
+        return e.code, e.headers["ETag"]
+
+
+def _settled_etag(port, previous=None, rounds=20):
+    """等待所有 worker 同步后返回一致的 ETag（连续 rounds 次请求结果相同且不同于 previous）"""
+    deadline = time.time() + 10
+    while time.time() < deadline:
+        etags = {_files_etag(port)[1] for _ in range(rounds)}
+        if len(etags) == 1 and previous not in etags:
+            return etags.pop()
+        time.sleep(0.1)
+    raise AssertionError("workers did not agree on ETag: %r" % etags)
+
+
+def _wait_ready(proc, port):
+    deadline = time.time() + 20
+    while time.time() < deadline:
+        assert proc.poll() is None, proc.stdout.read().decode("utf-8", "replace")
+        try:
+            return _request(port, "GET", "/api/info")
+        except OSError:
+            time.sleep(0.1)
+    raise AssertionError("server did not start")
+
+
+@pytest.mark.skipif(not hasattr(os, "fork") or not hasattr(os, "killpg"), reason="requires fork()")
+def test_worker_mode_recovers_after_kill(tmp_path):
+    (tmp_path / "files").mkdir()
+    for name in ("a.txt", "b.txt", "c.txt"):
+        (tmp_path / "files" / name).write_text(name, encoding="utf-8")
+    data = tmp_path / ".fcbyk" / "data"
+    data.mkdir(parents=True)
+    store = pick_codes.RedeemCodeStore(str(data / "pick_redeem_codes.db"))
+    store.add_many(["ABCD", "EFGH"])
+    store.close()
+
+    port = _free_port()
+    proc = _start_workers(tmp_path, port)
+    try:
+        _wait_ready(proc, port)
+        status, body = _request(port, "POST", "/api/files/pick", {"code": "ABCD"})
+        assert status == 200
+        picked = body["file"]["name"]
+    finally:
+        # 模拟崩溃：整个进程组（主进程与 worker）立即结束，不走正常退出
+        os.killpg(proc.pid, signal.SIGKILL)
+        proc.wait()
+
+    port = _free_port()
+    proc = _start_workers(tmp_path, port)
+    try:
+        _wait_ready(proc, port)
+        status, body = _request(port, "GET", "/api/files/result/ABCD")
+        assert status == 200
+        assert body["file"]["name"] == picked
+        status, _ = _request(port, "POST", "/api/files/pick", {"code": "ABCD"})
+        assert status == 429
+    finally:
+        # svc stop：SIGTERM 为正常退出，共享库被清空
+        os.killpg(proc.pid, signal.SIGTERM)
+        output = proc.communicate(timeout=20)[0].decode("utf-8", "replace")
+    assert "Recovered draw records from previous run" in output
+    assert pick_shared.SharedDrawState(str(data / "pick_shared.db")).recover() == (None, None, 0)
+
+
+@pytest.mark.skipif(not hasattr(os, "fork") or not hasattr(os, "killpg"), reason="requires fork()")
+def test_worker_mode_etag_shared_across_workers(tmp_path):
+    (tmp_path / "files").mkdir()
+    for name in ("a.txt", "b.txt"):
+        (tmp_path / "files" / name).write_text(name, encoding="utf-8")
+    data = tmp_path / ".fcbyk" / "data"
+    data.mkdir(parents=True)
+    store = pick_codes.RedeemCodeStore(str(data / "pick_redeem_codes.db"))
+    store.add_many(["ABCD", "EFGH"])
+    store.close()
+
+    port = _free_port()
+    proc = _start_workers(tmp_path, port)
+    try:
+        _wait_ready(proc, port)
+        etag = _settled_etag(port)
+        assert {_files_etag(port, etag)[0] for _ in range(20)} == {304}
+
+        status, _ = _request(port, "POST", "/api/files/pick", {"code": "ABCD"})
+        assert status == 200
+        etag = _settled_etag(port, etag)
+
+        # 原地替换内容（目录 mtime 不变），重扫请求只落到其中一个 worker
+        (tmp_path / "files" / "a.txt").write_text("changed", encoding="utf-8")
+        status, _ = _request(port, "POST", "/api/admin/files/rescan", {}, {"X-Admin-Password": "x"})
+        assert status == 200
+        etag = _settled_etag(port, etag)
+        assert {_files_etag(port, etag)[0] for _ in range(20)} == {304}
+    finally:
+        os.killpg(proc.pid, signal.SIGTERM)
+        proc.communicate(timeout=20)
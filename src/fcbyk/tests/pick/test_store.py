@@ -0,0 +1,117 @@
+import json
+import os
+
+import importlib
+
+pick_store = importlib.import_module("fcbyk.commands.pick.store")
+ItemStore = pick_store.ItemStore
+
+
+def _read_items(path):
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)["items"]
+
+
+def test_loads_once_and_creates_file(tmp_path, monkeypatch):
+    path = str(tmp_path / "pick_data.json")
+    store = ItemStore(path, {"items": []}, flush_delay=0)
+
+    calls = []
+    real_load = pick_store.storage.load_json
+    monkeypatch.setattr(pick_store.storage, "load_json", lambda *a, **k: calls.append(1) or real_load(*a, **k))
+
+    assert store.items() == []
+    assert store.items() == []
+    assert len(calls) == 1
+    assert os.path.exists(path)
+
+
+def test_sync_write_when_delay_zero(tmp_path):
+    path = str(tmp_path / "pick_data.json")
+    store = ItemStore(path, {"items": []}, flush_delay=0)
+
+    assert store.add("a") is True
+    assert store.add("a") is False
+    assert store.add_many(["b", "a", "c", "b"]) == ["a", "b"]
+    assert _read_items(path) == ["a", "b", "c"]
+
+    assert store.remove("b") is True
+    assert store.remove("b") is False
+    assert store.clear() == 2
+    assert _read_items(path) == []
+
+
+def test_write_behind_batches_until_flush(tmp_path, monkeypatch):
+    path = str(tmp_path / "pick_data.json")
+    store = ItemStore(path, {"items": []}, flush_delay=60)
+
+    saves = []
+    real_save = pick_store.storage.save_json
+    monkeypatch.setattr(pick_store.storage, "save_json", lambda *a, **k: saves.append(1) or real_save(*a, **k))
+
+    store.items()  # 首次加载会创建文件
+    saves.clear()
+
+    for x in ["a", "b", "c"]:
+        store.add(x)
+    assert saves == []
+    assert store.items() == ["a", "b", "c"]
+
+    store.flush()
+    assert len(saves) == 1
+    assert _read_items(path) == ["a", "b", "c"]
+
+    # 没有新改动时 flush 不再写盘
+    store.flush()
+    assert len(saves) == 1
+
+
+def test_reload_when_mtime_changes(tmp_path):
+    path = tmp_path / "pick_data.json"
+    path.write_text(json.dumps({"items": ["a"], "extra": 1}), encoding="utf-8")
+    store = ItemStore(str(path), {"items": []}, flush_delay=0)
+    assert store.items() == ["a"]
+
+    path.write_text(json.dumps({"items": ["x", "y"], "extra": 1}), encoding="utf-8")
+    st = os.stat(str(path))
+    os.utime(str(path), ns=(st.st_atime_ns, st.st_mtime_ns + 10 ** 9))
+    assert store.items() == ["x", "y"]
+
+    # 写回时保留其它字段
+    store.add("z")
+    with open(str(path), "r", encoding="utf-8") as f:
+        data = json.load(f)
+    assert data == {"items": ["x", "y", "z"], "extra": 1}
+
+
+def test_invalid_json_falls_back_to_empty(tmp_path):
+    path = tmp_path / "pick_data.json"
+    path.write_text("{bad", encoding="utf-8")
+    store = ItemStore(str(path), {"items": []}, flush_delay=0)
+    assert store.items() == []
+
+
+def test_memory_only_without_path():
+    store = ItemStore(None, {"items": []})
+    store.add("a")
+    store.replace(["b", "c"])
+    assert store.items() == ["b", "c"]
+    store.flush()
+
+
+def test_duplicates_are_collapsed_on_replace_and_load(tmp_path):
+    store = ItemStore(None, {"items": []})
+    store.replace(["a", "b", "a"])
+    assert store.items() == ["a", "b"]
+    # 删除后不会残留另一个副本
+    assert store.remove("a") is True
+    assert store.items() == ["b"]
+    assert store.add("a") is True
+    assert store.items() == ["b", "a"]
+
+    path = tmp_path / "pick_data.json"
+    path.write_text('{"items": ["x", "y", "x"]}', encoding="utf-8")
+    store = ItemStore(str(path), {"items": []}, flush_delay=0)
+    assert store.items() == ["x", "y"]
+    assert store.remove("x") is True
+    assert "x" not in store.items()
@@ -0,0 +1,85 @@
+"""
+slide 输入后端压测脚本（不随 pytest 自动运行）
+
+对每个可用后端重复执行同一操作，统计每秒操作数与单次耗时。
+默认只测鼠标相对移动（+1 / -1 交替，指针最终回到原位）；
+--keys 额外测试按键（按 shift，不会输入字符），运行期间请勿操作键盘鼠标。
+
+用法::
+
+    python -m fcbyk.tests.slide.bench_backends --count 2000
+    python -m fcbyk.tests.slide.bench_backends --backend xtest --keys --out bench.json
+"""
+import argparse
+import importlib
+import json
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+
+slide_backends = importlib.import_module("fcbyk.commands.slide.backends")
+
+
+def bench_action(action: Callable[[int], None], count: int) -> Dict:
+    """执行 count 次 action(i)，返回吞吐与单次耗时"""
+    samples: List[float] = []
+    start = time.perf_counter()
+    for i in range(count):
+        t0 = time.perf_counter()
+        action(i)
+        samples.append(time.perf_counter() - t0)
+    elapsed = time.perf_counter() - start
+    samples.sort()
+    return {
+        "count": count,
+        "seconds": round(elapsed, 4),
+        "actions_per_sec": round(count / elapsed, 1) if elapsed else 0.0,
+        "p50_us": round(samples[len(samples) // 2] * 1e6, 1) if samples else 0.0,
+        "p99_us": round(samples[int(0.99 * (len(samples) - 1))] * 1e6, 1) if samples else 0.0,
+    }
+
+
+def bench_backend(backend, count: int, keys: bool = False) -> Dict:
+    result = {"move": bench_action(lambda i: backend.move(1 if i % 2 == 0 else -1, 0), count)}
+    if keys:
+        result["press"] = bench_action(lambda i: backend.press("shift"), count)
+    return result
+
+
+def run(names: Optional[List[str]] = None, count: int = 1000, keys: bool = False) -> Dict:
+    """对指定（默认全部）后端压测；不可用的后端记录原因后跳过"""
+    names = names or list(slide_backends.BACKENDS)
+    results = {}
+    for name in names:
+        try:
+            backend = slide_backends.create_backend(name)
+        except slide_backends.BackendUnavailable as e:
+            results[name] = {"unavailable": str(e)}
+            continue
+        try:
+            results[name] = bench_backend(backend, count, keys)
+        finally:
+            backend.close()
+    return {"count": count, "platform": sys.platform, "backends": results}
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="slide input backend benchmark")
+    parser.add_argument("--backend", action="append", choices=sorted(slide_backends.BACKENDS),
+                        help="backend to test (repeatable, default: all)")
+    parser.add_argument("--count", type=int, default=1000)
+    parser.add_argument("--keys", action="store_true", help="also benchmark key presses")
+    parser.add_argument("--out", help="write JSON result to this file")
+    args = parser.parse_args(argv)
+
+    result = run(args.backend, args.count, args.keys)
+    text = json.dumps(result, indent=2)
+    if args.out:
+        with open(args.out, "w", encoding="utf-8") as f:
+            f.write(text + "\n")
+    print(text)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,148 @@
+import importlib
+import sys
+
+import pytest
+
+slide_backends = importlib.import_module("fcbyk.commands.slide.backends")
+slide_service = importlib.import_module("fcbyk.commands.slide.service")
+bench_backends = importlib.import_module("fcbyk.tests.slide.bench_backends")
+
+
+def test_pyautogui_backend_disables_pause(monkeypatch):
+    monkeypatch.setattr(slide_backends.pyautogui, "PAUSE", 0.1)
+    slide_backends.PyAutoGUIBackend()
+    assert slide_backends.pyautogui.PAUSE == 0
+
+
+def test_mock_backend_records_service_actions():
+    backend = slide_backends.MockBackend()
+    s = slide_service.SlideService(password="p", backend=backend)
+
+    assert s.next_slide() == (True, None)
+    assert s.move_mouse(3, -2) == (True, None)
+    assert s.click_mouse() == (True, None)
+    assert s.right_click_mouse() == (True, None)
+    assert s.mouse_down() == (True, None)
+    assert s.mouse_up() == (True, None)
+    assert s.scroll_mouse(dx=-2, dy=500) == (True, None)
+
+    assert backend.events == [
+        ("press", "right"),
+        ("move", 3, -2),
+        ("click",),
+        ("right_click",),
+        ("mouse_down",),
+        ("mouse_up",),
+        ("scroll", 100),
+        ("hscroll", -2),
+    ]
+
+
+def test_backend_error_becomes_service_error():
+    class Broken(slide_backends.MockBackend):
+        def press(self, key):
+            raise RuntimeError("no display")
+
+    s = slide_service.SlideService(password="p", backend=Broken())
+    assert s.end_slide() == (False, "no display")
+
+
+def test_create_backend_by_name():
+    assert isinstance(slide_backends.create_backend("mock"), slide_backends.MockBackend)
+    with pytest.raises(ValueError):
+        slide_backends.create_backend("nope")
+
+
+def test_incomplete_backend_fails_on_creation():
+    class Partial(slide_backends.InputBackend):
+        def press(self, key):
+            pass
+
+    with pytest.raises(TypeError):
+        Partial()
+    with pytest.raises(TypeError):
+        slide_backends.InputBackend()
+
+
+def test_create_backend_auto_falls_back(monkeypatch):
+    class Unavailable(slide_backends.MockBackend):
+        def __init__(self):
+            raise slide_backends.BackendUnavailable("no X")
+
+    monkeypatch.setitem(slide_backends.BACKENDS, "xtest", Unavailable)
+    monkeypatch.setattr(slide_backends, "_AUTO_ORDER", ("xtest", "pyautogui"))
+    assert isinstance(slide_backends.create_backend("auto"), slide_backends.PyAutoGUIBackend)
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="xtest is Linux only")
+def test_xtest_backend_enables_xlib_thread_locks(monkeypatch):
+    pytest.importorskip("Xlib.ext.xtest")
+    import _thread
+
+    xlib_lock = importlib.import_module("Xlib.support.lock")
+    xdisplay = importlib.import_module("Xlib.display")
+    monkeypatch.delitem(sys.modules, "Xlib.threaded", raising=False)
+    monkeypatch.setattr(xlib_lock, "allocate_lock", lambda: xlib_lock._dummy_lock)
+    seen = []
+
+    class FakeDisplay:
+        def __init__(self, name=None):
+            # Display 创建时已切换为真正的线程锁
+            seen.append(xlib_lock.allocate_lock)
+
+        def has_extension(self, name):
+            return True
+
+    monkeypatch.setattr(xdisplay, "Display", FakeDisplay)
+    slide_backends.XTestBackend()
+    assert seen == [_thread.allocate_lock]
+
+
+@pytest.mark.skipif(not sys.platform.startswith("linux"), reason="xtest is Linux only")
+def test_xtest_backend_sends_relative_motion_and_buttons(monkeypatch):
+    X = pytest.importorskip("Xlib.X")
+
+    backend = slide_backends.XTestBackend.__new__(slide_backends.XTestBackend)
+    sent = []
+
+    class FakeDisplay:
+        flushed = 0
+
+        def flush(self):
+            FakeDisplay.flushed += 1
+
+        def keysym_to_keycode(self, keysym):
+            return 114
+
+    backend._display = FakeDisplay()
+    backend._X = X
+    backend._XK = importlib.import_module("Xlib.XK")
+    backend._keycodes = {}
+    backend._fake_input = lambda d, ev, detail=0, x=0, y=0: sent.append((ev, detail, x, y))
+
+    backend.move(5, -3)
+    backend.scroll(-2)
+    backend.press("right")
+
+    assert sent == [
+        (X.MotionNotify, True, 5, -3),
+        (X.ButtonPress, 5, 0, 0), (X.ButtonRelease, 5, 0, 0),
+        (X.ButtonPress, 5, 0, 0), (X.ButtonRelease, 5, 0, 0),
+        (X.KeyPress, 114, 0, 0), (X.KeyRelease, 114, 0, 0),
+    ]
+    assert FakeDisplay.flushed == 3
+
+
+def test_bench_reports_each_backend(monkeypatch):
+    class Unavailable(slide_backends.MockBackend):
+        def __init__(self):
+            raise slide_backends.BackendUnavailable("no X")
+
+    monkeypatch.setitem(slide_backends.BACKENDS, "xtest", Unavailable)
+    result = bench_backends.run(["mock", "xtest"], count=50, keys=True)
+
+    mock = result["backends"]["mock"]
+    assert mock["move"]["count"] == 50
+    assert mock["move"]["actions_per_sec"] > 0
+    assert mock["press"]["count"] == 50
+    assert result["backends"]["xtest"] == {"unavailable": "no X"}
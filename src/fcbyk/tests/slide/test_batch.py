@@ -0,0 +1,81 @@
+import importlib
+
+import pytest
+
+slide_batch = importlib.import_module("fcbyk.commands.slide.batch")
+parse_batch = slide_batch.parse_batch
+run_batch = slide_batch.run_batch
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.now += seconds
+
+
+def test_parse_batch_normalizes_steps():
+    steps = parse_batch(["home", {"action": "next", "delay_ms": 100}, {"action": "scroll", "dy": -3}])
+    assert steps == [
+        {"action": "home", "delay_ms": 0},
+        {"action": "next", "delay_ms": 100},
+        {"action": "scroll", "delay_ms": 0, "dx": 0, "dy": -3},
+    ]
+
+
+@pytest.mark.parametrize("steps, message", [
+    (None, "non-empty list"),
+    ([], "non-empty list"),
+    (["next"] * (slide_batch.BATCH_MAX_STEPS + 1), "too many steps"),
+    ([{"action": "jump"}], "unknown action"),
+    ([42], "must be an object"),
+    ([{"action": "next", "delay_ms": -1}], "delay_ms"),
+    ([{"action": "next", "delay_ms": slide_batch.BATCH_MAX_DELAY_MS + 1}], "delay_ms"),
+    ([{"action": "next", "delay_ms": "10"}], "must be a finite number"),
+    ([{"action": "move", "dx": True}], "dx must be a finite number"),
+    ([{"action": "next", "delay_ms": float("nan")}], "delay_ms must be a finite number"),
+    ([{"action": "move", "dy": float("inf")}], "dy must be a finite number"),
+    ([{"action": "next", "delay_ms": slide_batch.BATCH_MAX_DELAY_MS}] * 4, "total delay_ms"),
+])
+def test_parse_batch_rejects_invalid(steps, message):
+    with pytest.raises(ValueError, match=message):
+        parse_batch(steps)
+
+
+def test_run_batch_reports_timing_and_stops_on_error():
+    clock = FakeClock()
+    calls = []
+
+    def execute(step):
+        calls.append(step["action"])
+        clock.now += 0.002
+        if step["action"] == "end":
+            return False, "boom"
+        return True, None
+
+    steps = parse_batch(["home", {"action": "next", "delay_ms": 50}, "end", "prev"])
+    result = run_batch(steps, execute, sleep=clock.sleep, clock=clock)
+
+    assert calls == ["home", "next", "end"]
+    assert result["completed"] == 2
+    assert result["total"] == 4
+    assert [r["success"] for r in result["steps"]] == [True, True, False]
+    assert result["steps"][1]["at_ms"] == pytest.approx(52)
+    assert result["steps"][1]["elapsed_ms"] == pytest.approx(2)
+    assert result["steps"][2]["error"] == "boom"
+    assert result["elapsed_ms"] == pytest.approx(56)
+
+
+def test_run_batch_continue_on_error_and_exceptions():
+    def execute(step):
+        if step["action"] == "click":
+            raise RuntimeError("no display")
+        return False, None
+
+    result = run_batch(parse_batch(["click", "up"]), execute, stop_on_error=False, sleep=lambda s: None)
+    assert [r["error"] for r in result["steps"]] == ["no display", "up failed"]
+    assert result["completed"] == 0
@@ -0,0 +1,178 @@
+import importlib
+import threading
+
+import pytest
+
+Image = pytest.importorskip("PIL.Image")
+
+slide_capture = importlib.import_module("fcbyk.commands.slide.capture")
+SlideCapture = slide_capture.SlideCapture
+
+
+class FakeScreen:
+    def __init__(self, color="red", size=(960, 540)):
+        self.color = color
+        self.size = size
+        self.grabs = 0
+
+    def __call__(self):
+        self.grabs += 1
+        return Image.new("RGB", self.size, self.color)
+
+
+def _capture(screen, published, **kw):
+    capture = SlideCapture(published.append, grab=screen, **kw)
+    # 不启动后台线程，由测试直接调用 capture_once
+    capture._stopped = True
+    return capture
+
+
+def test_capture_unavailable_reason_when_pillow_installed():
+    assert slide_capture.capture_unavailable_reason() is None
+
+
+def test_capture_resizes_encodes_and_skips_unchanged():
+    screen = FakeScreen()
+    published = []
+    capture = _capture(screen, published, max_width=240)
+
+    frame = capture.capture_once()
+    # 尚未 home 时页码未知
+    assert frame["index"] is None
+    assert (frame["width"], frame["height"]) == (240, 135)
+    assert frame["image"][:2] == b"\xff\xd8"
+    assert published == [frame]
+
+    # 画面没有变化：不编码、不推送
+    assert capture.capture_once() is None
+    assert capture.stats()["skipped"] == 1
+    assert len(published) == 1
+
+    screen.color = "blue"
+    frame2 = capture.capture_once()
+    assert frame2["digest"] != frame["digest"]
+    assert capture.latest() is frame2
+
+
+def test_navigate_tracks_index_and_publishes_cached_frame():
+    screen = FakeScreen()
+    published = []
+    capture = _capture(screen, published)
+
+    # 启动时演示可能停在任意一页：home 之前的翻页不确定页码，也不缓存
+    capture.navigate("next")
+    assert capture.index is None
+    capture.capture_once()
+    assert capture.stats()["cached_slides"] == 0
+
+    capture.navigate("home")
+    assert capture.index == 0
+    screen.color = "green"
+    first = capture.capture_once()
+    capture.navigate("next")
+    screen.color = "blue"
+    second = capture.capture_once()
+    assert second["index"] == 1
+
+    # 回到已缓存的页面立即推送缓存，不等截图
+    capture.navigate("prev")
+    assert capture.index == 0
+    assert published[-1] is first
+    capture.navigate("prev")
+    assert capture.index == 0
+    assert len(published) == 4
+
+    capture.navigate("end")
+    assert capture.index is None
+    capture.navigate("next")
+    assert capture.index is None
+    capture.navigate("home")
+    assert capture.index == 0
+
+
+def test_cache_is_bounded():
+    screen = FakeScreen(size=(32, 18))
+    capture = _capture(screen, [], cache_slides=3)
+    capture.navigate("home")
+    for i in range(6):
+        screen.color = (i * 40, 0, 0)
+        capture.capture_once()
+        capture.navigate("next")
+    assert capture.stats()["cached_slides"] == 3
+
+
+def test_worker_coalesces_rapid_navigation():
+    screen = FakeScreen(size=(32, 18))
+    done = threading.Event()
+    published = []
+
+    def publish(frame):
+        published.append(frame)
+        done.set()
+
+    capture = SlideCapture(publish, grab=screen, settle_delay=0.05)
+    try:
+        capture.navigate("home")
+        for _ in range(5):
+            capture.navigate("next")
+        assert done.wait(2)
+        assert screen.grabs == 1
+        assert published[0]["index"] == 5
+    finally:
+        capture.stop()
+
+
+def test_worker_counts_grab_errors():
+    failed = threading.Event()
+
+    def broken():
+        failed.set()
+        raise OSError("no display")
+
+    capture = SlideCapture(lambda f: None, grab=broken, settle_delay=0.01)
+    try:
+        capture.navigate("next")
+        assert failed.wait(2)
+        for _ in range(200):
+            if capture.stats()["errors"]:
+                break
+            threading.Event().wait(0.01)
+        assert capture.stats()["errors"] == 1
+    finally:
+        capture.stop()
+
+
+def test_grab_and_encode_run_through_executor():
+    screen = FakeScreen(size=(32, 18))
+    ran = []
+
+    def run_blocking(fn):
+        ran.append(threading.current_thread().name)
+        return fn()
+
+    capture = _capture(screen, [], run_blocking=run_blocking)
+    assert capture.capture_once() is not None
+    # 截图 + 缩放一次，JPEG 编码一次
+    assert len(ran) == 2
+    # 画面未变化时只截图，不编码
+    assert capture.capture_once() is None
+    assert len(ran) == 3
+
+
+def test_blocking_executor_uses_native_thread_pools(monkeypatch):
+    import sys
+    import types
+
+    assert slide_capture.blocking_executor("threading")(lambda: 7) == 7
+
+    calls = []
+    tpool = types.SimpleNamespace(execute=lambda fn: calls.append("tpool") or fn())
+    monkeypatch.setitem(sys.modules, "eventlet", types.SimpleNamespace(tpool=tpool))
+    monkeypatch.setitem(sys.modules, "eventlet.tpool", tpool)
+    assert slide_capture.blocking_executor("eventlet")(lambda: 8) == 8
+
+    pool = types.SimpleNamespace(apply=lambda fn: calls.append("gevent") or fn())
+    hub = types.SimpleNamespace(threadpool=pool)
+    monkeypatch.setitem(sys.modules, "gevent", types.SimpleNamespace(get_hub=lambda: hub))
+    assert slide_capture.blocking_executor("gevent")(lambda: 9) == 9
+    assert calls == ["tpool", "gevent"]
@@ -1,4 +1,7 @@
 import importlib
+import os
+
+import pytest
 
 
 def test_slide_help():
@@ -40,7 +43,14 @@ def test_slide_cli_uses_localhost_when_no_network(monkeypatch):
             run_kwargs.update(kwargs)
 
     mock_socketio = MockSocketIO()
-    monkeypatch.setattr(slide_cli, "create_slide_app", lambda service: (object(), mock_socketio))
+    created = {}
+
+    def _create(service, **kw):
+        created.update(kw)
+        return object(), mock_socketio
+
+    monkeypatch.setattr(slide_cli, "create_slide_app", _create)
+    monkeypatch.setattr(slide_cli, "resolve_async_mode", lambda mode: "threading")
 
     # 避免输出 URL 列表逻辑
     monkeypatch.setattr(slide_cli, "echo_network_urls", lambda *a, **k: None)
@@ -53,6 +63,13 @@ def test_slide_cli_uses_localhost_when_no_network(monkeypatch):
     assert r.exit_code == 0
     assert run_kwargs["host"] == "0.0.0.0"
     assert run_kwargs["port"] == 1234
+    assert created == {
+        "async_mode": "threading",
+        "pointer_filter": "one-euro",
+        "pointer_accel": 1.0,
+        "capture": False,
+    }
+    assert run_kwargs["allow_unsafe_werkzeug"] is True
 
 
 def test_slide_daemon_passes_password_to_svc(monkeypatch):
@@ -72,7 +89,7 @@ def test_slide_daemon_passes_password_to_svc(monkeypatch):
         def run(self, *a, **k):
             pass
 
-    monkeypatch.setattr(slide_cli, "create_slide_app", lambda service: (object(), _DummySocketIO()))
+    monkeypatch.setattr(slide_cli, "create_slide_app", lambda service, **kw: (object(), _DummySocketIO()))
 
     called = {}
 
@@ -94,3 +111,96 @@ def test_slide_daemon_passes_password_to_svc(monkeypatch):
     assert "--port" in called["args"]
     assert "1234" in called["args"]
     assert "--daemon-password" in called["args"]
+    # 默认 auto 后端不需要传给后台进程
+    assert "--backend" not in called["args"]
+
+
+def test_slide_cli_reports_missing_async_mode(monkeypatch):
+    slide_cli = importlib.import_module("fcbyk.commands.slide.cli")
+
+    monkeypatch.setattr(slide_cli, "check_port", lambda *a, **k: True)
+
+    def _missing(mode):
+        raise RuntimeError("async mode 'eventlet' requires: pip install eventlet")
+
+    monkeypatch.setattr(slide_cli, "resolve_async_mode", _missing)
+    created = []
+    monkeypatch.setattr(slide_cli, "create_slide_app", lambda *a, **k: created.append(1))
+
+    from click.testing import CliRunner
+
+    r = CliRunner().invoke(slide_cli.slide, ["--daemon-password", "p", "--async-mode", "eventlet"])
+    assert r.exit_code == 0
+    assert "pip install eventlet" in r.output
+    assert created == []
+
+
+def test_slide_cli_relaunches_to_patch_at_process_entry(monkeypatch):
+    slide_cli = importlib.import_module("fcbyk.commands.slide.cli")
+
+    # CLI 会直接写 os.environ：先 setenv 让 monkeypatch 记下原值，测试结束后恢复
+    monkeypatch.setenv(slide_cli.asyncmode.ASYNC_MODE_ENV, "")
+    monkeypatch.delenv(slide_cli.asyncmode.ASYNC_MODE_ENV)
+    monkeypatch.setattr(slide_cli, "resolve_async_mode", lambda mode: mode)
+    monkeypatch.setattr(slide_cli.asyncmode, "patched_mode", lambda: None)
+    relaunched = []
+    monkeypatch.setattr(slide_cli.asyncmode, "relaunch", lambda mode: relaunched.append(mode) or 3)
+    created = []
+    monkeypatch.setattr(slide_cli, "create_slide_app", lambda *a, **k: created.append(1))
+
+    from click.testing import CliRunner
+
+    r = CliRunner().invoke(slide_cli.slide, ["--daemon-password", "p", "--async-mode", "eventlet"])
+    assert r.exit_code == 3
+    assert relaunched == ["eventlet"]
+    assert created == []
+
+    # 重新启动后补丁仍未生效时报错，不再循环启动
+    monkeypatch.setenv(slide_cli.asyncmode.ASYNC_MODE_ENV, "eventlet")
+    r = CliRunner().invoke(slide_cli.slide, ["--daemon-password", "p", "--async-mode", "eventlet"])
+    assert r.exit_code == 0
+    assert "failed to enable async mode 'eventlet'" in r.output
+    assert relaunched == ["eventlet"]
+
+
+def test_slide_daemon_async_mode_is_inherited_by_service(monkeypatch):
+    slide_cli = importlib.import_module("fcbyk.commands.slide.cli")
+
+    # CLI 会直接写 os.environ：先 setenv 让 monkeypatch 记下原值，测试结束后恢复
+    monkeypatch.setenv(slide_cli.asyncmode.ASYNC_MODE_ENV, "")
+    monkeypatch.delenv(slide_cli.asyncmode.ASYNC_MODE_ENV)
+    monkeypatch.setattr(slide_cli, "resolve_async_mode", lambda mode: mode)
+    monkeypatch.setattr(slide_cli.asyncmode, "relaunch", lambda mode: pytest.fail("daemon must not relaunch"))
+    monkeypatch.setattr(slide_cli, "check_port", lambda *a, **k: True)
+    monkeypatch.setattr(slide_cli, "get_private_networks", lambda: [{"ips": ["127.0.0.1"]}])
+    monkeypatch.setattr(slide_cli, "copy_to_clipboard", lambda *_: None)
+    monkeypatch.setattr(slide_cli, "echo_network_urls", lambda *a, **k: None)
+    monkeypatch.setattr(slide_cli, "create_slide_app", lambda service, **kw: (object(), object()))
+    started = {}
+    monkeypatch.setattr(slide_cli.svc_core, "start_service", lambda name, args: started.update(args=args))
+
+    from click.testing import CliRunner
+
+    r = CliRunner().invoke(slide_cli.slide, ["--daemon-password", "p", "-D", "-nb", "--async-mode", "gevent"])
+    assert r.exit_code == 0, r.output
+    assert os.environ[slide_cli.asyncmode.ASYNC_MODE_ENV] == "gevent"
+    i = started["args"].index("--async-mode")
+    assert started["args"][i + 1] == "gevent"
+
+
+def test_slide_cli_reports_missing_capture_dependency(monkeypatch):
+    slide_cli = importlib.import_module("fcbyk.commands.slide.cli")
+
+    monkeypatch.setattr(slide_cli, "check_port", lambda *a, **k: True)
+    monkeypatch.setattr(
+        slide_cli, "capture_unavailable_reason", lambda: "slide capture requires Pillow: pip install Pillow"
+    )
+    created = []
+    monkeypatch.setattr(slide_cli, "create_slide_app", lambda *a, **k: created.append(1))
+
+    from click.testing import CliRunner
+
+    r = CliRunner().invoke(slide_cli.slide, ["--daemon-password", "p", "--capture"])
+    assert r.exit_code == 0
+    assert "pip install Pillow" in r.output
+    assert created == []
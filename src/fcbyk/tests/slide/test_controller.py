@@ -175,7 +175,9 @@ def test_qr_info_only_available_for_local_and_auto_login(app_and_client, monkeyp
     r = client.get("/internal/qr/info", environ_base={"REMOTE_ADDR": "192.168.0.2"})
     assert r.status_code == 404
 
-    monkeypatch.setattr(slide_controller, "_get_wifi_name", lambda: "TestWiFi")
+    # Wi-Fi 名称走缓存：替换 provider 并同步刷新一次
+    _app.network_info = slide_controller.NetworkInfo(wifi_fn=lambda: "TestWiFi", ips_fn=lambda: [])
+    _app.network_info.refresh()
 
     r = client.get("/internal/qr/info", environ_base={"REMOTE_ADDR": "127.0.0.1"})
     assert r.status_code == 200
@@ -214,3 +216,315 @@ def test_qr_info_only_available_for_local_and_auto_login(app_and_client, monkeyp
     r = client.get("/api/check_auth")
     assert r.status_code == 200
     assert r.json["data"]["authenticated"] is True
+
+
+
+
+def test_socket_mouse_move_goes_through_pump(monkeypatch):
+    from flask import Flask
+
+    monkeypatch.setattr(slide_controller, "create_spa", lambda *_: Flask(__name__))
+    monkeypatch.setattr(slide_controller, "session", {"authenticated": True})
+    service = SlideService(password="p")
+    calls = []
+    monkeypatch.setattr(service, "move_mouse", lambda dx, dy: calls.append(("move", dx, dy)) or (True, None))
+    monkeypatch.setattr(service, "click_mouse", lambda: calls.append(("click",)) or (True, None))
+    # 关闭平滑与加速，直接检查位移的合并与顺序
+    app, socketio = slide_controller.create_slide_app(service, pointer_filter="none", pointer_accel=0)
+    app.input_pump._stopped = True  # 不启动后台线程，由 click 前的 flush 注入
+
+    handlers = socketio.server.handlers["/"]
+    handlers["mouse_move"].__wrapped__({"dx": 2, "dy": 3})
+    handlers["mouse_move"].__wrapped__({"dx": 2, "dy": 3})
+    assert calls == []
+    assert app.input_pump.stats()["received"] == 2
+
+    handlers["mouse_click"].__wrapped__()
+    assert calls == [("move", 4, 6), ("click",)]
+
+
+def test_resolve_async_mode(monkeypatch):
+    installed = set()
+    monkeypatch.setattr(
+        slide_controller.importlib.util, "find_spec", lambda name: object() if name in installed else None
+    )
+
+    # 默认 threading，不会因为装了 eventlet / gevent 就自动切换
+    assert slide_controller.resolve_async_mode() == "threading"
+    assert slide_controller.resolve_async_mode("threading") == "threading"
+    with pytest.raises(RuntimeError) as e:
+        slide_controller.resolve_async_mode("gevent")
+    assert "gevent-websocket" in str(e.value)
+
+    # gevent 缺少 gevent-websocket 时不可用
+    installed.add("gevent")
+    with pytest.raises(RuntimeError):
+        slide_controller.resolve_async_mode("gevent")
+    installed.update(("geventwebsocket", "eventlet"))
+    assert slide_controller.resolve_async_mode() == "threading"
+    assert slide_controller.resolve_async_mode("gevent") == "gevent"
+    assert slide_controller.resolve_async_mode("eventlet") == "eventlet"
+
+
+def test_socket_binary_move_frames(monkeypatch):
+    from flask import Flask
+
+    slide_protocol = importlib.import_module("fcbyk.commands.slide.protocol")
+    monkeypatch.setattr(slide_controller, "create_spa", lambda *_: Flask(__name__))
+    monkeypatch.setattr(slide_controller, "session", {"authenticated": True})
+    monkeypatch.setattr(slide_controller, "request", type("Req", (), {"sid": "s1"})())
+    service = SlideService(password="p")
+    calls = []
+    monkeypatch.setattr(service, "move_mouse", lambda dx, dy: calls.append((dx, dy)) or (True, None))
+    # 关闭平滑与加速，直接检查位移的合并与顺序
+    app, socketio = slide_controller.create_slide_app(service, pointer_filter="none", pointer_accel=0)
+    app.input_pump._stopped = True
+
+    handle = socketio.server.handlers["/"]["mouse_move_bin"].__wrapped__
+    handle(slide_protocol.encode_move_frame(1, [(1, 2), (3, 4)]))
+    # 重复 / 乱序的旧帧被丢弃，格式错误的帧被忽略
+    handle(slide_protocol.encode_move_frame(1, [(100, 100)]))
+    handle(slide_protocol.encode_move_frame(0, [(100, 100)]))
+    handle(b"garbage")
+    handle(slide_protocol.encode_move_frame(2, [(-1, -1)]))
+    app.input_pump.flush()
+    assert calls == [(3, 5)]
+
+    # 断开后序号状态清除
+    socketio.server.handlers["/"]["disconnect"].__wrapped__()
+    handle(slide_protocol.encode_move_frame(0, [(1, 0)]))
+    app.input_pump.flush()
+    assert calls == [(3, 5), (1, 0)]
+
+
+def test_internal_metrics_local_only_and_records_events(app_and_client, monkeypatch):
+    app, client, service = app_and_client
+    monkeypatch.setattr(service, "next_slide", lambda: (True, None))
+
+    client.post("/api/login", json={"password": "p"}, environ_base={"REMOTE_ADDR": "192.168.0.2"})
+    client.post("/api/next", environ_base={"REMOTE_ADDR": "192.168.0.2"})
+
+    r = client.get("/internal/metrics", environ_base={"REMOTE_ADDR": "192.168.0.2"})
+    assert r.status_code == 404
+    r = client.post("/internal/metrics/reset", environ_base={"REMOTE_ADDR": "192.168.0.2"})
+    assert r.status_code == 404
+
+    r = client.get("/internal/metrics", environ_base={"REMOTE_ADDR": "127.0.0.1"})
+    assert r.status_code == 200
+    data = r.json["data"]
+    assert data["unit"] == "ms"
+    assert data["events"]["http:next_slide"]["count"] == 1
+    assert data["events"]["http:login"]["count"] == 1
+    # /internal 本身不计入
+    assert not any("metrics" in name for name in data["events"])
+    assert data["pump"]["received"] == 0
+
+    r = client.post("/internal/metrics/reset", environ_base={"REMOTE_ADDR": "127.0.0.1"})
+    assert r.status_code == 200
+    assert app.slide_metrics.snapshot()["events"]["http:next_slide"]["count"] == 0
+
+
+def test_socket_ping_records_rtt(monkeypatch):
+    from flask import Flask
+
+    monkeypatch.setattr(slide_controller, "create_spa", lambda *_: Flask(__name__))
+    monkeypatch.setattr(slide_controller, "session", {"authenticated": True})
+    app, socketio = slide_controller.create_slide_app(SlideService(password="p"))
+
+    ping = socketio.server.handlers["/"]["ping_server"].__wrapped__
+    assert ping() == "pong"
+    assert ping({"rtt": 0}) == "pong"          # 首次测量前为 0，不记录
+    assert ping({"rtt": 42}) == "pong"
+    assert ping({"rtt": "bad"}) == "pong"
+
+    snap = app.slide_metrics.snapshot()
+    assert snap["rtt"]["count"] == 1
+    assert 41 <= snap["rtt"]["p99"] <= 42
+    assert snap["events"]["socket:ping_server"]["count"] == 4
+
+
+def test_socket_moves_use_per_connection_pointer_pipeline(monkeypatch):
+    from flask import Flask
+
+    monkeypatch.setattr(slide_controller, "create_spa", lambda *_: Flask(__name__))
+    monkeypatch.setattr(slide_controller, "session", {"authenticated": True})
+    req = type("Req", (), {"sid": "a"})()
+    monkeypatch.setattr(slide_controller, "request", req)
+    service = SlideService(password="p")
+    calls = []
+    monkeypatch.setattr(service, "move_mouse", lambda dx, dy: calls.append((dx, dy)) or (True, None))
+
+    with pytest.raises(ValueError):
+        slide_controller.create_slide_app(service, pointer_filter="bogus")
+
+    app, socketio = slide_controller.create_slide_app(service, pointer_filter="none", pointer_accel=1.0)
+    app.input_pump._stopped = True
+    handle = socketio.server.handlers["/"]["mouse_move"].__wrapped__
+
+    # 快速滑动被加速
+    handle({"dx": 200, "dy": 0})
+    app.input_pump.flush()
+    assert calls and calls[-1][0] > 200
+
+    # 每个连接各自保存状态，断开后清除
+    req.sid = "b"
+    handle({"dx": 1, "dy": 0})
+    socketio.server.handlers["/"]["disconnect"].__wrapped__()
+    app.input_pump.flush()
+    assert calls[-1] == (1, 0)
+
+
+def test_mouse_up_flushes_pointer_residual(monkeypatch):
+    from flask import Flask
+
+    monkeypatch.setattr(slide_controller, "create_spa", lambda *_: Flask(__name__))
+    monkeypatch.setattr(slide_controller, "session", {"authenticated": True})
+    monkeypatch.setattr(slide_controller, "request", type("Req", (), {"sid": "a"})())
+    service = SlideService(password="p")
+    calls = []
+    monkeypatch.setattr(service, "move_mouse", lambda dx, dy: calls.append((dx, dy)) or (True, None))
+    monkeypatch.setattr(service, "mouse_up", lambda: (True, None))
+
+    app, socketio = slide_controller.create_slide_app(service, pointer_filter="ema", pointer_accel=0)
+    app.input_pump._stopped = True
+    handlers = socketio.server.handlers["/"]
+    for dx in (10, 40, 2, 30):
+        handlers["mouse_move"].__wrapped__({"dx": dx, "dy": 0})
+    app.input_pump.flush()
+    assert sum(x for x, _ in calls) < 82
+
+    # 松开前补发滤波滞留的位移，拖拽终点与手指位移一致
+    handlers["mouse_up"].__wrapped__()
+    assert abs(sum(x for x, _ in calls) - 82) <= 1
+
+
+def test_slide_frame_endpoint_and_navigation_capture(monkeypatch):
+    Image = pytest.importorskip("PIL.Image")
+    from flask import Flask
+    from fcbyk.commands.slide.capture import SlideCapture
+
+    monkeypatch.setattr(slide_controller, "create_spa", lambda *_: Flask(__name__))
+    service = SlideService(password="p")
+    monkeypatch.setattr(service, "next_slide", lambda: (True, None))
+    monkeypatch.setattr(service, "prev_slide", lambda: (False, "boom"))
+    app, _socketio = slide_controller.create_slide_app(service, capture=True)
+    assert app.slide_capture is not None
+
+    published = []
+    capture = SlideCapture(published.append, grab=lambda: Image.new("RGB", (64, 48), "red"))
+    capture._stopped = True
+    capture.navigate("home")
+    app.slide_capture = capture
+
+    with app.test_client() as client:
+        assert client.get("/api/slide/frame").status_code == 401
+        client.post("/api/login", json={"password": "p"})
+        assert client.get("/api/slide/frame").status_code == 404
+
+        # 翻页成功才记录，失败不改变页码
+        client.post("/api/next")
+        client.post("/api/prev")
+        assert capture.index == 1
+
+        frame = capture.capture_once()
+        r = client.get("/api/slide/frame")
+        assert r.status_code == 200
+        assert r.mimetype == "image/jpeg"
+        assert r.data == frame["image"]
+        assert r.headers["X-Slide-Index"] == "1"
+
+        r = client.get("/api/slide/frame", headers={"If-None-Match": r.headers["ETag"]})
+        assert r.status_code == 304
+
+    # 新连接的控制端会收到当前画面
+    emitted = []
+    monkeypatch.setattr(slide_controller, "session", {"authenticated": True})
+    monkeypatch.setattr(slide_controller, "emit", lambda *a: emitted.append(a))
+    with app.app_context():
+        _socketio.server.handlers["/"]["connect"].__wrapped__()
+    assert emitted == [("slide_frame", frame)]
+
+
+def test_batch_endpoint_runs_steps_in_order(app_and_client, monkeypatch):
+    app, client, service = app_and_client
+    calls = []
+    for name in ("home_slide", "next_slide", "click_mouse"):
+        monkeypatch.setattr(service, name, lambda name=name: calls.append(name) or (True, None))
+    monkeypatch.setattr(service, "scroll_mouse", lambda dx, dy: calls.append(("scroll", dx, dy)) or (True, None))
+    monkeypatch.setattr(service, "end_slide", lambda: (False, "boom"))
+
+    body = {"steps": ["home", {"action": "next", "delay_ms": 1}, "next", {"action": "scroll", "dy": -2}]}
+    assert client.post("/api/batch", json=body).status_code == 401
+
+    client.post("/api/login", json={"password": "p"})
+    r = client.post("/api/batch", json=body)
+    assert r.status_code == 200
+    assert calls == ["home_slide", "next_slide", "next_slide", ("scroll", 0, -2)]
+    data = r.json["data"]
+    assert data["completed"] == 4
+    assert [s["action"] for s in data["steps"]] == ["home", "next", "next", "scroll"]
+    assert data["steps"][1]["at_ms"] >= 1
+    assert app.slide_metrics.snapshot()["events"]["batch:next"]["count"] == 2
+
+    # 校验失败时整批不执行
+    calls.clear()
+    r = client.post("/api/batch", json={"steps": ["next", "jump"]})
+    assert r.status_code == 400
+    assert "unknown action" in r.json["message"]
+    assert calls == []
+
+    # JSON 中的 NaN 同样在执行前被拒绝（而不是 sleep 时抛出异常）
+    r = client.post(
+        "/api/batch", data='{"steps": [{"action": "next", "delay_ms": NaN}]}', content_type="application/json"
+    )
+    assert r.status_code == 400
+    assert "finite number" in r.json["message"]
+    assert calls == []
+
+    # 某一步失败：返回 500，并附带已执行步骤的结果
+    r = client.post("/api/batch", json={"steps": ["click", "end", "click"]})
+    assert r.status_code == 500
+    assert r.json["message"] == "step 1 (end) failed: boom"
+    assert r.json["data"]["completed"] == 1
+    assert calls == ["click_mouse"]
+
+    calls.clear()
+    r = client.post("/api/batch", json={"steps": ["click", "end", "click"], "stop_on_error": False})
+    assert r.status_code == 500
+    assert r.json["data"]["completed"] == 2
+    assert calls == ["click_mouse", "click_mouse"]
+
+
+def test_batch_endpoint_rejects_concurrent_batch(app_and_client, monkeypatch):
+    import threading
+
+    app, _client, service = app_and_client
+    started = threading.Event()
+    release = threading.Event()
+
+    def slow_next():
+        started.set()
+        release.wait(2)
+        return True, None
+
+    monkeypatch.setattr(service, "next_slide", slow_next)
+    monkeypatch.setattr(service, "prev_slide", lambda: (True, None))
+    first, second = app.test_client(), app.test_client()
+    for c in (first, second):
+        c.post("/api/login", json={"password": "p"})
+
+    results = []
+    worker = threading.Thread(target=lambda: results.append(first.post("/api/batch", json={"steps": ["next"]})))
+    worker.start()
+    try:
+        assert started.wait(2)
+        # 已有批量在执行：立即返回 409，不排队等待
+        r = second.post("/api/batch", json={"steps": ["prev"]})
+        assert r.status_code == 409
+        # 单个动作接口不受批量锁限制
+        assert second.post("/api/prev").status_code == 200
+    finally:
+        release.set()
+        worker.join(2)
+    assert results[0].status_code == 200
+    assert second.post("/api/batch", json={"steps": ["prev"]}).status_code == 200
@@ -0,0 +1,112 @@
+import importlib
+
+import pytest
+
+slide_gesture = importlib.import_module("fcbyk.commands.slide.gesture")
+PointerPipeline = slide_gesture.PointerPipeline
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 10.0
+
+    def __call__(self):
+        return self.now
+
+
+def _feed(pipeline, clock, deltas, dt=1.0 / 60):
+    out = []
+    for dx, dy in deltas:
+        out.append(pipeline.process(dx, dy))
+        clock.now += dt
+    return out
+
+
+def test_unknown_filter_rejected():
+    with pytest.raises(ValueError):
+        PointerPipeline(filter="kalman")
+
+
+def test_passthrough_without_accel_is_identity():
+    clock = FakeClock()
+    p = PointerPipeline(filter="none", accel=0, clock=clock)
+    out = _feed(p, clock, [(3, -4), (0.5, 0.25), (100, 0)])
+    for (x, y), (dx, dy) in zip(out, [(3, -4), (0.5, 0.25), (100, 0)]):
+        assert x == pytest.approx(dx)
+        assert y == pytest.approx(dy)
+
+
+def test_acceleration_gain_curve():
+    gain = slide_gesture.acceleration_gain
+    assert gain(0, 1.0) == 1.0
+    assert gain(slide_gesture.ACCEL_LOW, 1.0) == 1.0
+    mid = (slide_gesture.ACCEL_LOW + slide_gesture.ACCEL_HIGH) / 2
+    assert gain(mid, 1.0) == pytest.approx(1.5)
+    assert gain(10 ** 6, 1.0) == pytest.approx(2.0)
+    assert gain(10 ** 6, 0) == 1.0
+
+
+def test_slow_motion_is_precise_fast_motion_is_accelerated():
+    clock = FakeClock()
+    p = PointerPipeline(filter="none", accel=1.0, clock=clock)
+    # 1px / 帧 = 60px/s，低于阈值，1:1
+    slow = _feed(p, clock, [(1, 0)] * 10)
+    assert sum(x for x, _ in slow) == pytest.approx(10)
+
+    clock.now += 1  # 新的一次滑动
+    # 50px / 帧 = 3000px/s，增益达到上限
+    fast = _feed(p, clock, [(50, 0)] * 10)
+    assert sum(x for x, _ in fast) == pytest.approx(1000)
+
+
+@pytest.mark.parametrize("name", ["one-euro", "ema"])
+def test_filters_reduce_jitter(name):
+    clock = FakeClock()
+    p = PointerPipeline(filter=name, accel=0, clock=clock)
+    raw = [(4, 0), (-2, 0)] * 20  # 抖动：平均每帧 1px
+    out = _feed(p, clock, raw)
+
+    def spread(values):
+        return max(values) - min(values)
+
+    steady = [x for x, _ in out[10:]]
+    assert spread(steady) < spread([dx for dx, _ in raw]) / 2
+    # 平滑不改变方向与大致速度
+    assert sum(steady) / len(steady) == pytest.approx(1.0, abs=0.5)
+
+
+def test_idle_gap_resets_filter():
+    clock = FakeClock()
+    p = PointerPipeline(filter="ema", accel=0, clock=clock)
+    _feed(p, clock, [(20, 0)] * 5)
+    clock.now += slide_gesture.POINTER_IDLE_RESET + 0.1
+    # 新滑动的第一个事件不受上一段残留速度影响
+    x, _ = p.process(1, 0)
+    assert x == pytest.approx(1)
+
+
+@pytest.mark.parametrize("name", ["one-euro", "ema"])
+def test_flush_returns_filter_residual(name):
+    clock = FakeClock()
+    p = PointerPipeline(filter=name, accel=0, clock=clock)
+    raw = [(12, -3), (30, 8), (5, 0.5), (-7, 2), (18, -11)] * 4
+    out = _feed(p, clock, raw)
+    # 滑动刚结束时滤波输出仍滞后于实际位移
+    assert sum(x for x, _ in out) != pytest.approx(sum(dx for dx, _ in raw))
+
+    assert p.flush_if_idle() is None
+    clock.now += slide_gesture.POINTER_IDLE_RESET + 0.1
+    rest = p.flush_if_idle()
+    assert sum(x for x, _ in out) + rest[0] == pytest.approx(sum(dx for dx, _ in raw))
+    assert sum(y for _, y in out) + rest[1] == pytest.approx(sum(dy for _, dy in raw))
+    assert p.flush() == (0.0, 0.0)
+
+
+def test_unflushed_residual_carried_into_next_stroke():
+    clock = FakeClock()
+    p = PointerPipeline(filter="one-euro", accel=0, clock=clock)
+    raw = [(10, 0), (40, 0), (2, 0)]
+    out = _feed(p, clock, raw)
+    clock.now += slide_gesture.POINTER_IDLE_RESET + 0.1
+    out.append(p.process(1, 0))
+    assert sum(x for x, _ in out) + p.flush()[0] == pytest.approx(53)
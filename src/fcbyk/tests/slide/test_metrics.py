@@ -0,0 +1,46 @@
+import importlib
+
+import pytest
+
+slide_metrics = importlib.import_module("fcbyk.commands.slide.metrics")
+
+
+def test_timed_records_even_on_error():
+    m = slide_metrics.SlideMetrics()
+
+    @m.timed("ok")
+    def ok():
+        return 1
+
+    @m.timed("boom")
+    def boom():
+        raise RuntimeError("x")
+
+    assert ok() == 1
+    assert ok.__name__ == "ok"
+    with pytest.raises(RuntimeError):
+        boom()
+
+    snap = m.snapshot()
+    assert snap["events"]["ok"]["count"] == 1
+    assert snap["events"]["boom"]["count"] == 1
+
+
+def test_record_converts_seconds_to_ms():
+    m = slide_metrics.SlideMetrics()
+    m.record("next", 0.010)
+    p50 = m.snapshot()["events"]["next"]["p50"]
+    assert 9.5 <= p50 <= 10.0
+
+
+def test_record_rtt_ignores_invalid_and_reset():
+    m = slide_metrics.SlideMetrics()
+    for v in (None, "x", -1, 0, 25):
+        m.record_rtt(v)
+    assert m.snapshot()["rtt"]["count"] == 1
+
+    m.record("next", 0.001)
+    m.reset()
+    snap = m.snapshot()
+    assert snap["rtt"]["count"] == 0
+    assert snap["events"]["next"]["count"] == 0
@@ -0,0 +1,80 @@
+import importlib
+import threading
+
+slide_netinfo = importlib.import_module("fcbyk.commands.slide.netinfo")
+NetworkInfo = slide_netinfo.NetworkInfo
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def _wait_idle(info):
+    for _ in range(200):
+        with info._lock:
+            if not info._refreshing:
+                return
+        threading.Event().wait(0.01)
+    raise AssertionError("refresh did not finish")
+
+
+def test_wifi_name_never_blocks_and_is_cached():
+    clock = FakeClock()
+    release = threading.Event()
+    calls = []
+
+    def slow_wifi():
+        calls.append(1)
+        release.wait(2)
+        return "Venue"
+
+    info = NetworkInfo(wifi_fn=slow_wifi, ips_fn=lambda: ["10.0.0.2"], ttl=30, clock=clock)
+    # 首次调用立即返回空值，后台刷新中
+    assert info.wifi_name() == ""
+    # 刷新进行中不会重复启动
+    assert info.wifi_name() == ""
+    release.set()
+    _wait_idle(info)
+    assert len(calls) == 1
+    assert info.wifi_name() == "Venue"
+
+    # ttl 内不再刷新
+    clock.now += 10
+    info.wifi_name()
+    _wait_idle(info)
+    assert len(calls) == 1
+
+    # 过期后后台刷新，期间返回旧值
+    clock.now += 30
+    assert info.wifi_name() == "Venue"
+    _wait_idle(info)
+    assert len(calls) == 2
+
+
+def test_failed_refresh_keeps_previous_values():
+    results = ["Venue"]
+
+    def wifi():
+        value = results.pop(0)
+        if isinstance(value, Exception):
+            raise value
+        return value
+
+    info = NetworkInfo(wifi_fn=wifi, ips_fn=lambda: ["10.0.0.2"])
+    info.refresh()
+    results.append(RuntimeError("nmcli missing"))
+    info.refresh()
+    assert info.wifi_name() == "Venue"
+    assert info.refreshes == 2
+
+
+def test_local_ips_loads_synchronously_first_time():
+    info = NetworkInfo(wifi_fn=lambda: "", ips_fn=lambda: ["192.168.1.5"])
+    assert info.local_ips() == ["192.168.1.5"]
+
+    broken = NetworkInfo(wifi_fn=lambda: "", ips_fn=lambda: 1 / 0)
+    assert broken.local_ips() == []
@@ -0,0 +1,49 @@
+import importlib
+import struct
+
+import pytest
+
+slide_protocol = importlib.import_module("fcbyk.commands.slide.protocol")
+
+
+def test_encode_decode_roundtrip():
+    frame = slide_protocol.encode_move_frame(7, [(3, -4), (10, 2), (-32767, 32767)])
+    assert len(frame) == slide_protocol.FRAME_HEADER.size + 3 * 4
+    assert slide_protocol.decode_move_frame(frame) == (7, 3 + 10 - 32767, -4 + 2 + 32767, 3)
+    assert slide_protocol.decode_move_frame(bytearray(frame))[0] == 7
+
+
+def test_frame_layout_is_little_endian():
+    frame = slide_protocol.encode_move_frame(0x0102, [(1, -1)])
+    assert frame == bytes([1, 1, 0x02, 0x01, 1, 0]) + struct.pack("<hh", 1, -1)
+
+
+def test_empty_frame():
+    frame = slide_protocol.encode_move_frame(1, [])
+    assert slide_protocol.decode_move_frame(frame) == (1, 0, 0, 0)
+
+
+@pytest.mark.parametrize(
+    "data",
+    [
+        b"",
+        b"\x01\x01\x00",
+        {"dx": 1},
+        bytes([2, 1, 0, 0, 0, 0]),                          # 版本不支持
+        bytes([1, 9, 0, 0, 0, 0]),                          # 类型不支持
+        bytes([1, 1, 0, 0, 2, 0]) + b"\x00" * 4,           # count 与长度不符
+        slide_protocol.FRAME_HEADER.pack(1, 1, 0, 1000) + b"\x00" * 4000,  # 超过上限
+    ],
+)
+def test_decode_rejects_bad_frames(data):
+    with pytest.raises(ValueError):
+        slide_protocol.decode_move_frame(data)
+
+
+def test_seq_is_newer_handles_wraparound():
+    assert slide_protocol.seq_is_newer(0, None)
+    assert slide_protocol.seq_is_newer(5, 4)
+    assert not slide_protocol.seq_is_newer(4, 4)
+    assert not slide_protocol.seq_is_newer(3, 4)
+    assert slide_protocol.seq_is_newer(1, 65535)
+    assert not slide_protocol.seq_is_newer(65535, 1)
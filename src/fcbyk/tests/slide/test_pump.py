@@ -0,0 +1,130 @@
+import importlib
+import threading
+import time
+
+import pytest
+
+slide_pump = importlib.import_module("fcbyk.commands.slide.pump")
+InputPump = slide_pump.InputPump
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def _pump(moves, **kwargs):
+    return InputPump(lambda dx, dy: moves.append((dx, dy)), **kwargs)
+
+
+def test_rate_must_be_positive():
+    with pytest.raises(ValueError):
+        InputPump(lambda dx, dy: None, rate_hz=0)
+
+
+def test_flush_coalesces_deltas_and_keeps_fraction():
+    moves = []
+    clock = FakeClock()
+    pump = _pump(moves, clock=clock)
+    pump._stopped = True  # 不启动后台线程，手动 flush
+
+    for _ in range(4):
+        pump.push(1.5, -0.75)
+    pump.flush()
+    assert moves == [(6, -3)]
+
+    # 小数余数保留到下一次
+    pump.push(0.5, 0.5)
+    pump.push(0.5, 0.0)
+    pump.flush()
+    assert moves == [(6, -3), (1, 0)]
+
+    s = pump.stats()
+    assert s["received"] == 6
+    assert s["injected"] == 6
+    assert s["dropped"] == 0
+    assert s["pending"] == 0
+
+
+def test_flush_without_pending_is_noop():
+    moves = []
+    pump = _pump(moves)
+    pump.flush()
+    assert moves == []
+    assert pump.stats()["p50_ms"] is None
+
+
+def test_stale_deltas_are_dropped():
+    moves = []
+    clock = FakeClock()
+    pump = _pump(moves, clock=clock, stale_after=0.25)
+    pump._stopped = True
+
+    pump.push(10, 10)
+    pump.push(10, 10)
+    clock.now += 0.5
+    pump.flush()
+    assert moves == []
+    assert pump.stats()["dropped"] == 2
+
+    # 之后的新事件正常注入
+    pump.push(3, 4)
+    pump.flush()
+    assert moves == [(3, 4)]
+
+
+def test_invalid_delta_ignored():
+    moves = []
+    pump = _pump(moves)
+    pump._stopped = True
+    pump.push("x", 1)
+    pump.flush()
+    assert moves == []
+    assert pump.stats()["received"] == 0
+
+
+def test_latency_is_measured():
+    clock = FakeClock()
+
+    def move(dx, dy):
+        clock.now += 0.004
+
+    pump = InputPump(move, clock=clock)
+    pump._stopped = True
+    pump.push(1, 1)
+    clock.now += 0.006
+    pump.flush()
+    assert pump.stats()["p50_ms"] == pytest.approx(10.0)
+    assert pump.latency.count == 1
+
+    # 延迟记录在固定大小的直方图中，百分位数误差不超过 1/16
+    for ms in range(1, 201):
+        pump.latency.record(ms * 1000)
+    stats = pump.stats()
+    assert 100.0 <= stats["p50_ms"] <= 100.0 * (1 + 1.0 / 16)
+    assert 198.0 <= stats["p99_ms"] <= 200.0
+
+
+def test_background_thread_injects_at_fixed_rate():
+    moves = []
+    done = threading.Event()
+
+    def move(dx, dy):
+        moves.append((dx, dy))
+        if sum(m[0] for m in moves) >= 50:
+            done.set()
+
+    pump = InputPump(move, rate_hz=50)
+    try:
+        for _ in range(50):
+            pump.push(1, 0)
+            time.sleep(0.001)
+        assert done.wait(2)
+        # 50 个事件被合并成少量注入
+        assert len(moves) < 50
+        assert sum(m[0] for m in moves) == 50
+    finally:
+        pump.stop()
@@ -1,21 +1,23 @@
 import importlib
+import os
 
 import pytest
 
 slide_service = importlib.import_module("fcbyk.commands.slide.service")
+slide_backends = importlib.import_module("fcbyk.commands.slide.backends")
 SlideService = slide_service.SlideService
 
 
 def test_display_env_is_set_on_import():
-    # service 模块在 import 时会确保 DISPLAY 存在
-    assert "DISPLAY" in slide_service.os.environ
+    # service 模块在 import 时（经由 backends）会确保 DISPLAY 存在
+    assert "DISPLAY" in os.environ
 
 
 def test_init_sets_failsafe_false(monkeypatch):
     # 确保 __init__ 会设置 pyautogui.FAILSAFE=False
-    monkeypatch.setattr(slide_service.pyautogui, "FAILSAFE", True)
+    monkeypatch.setattr(slide_backends.pyautogui, "FAILSAFE", True)
     SlideService(password="p")
-    assert slide_service.pyautogui.FAILSAFE is False
+    assert slide_backends.pyautogui.FAILSAFE is False
 
 
 def test_verify_password():
@@ -27,7 +29,7 @@ def test_verify_password():
 def test_next_prev_home_end_slide_success(monkeypatch):
     calls = []
 
-    monkeypatch.setattr(slide_service.pyautogui, "press", lambda key: calls.append(key))
+    monkeypatch.setattr(slide_backends.pyautogui, "press", lambda key: calls.append(key))
 
     s = SlideService(password="p")
 
@@ -43,7 +45,7 @@ def test_prev_slide_error(monkeypatch):
     def _boom(*a, **k):
         raise RuntimeError("bad")
 
-    monkeypatch.setattr(slide_service.pyautogui, "press", _boom)
+    monkeypatch.setattr(slide_backends.pyautogui, "press", _boom)
 
     s = SlideService(password="p")
     ok, err = s.prev_slide()
@@ -55,7 +57,7 @@ def test_home_slide_error(monkeypatch):
     def _boom(*a, **k):
         raise RuntimeError("bad")
 
-    monkeypatch.setattr(slide_service.pyautogui, "press", _boom)
+    monkeypatch.setattr(slide_backends.pyautogui, "press", _boom)
 
     s = SlideService(password="p")
     ok, err = s.home_slide()
@@ -67,7 +69,7 @@ def test_end_slide_error(monkeypatch):
     def _boom(*a, **k):
         raise RuntimeError("bad")
 
-    monkeypatch.setattr(slide_service.pyautogui, "press", _boom)
+    monkeypatch.setattr(slide_backends.pyautogui, "press", _boom)
 
     s = SlideService(password="p")
     ok, err = s.end_slide()
@@ -76,14 +78,14 @@ def test_end_slide_error(monkeypatch):
 
 
 def test_move_mouse_success(monkeypatch):
-    monkeypatch.setattr(slide_service.pyautogui, "position", lambda: (10, 20))
+    monkeypatch.setattr(slide_backends.pyautogui, "position", lambda: (10, 20))
 
     moved = {}
 
     def _move_to(x, y, duration=0):
         moved.update({"x": x, "y": y, "duration": duration})
 
-    monkeypatch.setattr(slide_service.pyautogui, "moveTo", _move_to)
+    monkeypatch.setattr(slide_backends.pyautogui, "moveTo", _move_to)
 
     s = SlideService(password="p")
     assert s.move_mouse(3, -5) == (True, None)
@@ -91,12 +93,12 @@ def test_move_mouse_success(monkeypatch):
 
 
 def test_move_mouse_error(monkeypatch):
-    monkeypatch.setattr(slide_service.pyautogui, "position", lambda: (0, 0))
+    monkeypatch.setattr(slide_backends.pyautogui, "position", lambda: (0, 0))
 
     def _boom(*a, **k):
         raise RuntimeError("move failed")
 
-    monkeypatch.setattr(slide_service.pyautogui, "moveTo", _boom)
+    monkeypatch.setattr(slide_backends.pyautogui, "moveTo", _boom)
 
     s = SlideService(password="p")
     ok, err = s.move_mouse(1, 1)
@@ -108,7 +110,7 @@ def test_click_mouse_error(monkeypatch):
     def _boom(*a, **k):
         raise RuntimeError("click failed")
 
-    monkeypatch.setattr(slide_service.pyautogui, "click", _boom)
+    monkeypatch.setattr(slide_backends.pyautogui, "click", _boom)
 
     s = SlideService(password="p")
     ok, err = s.click_mouse()
@@ -120,7 +122,7 @@ def test_right_click_mouse_error(monkeypatch):
     def _boom(*a, **k):
         raise RuntimeError("right failed")
 
-    monkeypatch.setattr(slide_service.pyautogui, "rightClick", _boom)
+    monkeypatch.setattr(slide_backends.pyautogui, "rightClick", _boom)
 
     s = SlideService(password="p")
     ok, err = s.right_click_mouse()
@@ -131,8 +133,8 @@ def test_right_click_mouse_error(monkeypatch):
 def test_click_mouse_right_click_mouse_success(monkeypatch):
     clicked = {"left": 0, "right": 0}
 
-    monkeypatch.setattr(slide_service.pyautogui, "click", lambda: clicked.__setitem__("left", clicked["left"] + 1))
-    monkeypatch.setattr(slide_service.pyautogui, "rightClick", lambda: clicked.__setitem__("right", clicked["right"] + 1))
+    monkeypatch.setattr(slide_backends.pyautogui, "click", lambda: clicked.__setitem__("left", clicked["left"] + 1))
+    monkeypatch.setattr(slide_backends.pyautogui, "rightClick", lambda: clicked.__setitem__("right", clicked["right"] + 1))
 
     s = SlideService(password="p")
     assert s.click_mouse() == (True, None)
@@ -143,8 +145,8 @@ def test_click_mouse_right_click_mouse_success(monkeypatch):
 def test_scroll_mouse_clamps_and_skips_zero(monkeypatch):
     scrolled = {"v": [], "h": []}
 
-    monkeypatch.setattr(slide_service.pyautogui, "scroll", lambda n: scrolled["v"].append(n))
-    monkeypatch.setattr(slide_service.pyautogui, "hscroll", lambda n: scrolled["h"].append(n))
+    monkeypatch.setattr(slide_backends.pyautogui, "scroll", lambda n: scrolled["v"].append(n))
+    monkeypatch.setattr(slide_backends.pyautogui, "hscroll", lambda n: scrolled["h"].append(n))
 
     s = SlideService(password="p")
 
@@ -163,8 +165,8 @@ def test_scroll_mouse_clamps_and_skips_zero(monkeypatch):
 def test_scroll_mouse_rounds_to_zero_skips(monkeypatch):
     scrolled = {"v": [], "h": []}
 
-    monkeypatch.setattr(slide_service.pyautogui, "scroll", lambda n: scrolled["v"].append(n))
-    monkeypatch.setattr(slide_service.pyautogui, "hscroll", lambda n: scrolled["h"].append(n))
+    monkeypatch.setattr(slide_backends.pyautogui, "scroll", lambda n: scrolled["v"].append(n))
+    monkeypatch.setattr(slide_backends.pyautogui, "hscroll", lambda n: scrolled["h"].append(n))
 
     s = SlideService(password="p")
 
@@ -177,7 +179,7 @@ def test_scroll_mouse_error(monkeypatch):
     def _boom(*a, **k):
         raise RuntimeError("scroll failed")
 
-    monkeypatch.setattr(slide_service.pyautogui, "scroll", _boom)
+    monkeypatch.setattr(slide_backends.pyautogui, "scroll", _boom)
 
     s = SlideService(password="p")
     ok, err = s.scroll_mouse(dx=0, dy=1)
@@ -188,8 +190,8 @@ def test_scroll_mouse_error(monkeypatch):
 def test_mouse_down_up_success(monkeypatch):
     called = {"down": 0, "up": 0}
 
-    monkeypatch.setattr(slide_service.pyautogui, "mouseDown", lambda: called.__setitem__("down", called["down"] + 1))
-    monkeypatch.setattr(slide_service.pyautogui, "mouseUp", lambda: called.__setitem__("up", called["up"] + 1))
+    monkeypatch.setattr(slide_backends.pyautogui, "mouseDown", lambda: called.__setitem__("down", called["down"] + 1))
+    monkeypatch.setattr(slide_backends.pyautogui, "mouseUp", lambda: called.__setitem__("up", called["up"] + 1))
 
     s = SlideService(password="p")
     assert s.mouse_down() == (True, None)
@@ -201,7 +203,7 @@ def test_mouse_down_error(monkeypatch):
     def _boom(*a, **k):
         raise RuntimeError("down failed")
 
-    monkeypatch.setattr(slide_service.pyautogui, "mouseDown", _boom)
+    monkeypatch.setattr(slide_backends.pyautogui, "mouseDown", _boom)
 
     s = SlideService(password="p")
     ok, err = s.mouse_down()
@@ -213,7 +215,7 @@ def test_mouse_up_error(monkeypatch):
     def _boom(*a, **k):
         raise RuntimeError("up failed")
 
-    monkeypatch.setattr(slide_service.pyautogui, "mouseUp", _boom)
+    monkeypatch.setattr(slide_backends.pyautogui, "mouseUp", _boom)
 
     s = SlideService(password="p")
     ok, err = s.mouse_up()
@@ -0,0 +1,94 @@
+import importlib
+import threading
+
+import pytest
+
+slide_tokens = importlib.import_module("fcbyk.commands.slide.tokens")
+TokenStore = slide_tokens.TokenStore
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 1000.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_invalid_args():
+    with pytest.raises(ValueError):
+        TokenStore(ttl=0)
+    with pytest.raises(ValueError):
+        TokenStore(max_tokens=0)
+
+
+def test_create_validate_consume():
+    clock = FakeClock()
+    store = TokenStore(ttl=10, clock=clock)
+    token = store.create()
+
+    assert store.is_valid(token)
+    assert not store.is_valid("nope")
+    assert store.consume(token)
+    # 一次性
+    assert not store.consume(token)
+    assert not store.is_valid(token)
+
+
+def test_tokens_expire():
+    clock = FakeClock()
+    store = TokenStore(ttl=10, clock=clock)
+    token = store.create()
+    clock.now += 10
+    assert not store.is_valid(token)
+    assert not store.consume(token)
+
+
+def test_expired_tokens_are_purged_on_create():
+    clock = FakeClock()
+    store = TokenStore(ttl=10, clock=clock)
+    for _ in range(100):
+        clock.now += 1
+        store.create()
+    # 任意时刻最多只有 ttl 秒内创建的令牌
+    assert len(store) == 10
+    assert len(store._heap) <= 2 * 10 + 64
+
+
+def test_max_tokens_evicts_oldest():
+    clock = FakeClock()
+    store = TokenStore(ttl=1000, max_tokens=5, clock=clock)
+    tokens = []
+    for _ in range(8):
+        tokens.append(store.create())
+        clock.now += 1
+    assert len(store) == 5
+    assert not any(store.is_valid(t) for t in tokens[:3])
+    assert all(store.is_valid(t) for t in tokens[3:])
+
+
+def test_consumed_entries_do_not_accumulate_in_heap():
+    clock = FakeClock()
+    store = TokenStore(ttl=1000, clock=clock)
+    for _ in range(1000):
+        assert store.consume(store.create())
+    assert len(store) == 0
+    assert len(store._heap) <= 64 + 1
+
+
+def test_thread_safe_create_and_consume():
+    store = TokenStore(ttl=60, max_tokens=100000)
+    consumed = []
+
+    def worker():
+        for _ in range(500):
+            t = store.create()
+            consumed.append(store.consume(t))
+
+    threads = [threading.Thread(target=worker) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert len(consumed) == 4000 and all(consumed)
+    assert len(store) == 0
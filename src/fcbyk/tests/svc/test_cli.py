@@ -65,3 +65,37 @@ def test_svc_stop_all_no_processes(monkeypatch):
 
     assert result.exit_code == 0
     assert "No tracked processes for any service." in result.output
+
+
+def test_svc_stop_runs_stop_hooks_for_terminated_services(monkeypatch, tmp_path):
+    import json
+
+    import fcbyk.svc as svc_core
+
+    pid_file = tmp_path / "servers-pick-4321.json"
+    pid_file.write_text(json.dumps({"name": "pick", "pid": 4321}), encoding="utf-8")
+    monkeypatch.setattr(svc_core, "_list_pid_files", lambda name=None: [str(pid_file)])
+    monkeypatch.setattr(svc_core, "_process_exists", lambda pid: True)
+    monkeypatch.setattr(svc_core, "_STOP_HOOKS", {})
+    calls = []
+    svc_core.register_stop_hook("pick", lambda: calls.append("pick"))
+    svc_core.register_stop_hook("slide", lambda: calls.append("slide"))
+
+    # 进程没有被结束时不清理
+    monkeypatch.setattr(svc_core, "_force_terminate", lambda pid: False)
+    assert svc_core.stop_by_pid(4321)[0]["status"] == "alive"
+    assert calls == []
+
+    monkeypatch.setattr(svc_core, "_force_terminate", lambda pid: True)
+    assert svc_core.stop_service("pick")[0]["status"] == "terminated"
+    assert calls == ["pick"]
+    assert not pid_file.exists()
+
+
+def test_pick_registers_recovery_cleanup_on_stop():
+    import importlib
+
+    import fcbyk.svc as svc_core
+
+    pick_cli = importlib.import_module("fcbyk.commands.pick.cli")
+    assert pick_cli.service.discard_recovery in svc_core._STOP_HOOKS["pick"]
@@ -0,0 +1,53 @@
+import sys
+import types
+
+import pytest
+
+from fcbyk.utils import asyncmode
+
+
+@pytest.fixture
+def fresh(monkeypatch):
+    monkeypatch.setattr(asyncmode, "_patched", None)
+    monkeypatch.setenv(asyncmode.ASYNC_MODE_ENV, "")
+    monkeypatch.delenv(asyncmode.ASYNC_MODE_ENV)
+    return monkeypatch
+
+
+def test_patch_from_env_does_nothing_by_default(fresh):
+    assert asyncmode.patch_from_env() is None
+    fresh.setenv(asyncmode.ASYNC_MODE_ENV, "threading")
+    assert asyncmode.patch_from_env() is None
+    assert asyncmode.patched_mode() is None
+
+
+def test_patch_from_env_patches_once(fresh):
+    calls = []
+    fresh.setitem(sys.modules, "eventlet", types.SimpleNamespace(monkey_patch=lambda: calls.append(1)))
+    fresh.setenv(asyncmode.ASYNC_MODE_ENV, "eventlet")
+
+    assert asyncmode.patch_from_env() == "eventlet"
+    assert asyncmode.patch_from_env() == "eventlet"
+    assert asyncmode.patched_mode() == "eventlet"
+    assert calls == [1]
+
+
+def test_patch_from_env_missing_dependency(fresh):
+    fresh.setitem(sys.modules, "gevent", None)
+    fresh.setenv(asyncmode.ASYNC_MODE_ENV, "gevent")
+    assert asyncmode.patch_from_env() is None
+
+
+def test_relaunch_sets_env_and_reruns_cli(fresh):
+    seen = {}
+
+    def _execve(path, cmd, env):
+        seen.update(path=path, cmd=cmd, env=env)
+        raise SystemExit(0)
+
+    fresh.setattr(asyncmode.os, "name", "posix")
+    fresh.setattr(asyncmode.os, "execve", _execve)
+    with pytest.raises(SystemExit):
+        asyncmode.relaunch("eventlet", ["slide", "-p", "80"])
+    assert seen["cmd"] == [sys.executable, "-m", "fcbyk.cli", "slide", "-p", "80"]
+    assert seen["env"][asyncmode.ASYNC_MODE_ENV] == "eventlet"
@@ -0,0 +1,68 @@
+import random
+
+import pytest
+
+from fcbyk.utils.histogram import LatencyHistogram
+
+
+def test_invalid_args():
+    with pytest.raises(ValueError):
+        LatencyHistogram(max_value=0)
+    with pytest.raises(ValueError):
+        LatencyHistogram(sub_bucket_bits=1)
+
+
+def test_small_values_are_exact():
+    h = LatencyHistogram(max_value=1000)
+    for v in range(1, 11):
+        h.record(v)
+    assert h.percentile(50) == 5
+    assert h.percentile(100) == 10
+    assert h.percentile(0) == 1
+
+
+def test_empty_histogram():
+    h = LatencyHistogram()
+    assert h.percentile(99) is None
+    s = h.snapshot()
+    assert s["count"] == 0
+    assert s["p99"] is None and s["mean"] is None
+
+
+def test_relative_error_is_bounded():
+    h = LatencyHistogram(max_value=10 ** 7, sub_bucket_bits=5)
+    rng = random.Random(1)
+    values = sorted(rng.randint(1, 10 ** 6) for _ in range(5000))
+    for v in values:
+        h.record(v)
+    for q in (50, 90, 99):
+        exact = values[max(0, int(len(values) * q / 100.0 + 0.999999) - 1)]
+        got = h.percentile(q)
+        assert got >= exact
+        assert (got - exact) / exact <= 1.0 / 16 + 1e-9
+
+
+def test_bucket_count_is_fixed():
+    h = LatencyHistogram(max_value=60 * 1000 * 1000)
+    size = len(h._counts)
+    for v in (0, 1, 10 ** 3, 10 ** 6, 10 ** 9):
+        h.record(v)
+    assert len(h._counts) == size
+    assert size < 500
+
+
+def test_overflow_clamps_and_snapshot_scales():
+    h = LatencyHistogram(max_value=1000)
+    h.record(-5)
+    h.record(500)
+    h.record(5000)
+    s = h.snapshot(scale=0.001)
+    assert s["count"] == 3
+    assert s["overflow"] == 1
+    assert s["min"] == 0.0
+    assert s["max"] == 1.0
+    assert s["p99"] == 1.0
+
+    h.reset()
+    assert h.snapshot()["count"] == 0
+    assert "overflow" not in h.snapshot()
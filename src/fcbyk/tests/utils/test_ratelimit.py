@@ -0,0 +1,56 @@
+"""测试滑动窗口限流"""
+
+from fcbyk.utils.ratelimit import SlidingWindowLimiter
+
+
+class _Clock:
+    def __init__(self):
+        self.now = 100.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_sliding_window_allows_limit_per_window():
+    clock = _Clock()
+    lim = SlidingWindowLimiter(limit=3, window=10, clock=clock)
+
+    for _ in range(3):
+        assert lim.hit("a") == 0
+        clock.now += 1
+    assert lim.hit("a") == 7
+    assert lim.hit("b") == 0
+
+    # 窗口滑动：最早一次放行过期后才释放一个名额
+    clock.now += 6.5
+    assert lim.retry_after("a") == 0.5
+    clock.now += 0.5
+    assert lim.hit("a") == 0
+    assert lim.hit("a") > 0
+
+    stats = lim.stats()
+    assert (stats["allowed"], stats["rejected"], stats["keys"]) == (5, 2, 2)
+
+
+def test_keys_bounded_by_lru_eviction():
+    lim = SlidingWindowLimiter(limit=1, window=60, max_keys=2, clock=_Clock())
+    lim.hit("a")
+    lim.hit("b")
+    lim.retry_after("a")      # 访问 a，使 b 成为最久未使用
+    lim.hit("c")
+
+    assert lim.stats()["keys"] == 2
+    assert lim.stats()["evicted"] == 1
+    assert lim.retry_after("a") > 0
+    assert lim.retry_after("b") == 0
+
+
+def test_reset():
+    lim = SlidingWindowLimiter(limit=1, window=60, clock=_Clock())
+    lim.hit("a")
+    lim.hit("b")
+    lim.reset("a")
+    assert lim.retry_after("a") == 0
+    assert lim.retry_after("b") > 0
+    lim.reset()
+    assert lim.stats()["keys"] == 0
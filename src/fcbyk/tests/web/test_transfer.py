@@ -0,0 +1,67 @@
+"""测试文件下载发送与小文件缓存"""
+
+import os
+
+from flask import Flask
+
+from fcbyk.web.transfer import FileCache, send_path
+
+
+def _write(path, data):
+    path.write_bytes(data)
+    return str(path)
+
+
+def test_cache_hits_and_invalidates_on_change(tmp_path):
+    cache = FileCache(max_bytes=100, max_file_size=50)
+    p = _write(tmp_path / "a.bin", b"x" * 10)
+
+    assert cache.get(p, os.stat(p)) == b"x" * 10
+    assert cache.get(p, os.stat(p)) == b"x" * 10
+    assert (cache.hits, cache.misses) == (1, 1)
+
+    _write(tmp_path / "a.bin", b"y" * 12)
+    assert cache.get(p, os.stat(p)) == b"y" * 12
+    assert cache.stats()["bytes"] == 12
+
+
+def test_cache_bounded_and_skips_large_files(tmp_path):
+    cache = FileCache(max_bytes=25, max_file_size=20)
+    big = _write(tmp_path / "big.bin", b"b" * 21)
+    assert cache.get(big, os.stat(big)) is None
+
+    paths = [_write(tmp_path / ("f%d" % i), bytes([i]) * 10) for i in range(3)]
+    for p in paths:
+        cache.get(p, os.stat(p))
+    stats = cache.stats()
+    assert stats["files"] == 2 and stats["bytes"] == 20
+
+    # 最早的 f0 已被淘汰
+    cache.get(paths[0], os.stat(paths[0]))
+    assert cache.misses == 4
+
+
+def test_send_path_etag_and_range(tmp_path):
+    p = _write(tmp_path / "prize.txt", b"0123456789")
+    cache = FileCache()
+    app = Flask(__name__)
+
+    @app.route("/d")
+    def d():
+        return send_path(p, download_name="奖品.txt", cache=cache)
+
+    c = app.test_client()
+    r = c.get("/d")
+    assert r.status_code == 200
+    assert r.data == b"0123456789"
+    assert "attachment" in r.headers["Content-Disposition"]
+    etag = r.headers["ETag"]
+
+    r = c.get("/d", headers={"If-None-Match": etag})
+    assert r.status_code == 304
+
+    r = c.get("/d", headers={"Range": "bytes=2-5"})
+    assert r.status_code == 206
+    assert r.data == b"2345"
+    assert r.headers["Content-Range"] == "bytes 2-5/10"
+    assert cache.misses == 1 and cache.hits == 2
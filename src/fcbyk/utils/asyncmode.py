@@ -0,0 +1,62 @@
+"""协程补丁（eventlet / gevent）
+
+monkey patch 必须在 socket、threading 等模块被其它模块导入并使用之前完成，
+因此只在进程入口（fcbyk.cli 最先导入本模块）根据环境变量 FCBYK_ASYNC_MODE 执行；
+命令行中选择了协程模式但当前进程未打补丁时，设置该变量后重新启动进程。
+本模块只依赖标准库，不能导入 fcbyk 的其它模块。
+"""
+import os
+import subprocess
+import sys
+from typing import List, Optional
+
+
+ASYNC_MODE_ENV = 'FCBYK_ASYNC_MODE'
+
+# 本进程已打补丁的模式（未打补丁时为 None）
+_patched: Optional[str] = None
+
+
+def patch_from_env() -> Optional[str]:
+    """按 FCBYK_ASYNC_MODE 对标准库打补丁，返回已生效的模式；未设置或不支持的值不做任何事"""
+    global _patched
+    mode = os.environ.get(ASYNC_MODE_ENV)
+    if _patched is not None or mode not in ('eventlet', 'gevent'):
+        return _patched
+    try:
+        if mode == 'eventlet':
+            import eventlet
+            eventlet.monkey_patch()
+        else:
+            from gevent import monkey
+            monkey.patch_all()
+    except ImportError:
+        # 缺少依赖时由命令本身给出提示
+        return None
+    _patched = mode
+    return _patched
+
+
+def patched_mode() -> Optional[str]:
+    return _patched
+
+
+def relaunch(mode: str, argv: Optional[List[str]] = None) -> int:
+    """设置 FCBYK_ASYNC_MODE 后以相同参数重新运行 fcbyk，返回退出码
+
+    POSIX 上直接 exec 替换当前进程（不返回）；Windows 没有真正的 exec，
+    启动子进程并等待其退出（Ctrl+C 同时送达子进程，由子进程自行正常退出）。
+    """
+    env = dict(os.environ)
+    env[ASYNC_MODE_ENV] = mode
+    cmd = [sys.executable, '-m', 'fcbyk.cli'] + list(sys.argv[1:] if argv is None else argv)
+    if os.name == 'posix':
+        sys.stdout.flush()
+        sys.stderr.flush()
+        os.execve(sys.executable, cmd, env)
+    proc = subprocess.Popen(cmd, env=env)
+    while True:
+        try:
+            return proc.wait()
+        except KeyboardInterrupt:
+            continue
@@ -0,0 +1,105 @@
+"""固定大小的 HDR 风格延迟直方图
+
+按 2 的幂划分数量级，每个数量级内再线性划分 2^(sub_bucket_bits-1) 个子桶：
+百分位数（取桶上界）的最大相对误差为 1 / 2^(sub_bucket_bits-1)，默认 5 位即 6.25%；
+桶数只与最大可记录值的位数有关，记录为 O(1)，内存固定。
+"""
+import math
+import threading
+from typing import Dict, Optional
+
+
+class LatencyHistogram:
+    """记录非负整数（通常是微秒）的直方图，线程安全
+
+    超过 max_value 的值按 max_value 记录（并计入 overflow）。
+    """
+
+    def __init__(self, max_value: int = 60 * 1000 * 1000, sub_bucket_bits: int = 5):
+        if max_value <= 0 or sub_bucket_bits < 2:
+            raise ValueError('max_value must be > 0 and sub_bucket_bits >= 2')
+        self.max_value = int(max_value)
+        self._bits = sub_bucket_bits
+        self._sub = 1 << sub_bucket_bits
+        self._half = self._sub >> 1
+        self._counts = [0] * (self._index(self.max_value) + 1)
+        self._lock = threading.Lock()
+        self.count = 0
+        self.total = 0
+        self.min: Optional[int] = None
+        self.max: Optional[int] = None
+        self.overflow = 0
+
+    def _index(self, value: int) -> int:
+        if value < self._sub:
+            return value
+        shift = value.bit_length() - self._bits
+        return self._sub + (shift - 1) * self._half + ((value >> shift) - self._half)
+
+    def _lower_bound(self, index: int) -> int:
+        if index < self._sub:
+            return index
+        shift, offset = divmod(index - self._sub, self._half)
+        return (offset + self._half) << (shift + 1)
+
+    def _upper_bound(self, index: int) -> int:
+        if index < self._sub:
+            return index
+        shift = (index - self._sub) // self._half + 1
+        return self._lower_bound(index) + (1 << shift) - 1
+
+    def record(self, value: int) -> None:
+        value = int(value)
+        if value < 0:
+            value = 0
+        with self._lock:
+            if value > self.max_value:
+                self.overflow += 1
+                value = self.max_value
+            self._counts[self._index(value)] += 1
+            self.count += 1
+            self.total += value
+            if self.min is None or value < self.min:
+                self.min = value
+            if self.max is None or value > self.max:
+                self.max = value
+
+    def percentile(self, q: float) -> Optional[int]:
+        """第 q（0~100）百分位数，返回所在桶的上界（不超过实际最大值）；无数据时返回 None"""
+        with self._lock:
+            if not self.count:
+                return None
+            target = min(max(1, math.ceil(q / 100.0 * self.count)), self.count)
+            seen = 0
+            for i, n in enumerate(self._counts):
+                seen += n
+                if seen >= target:
+                    return min(self._upper_bound(i), self.max)
+            return self.max
+
+    def reset(self) -> None:
+        with self._lock:
+            self._counts = [0] * len(self._counts)
+            self.count = 0
+            self.total = 0
+            self.min = None
+            self.max = None
+            self.overflow = 0
+
+    def snapshot(self, scale: float = 1.0, digits: int = 3) -> Dict:
+        """汇总信息；scale 用于单位换算（例如微秒 -> 毫秒传 0.001）"""
+        def conv(v):
+            return None if v is None else round(v * scale, digits)
+
+        summary = {
+            'count': self.count,
+            'min': conv(self.min),
+            'mean': conv(self.total / self.count) if self.count else None,
+            'p50': conv(self.percentile(50)),
+            'p90': conv(self.percentile(90)),
+            'p99': conv(self.percentile(99)),
+            'max': conv(self.max),
+        }
+        if self.overflow:
+            summary['overflow'] = self.overflow
+        return summary
@@ -0,0 +1,91 @@
+"""滑动窗口限流
+
+每个 key 用一个定长 deque 作为环形缓冲区，记录最近 limit 次放行的时间戳；
+key 数量超过 max_keys 时淘汰最久未访问的 key，总内存上限为 limit * max_keys 个时间戳。
+"""
+import threading
+import time
+from collections import OrderedDict, deque
+from typing import Callable, Hashable
+
+
+class SlidingWindowLimiter:
+    """滑动窗口限流器：任意 window 秒内同一 key 最多放行 limit 次，线程安全"""
+
+    def __init__(
+        self,
+        limit: int,
+        window: float,
+        max_keys: int = 10000,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        if limit <= 0 or window <= 0:
+            raise ValueError('limit and window must be > 0')
+        self.limit = limit
+        self.window = window
+        self.max_keys = max_keys
+        self._clock = clock
+        self._lock = threading.Lock()
+        self._hits: 'OrderedDict[Hashable, deque]' = OrderedDict()
+        self._allowed = 0
+        self._rejected = 0
+        self._evicted = 0
+
+    def _retry_after(self, hits: deque, now: float) -> float:
+        if len(hits) < self.limit:
+            return 0.0
+        return max(hits[0] + self.window - now, 0.0)
+
+    def _get(self, key: Hashable, create: bool):
+        hits = self._hits.get(key)
+        if hits is not None:
+            self._hits.move_to_end(key)
+        elif create:
+            hits = self._hits[key] = deque(maxlen=self.limit)
+            while len(self._hits) > self.max_keys:
+                self._hits.popitem(last=False)
+                self._evicted += 1
+        return hits
+
+    def retry_after(self, key: Hashable) -> float:
+        """距离 key 可以再次放行还需等待的秒数，0 表示当前可放行（不计数）"""
+        with self._lock:
+            hits = self._get(key, create=False)
+            return 0.0 if hits is None else self._retry_after(hits, self._clock())
+
+    def hit(self, key: Hashable) -> float:
+        """尝试放行一次
+
+        Returns:
+            0 表示已放行并计数；否则为需要等待的秒数（本次不计数）。
+        """
+        now = self._clock()
+        with self._lock:
+            hits = self._get(key, create=True)
+            wait = self._retry_after(hits, now)
+            if wait > 0:
+                self._rejected += 1
+                return wait
+            hits.append(now)
+            self._allowed += 1
+            return 0.0
+
+    def reset(self, key: Hashable = None) -> None:
+        """清除某个 key（不传则清除全部）的记录"""
+        with self._lock:
+            if key is None:
+                self._hits.clear()
+            else:
+                self._hits.pop(key, None)
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'limit': self.limit,
+                'window': self.window,
+                'keys': len(self._hits),
+                'max_keys': self.max_keys,
+                'allowed': self._allowed,
+                'rejected': self._rejected,
+                'evicted': self._evicted,
+            }
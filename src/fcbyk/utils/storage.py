@@ -9,7 +9,7 @@
 1. **简单易用**：子命令只关心读/写 JSON 或文本，不再重复做路径拼接。
 2. **无业务逻辑**：不做 default 补齐、不做 CLI 参数合并，那些交给调用者。
 3. **容错安全**：自动创建目录，写文件采用临时文件+原子替换，尽量避免损坏。
-4. **可扩展**：未来可加 YAML / Pickle / SQLite 等读写函数。
+4. **可扩展**：未来可加 YAML / Pickle 等读写函数；SQLite 见 ``connect_sqlite``。
 
 注意：
 - 通用层默认不会“吞掉”用户数据错误。
@@ -36,6 +36,7 @@
 
 import json
 import os
+import sqlite3
 import tempfile
 from typing import Any, Dict, Optional, TypeVar
 
@@ -216,3 +217,24 @@ def write_text(path: str, content: str, *, atomic: bool = True) -> None:
     else:
         with open(path, "w", encoding="utf-8") as f:
             f.write(content)
+
+
+# ----------------------------------------
+# SQLite（适合需要按条读写的大量记录）
+# ----------------------------------------
+
+def connect_sqlite(path: str, *, timeout: float = 30.0) -> sqlite3.Connection:
+    """打开（必要时创建）SQLite 数据库并做统一配置。
+
+    - 自动创建目录。
+    - WAL 模式 + synchronous=NORMAL：单条写入不再整文件重写，读写互不阻塞，
+      允许多个进程同时访问同一个库。
+    - isolation_level=None（autocommit），需要事务时由调用方显式 ``BEGIN``。
+    - check_same_thread=False：连接可跨线程使用，调用方需自行加锁。
+    """
+    _ensure_dir(path)
+    conn = sqlite3.connect(path, timeout=timeout, isolation_level=None, check_same_thread=False)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=%d" % int(timeout * 1000))
+    return conn
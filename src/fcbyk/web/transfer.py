@@ -0,0 +1,119 @@
+"""文件下载发送
+
+统一的下载响应：ETag / Last-Modified / Range（断点续传）由 flask.send_file 处理，
+大文件交给 WSGI file_wrapper 直接发送；小文件读入一个有总容量上限的 LRU 内存缓存，
+同一文件被大量客户端同时下载时只读一次磁盘。
+"""
+import io
+import os
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from flask import send_file
+
+
+class FileCache:
+    """按 (路径, mtime, 大小) 缓存小文件内容，线程安全
+
+    - 只缓存不超过 max_file_size 的文件，总字节数不超过 max_bytes，超出时淘汰最久未使用的文件；
+    - 文件被修改（mtime 或大小变化）后旧内容自动失效；
+    - 同一文件同时未命中时只有一个线程读盘，其它线程等待结果。
+    """
+
+    def __init__(self, max_bytes: int = 64 * 1024 * 1024, max_file_size: int = 8 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self.max_file_size = max_file_size
+        self._lock = threading.Lock()
+        self._entries: 'OrderedDict[str, tuple]' = OrderedDict()   # path -> (key, data)
+        self._loading = {}                                         # path -> threading.Lock
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _lookup(self, path: str, key) -> Optional[bytes]:
+        entry = self._entries.get(path)
+        if entry is not None and entry[0] == key:
+            self._entries.move_to_end(path)
+            self.hits += 1
+            return entry[1]
+        return None
+
+    def _store(self, path: str, key, data: bytes) -> None:
+        old = self._entries.pop(path, None)
+        if old is not None:
+            self._bytes -= len(old[1])
+        self._entries[path] = (key, data)
+        self._bytes += len(data)
+        while self._bytes > self.max_bytes and self._entries:
+            _p, (_k, evicted) = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def get(self, path: str, st: os.stat_result) -> Optional[bytes]:
+        """返回文件内容；文件过大不缓存时返回 None"""
+        if st.st_size > self.max_file_size:
+            return None
+        key = (st.st_mtime_ns, st.st_size)
+        with self._lock:
+            data = self._lookup(path, key)
+            if data is not None:
+                return data
+            loader = self._loading.setdefault(path, threading.Lock())
+
+        with loader:
+            with self._lock:
+                data = self._lookup(path, key)
+                if data is not None:
+                    return data
+                self.misses += 1
+            try:
+                with open(path, 'rb') as f:
+                    data = f.read()
+                # 读取期间文件被改写时不缓存，交给调用方按实际内容发送
+                if len(data) == st.st_size:
+                    with self._lock:
+                        self._store(path, key, data)
+            finally:
+                with self._lock:
+                    self._loading.pop(path, None)
+            return data
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'files': len(self._entries),
+                'bytes': self._bytes,
+                'max_bytes': self.max_bytes,
+                'hits': self.hits,
+                'misses': self.misses,
+            }
+
+
+def make_etag(st: os.stat_result) -> str:
+    return '%x-%x' % (st.st_mtime_ns, st.st_size)
+
+
+def send_path(
+    path: str,
+    download_name: Optional[str] = None,
+    cache: Optional[FileCache] = None,
+    as_attachment: bool = True,
+):
+    """发送文件：支持 If-None-Match / If-Modified-Since（304）与 Range（206）
+
+    命中缓存的小文件从内存发送，其余文件由 send_file 按路径发送。
+    """
+    download_name = download_name or os.path.basename(path)
+    st = os.stat(path)
+    data = cache.get(path, st) if cache is not None else None
+    source = io.BytesIO(data) if data is not None else path
+
+    return send_file(
+        source,
+        as_attachment=as_attachment,
+        download_name=download_name,
+        conditional=True,
+        etag=make_etag(st),
+        last_modified=st.st_mtime,
+        max_age=0,
+    )
@@ -14,7 +14,8 @@ import type {
   AdminClearCodesApiResponse,
   AdminResetCodeApiResponse,
   AdminExportCodesApiResponse,
-  InfoApiResponse
+  InfoApiResponse,
+  FileStatsEvent
 } from './types'
 
 /** 获取启动信息 */
@@ -149,6 +150,52 @@ export async function fetchFiles(): Promise<FileListApiResponse> {
   }
 }
 
+/** 条件请求文件列表：未变化（304）时 data 为 null，用于推送不可用时的降级轮询 */
+export async function fetchFilesIfChanged(etag: string): Promise<{ data: FileListApiResponse | null, etag: string }> {
+  const headers: Record<string, string> = {}
+  if (etag) {
+    headers['If-None-Match'] = etag
+  }
+  const response = await fetch('/api/files', { headers, cache: 'no-store' })
+  const newEtag = response.headers.get('ETag') || etag
+  if (response.status === 304) {
+    return { data: null, etag: newEtag }
+  }
+  const data: FileListApiResponse = await response.json()
+  if (!response.ok) {
+    throw new Error((data as any).error || '加载失败')
+  }
+  return { data, etag: newEtag }
+}
+
+/**
+ * 订阅抽奖事件（SSE），返回取消订阅函数；连接断开后浏览器会自动重连。
+ * 服务端连接数已满（503）时浏览器不会重连，此时调用 onUnavailable，由调用方改为轮询。
+ */
+export function subscribeFileEvents(
+  onStats: (data: FileStatsEvent) => void,
+  onReset: () => void,
+  onUnavailable?: () => void
+): () => void {
+  const source = new EventSource('/api/files/events')
+  source.onerror = () => {
+    if (source.readyState === EventSource.CLOSED) {
+      onUnavailable?.()
+    }
+  }
+  const handle = (e: MessageEvent) => {
+    try {
+      onStats(JSON.parse(e.data) as FileStatsEvent)
+    } catch (error) {
+      console.warn('Bad file event:', error)
+    }
+  }
+  source.addEventListener('stats', handle as EventListener)
+  source.addEventListener('draw', handle as EventListener)
+  source.addEventListener('reset', () => onReset())
+  return () => source.close()
+}
+
 /** 使用抽奖码抽文件 */
 export async function pickFile(code: string): Promise<FilePickApiResponse> {
   try {
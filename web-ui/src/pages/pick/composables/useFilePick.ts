@@ -3,12 +3,15 @@
  */
 
 import { ref, computed } from 'vue'
-import { fetchFiles, pickFile, getFileResult } from '../api'
-import type { FileInfo, FileListApiResponse, HistoryItem, StatusType } from '../types'
+import { fetchFiles, fetchFilesIfChanged, pickFile, getFileResult, subscribeFileEvents } from '../api'
+import type { FileInfo, FileListApiResponse, FileStatsEvent, HistoryItem, StatusType } from '../types'
 
 const HISTORY_KEY = 'file_pick_history'
 const SESSION_KEY = 'file_pick_session'
 const PENDING_RESULT_KEY = 'file_pick_pending_result'
+/** 推送不可用时的轮询间隔 (ms)，以及轮询多少次后重新尝试推送 */
+const POLL_INTERVAL = 5000
+const SSE_RETRY_POLLS = 12
 
 export function useFilePick() {
   // 状态
@@ -26,6 +29,11 @@ export function useFilePick() {
   const totalCodes = ref(0)
   const drawCount = ref(0)
   const sessionId = ref('')
+  const filesVersion = ref(0)
+  let unsubscribe: (() => void) | null = null
+  let pollTimer: any = null
+  let pollCount = 0
+  let filesEtag = ''
 
   // 计算属性
   const hasFiles = computed(() => files.value.length > 0)
@@ -86,6 +94,7 @@ export function useFilePick() {
       totalCodes.value = data.total_codes || 0
       drawCount.value = data.draw_count || 0
       sessionId.value = data.session_id || ''
+      filesVersion.value = data.files_version || 0
 
       // 检查会话是否变化
       const lastSession = localStorage.getItem(SESSION_KEY)
@@ -225,10 +234,80 @@ export function useFilePick() {
     drawSpeed.value = speed
   }
 
+  // 应用服务端推送的计数；文件列表或服务会话变化时重新拉取完整列表
+  function applyStats(data: FileStatsEvent) {
+    if (data.session_id !== sessionId.value || (data.files_version && data.files_version !== filesVersion.value)) {
+      loadFiles()
+      return
+    }
+    mode.value = data.mode || mode.value
+    usedCodes.value = data.used_codes || 0
+    totalCodes.value = data.total_codes || 0
+    drawCount.value = data.draw_count || 0
+  }
+
+  // 订阅推送；浏览器不支持或服务端连接数已满时改为轮询
+  function subscribe() {
+    if (unsubscribe) return
+    if (typeof EventSource === 'undefined') {
+      startPolling()
+      return
+    }
+    unsubscribe = subscribeFileEvents(applyStats, () => loadFiles(), startPolling)
+  }
+
+  function stopSubscription() {
+    if (unsubscribe) {
+      unsubscribe()
+      unsubscribe = null
+    }
+  }
+
+  // 降级轮询：带 If-None-Match 请求 /api/files，未变化时服务端只返回 304
+  function startPolling() {
+    stopSubscription()
+    if (pollTimer) return
+    pollCount = 0
+    pollTimer = setInterval(pollFiles, POLL_INTERVAL)
+  }
+
+  function stopPolling() {
+    if (pollTimer) {
+      clearInterval(pollTimer)
+      pollTimer = null
+    }
+  }
+
+  async function pollFiles() {
+    pollCount++
+    if (pollCount >= SSE_RETRY_POLLS && typeof EventSource !== 'undefined') {
+      // 定期重新尝试推送，名额空出后不再轮询
+      stopPolling()
+      subscribe()
+      return
+    }
+    try {
+      const { data, etag } = await fetchFilesIfChanged(filesEtag)
+      filesEtag = etag
+      if (data) {
+        applyStats(data)
+      }
+    } catch (error) {
+      console.warn('Failed to poll files:', error)
+    }
+  }
+
   // 初始化（需要在组件中调用）
   function init() {
     loadHistory()
     loadFiles()
+    subscribe()
+  }
+
+  // 停止接收推送与轮询（组件卸载时调用）
+  function dispose() {
+    stopSubscription()
+    stopPolling()
   }
 
   return {
@@ -257,6 +336,7 @@ export function useFilePick() {
     setStatus,
     formatSize,
     loadFiles,
+    dispose,
     startDraw,
     completeDraw,
     failDraw,
@@ -29,9 +29,21 @@ export interface FileListApiResponse {
   used_codes?: number
   total_codes?: number
   draw_count?: number
+  files_version?: number
   session_id: string
 }
 
+/** 抽奖事件推送（/api/files/events） */
+export interface FileStatsEvent {
+  mode: 'code' | 'ip'
+  used_codes?: number
+  total_codes?: number
+  draw_count?: number
+  files_version?: number
+  session_id: string
+  file?: string
+}
+
 /** 文件抽奖 API 响应 */
 export interface FilePickApiResponse {
   file: FileInfo
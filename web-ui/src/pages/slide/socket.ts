@@ -5,18 +5,36 @@
 
 import { io, Socket } from 'socket.io-client'
 import { checkAuth } from './api'
+import type { SlideFrame } from './types'
 
 let socket: Socket | null = null
 let latency = 0
 let latencyTimer: any = null
 
+/** 二进制位移帧：version(u8) kind(u8) seq(u16) count(u16) + count × (dx,dy int16)，小端 */
+const MOVE_FRAME_VERSION = 1
+const MOVE_FRAME_KIND = 1
+const MOVE_FRAME_HEADER = 6
+const MOVE_FRAME_MAX_PAIRS = 512
+/** 位移合并发送的间隔 (ms) */
+const MOVE_BATCH_INTERVAL = 32
+const INT16_MAX = 32767
+
+let moveSeq = 0
+let pendingMoves: number[] = []
+let moveBatchTimer: any = null
+
+const frameListeners = new Set<(frame: SlideFrame) => void>()
+let latestFrame: SlideFrame | null = null
+
 /** 初始化 WebSocket 连接 */
 export function initSocket(onConnect?: () => void, onDisconnect?: () => void): Socket {
   if (socket) {
     return socket
   }
 
-  socket = io()
+  // 直接建立 WebSocket，不先走长轮询再升级；连不上时触控板会改用 HTTP 接口
+  socket = io({ transports: ['websocket'] })
 
   socket.on('connect', () => {
     console.log('WebSocket connected')
@@ -30,6 +48,11 @@ export function initSocket(onConnect?: () => void, onDisconnect?: () => void): S
     onDisconnect?.()
   })
 
+  socket.on('slide_frame', (frame: SlideFrame) => {
+    latestFrame = frame
+    frameListeners.forEach((listener) => listener(frame))
+  })
+
   socket.on('connect_error', (error) => {
     console.log('WebSocket connection error:', error)
     // 只有在连接建立失败时检查认证状态
@@ -48,7 +71,8 @@ function startLatencyMeasurement() {
   const measure = () => {
     if (socket && socket.connected) {
       const start = Date.now()
-      socket.emit('ping_server', () => {
+      // 附带上一次测得的延迟，服务端记入 RTT 直方图
+      socket.emit('ping_server', { rtt: latency }, () => {
         latency = Date.now() - start
       })
     }
@@ -89,31 +113,83 @@ export function isConnected(): boolean {
   return socket?.connected ?? false
 }
 
-/** 发送鼠标移动事件 */
+/** 订阅演示屏幕缩略图，已有画面时立即回调一次；返回取消订阅函数 */
+export function onSlideFrame(listener: (frame: SlideFrame) => void): () => void {
+  frameListeners.add(listener)
+  if (latestFrame) {
+    listener(latestFrame)
+  }
+  return () => {
+    frameListeners.delete(listener)
+  }
+}
+
+/** 把待发送的位移打包成一个二进制帧发出 */
+function flushMoveBatch(): void {
+  if (moveBatchTimer) {
+    clearTimeout(moveBatchTimer)
+    moveBatchTimer = null
+  }
+  while (pendingMoves.length > 0) {
+    const pairs = Math.min(pendingMoves.length / 2, MOVE_FRAME_MAX_PAIRS)
+    const buffer = new ArrayBuffer(MOVE_FRAME_HEADER + pairs * 4)
+    const view = new DataView(buffer)
+    view.setUint8(0, MOVE_FRAME_VERSION)
+    view.setUint8(1, MOVE_FRAME_KIND)
+    view.setUint16(2, moveSeq, true)
+    view.setUint16(4, pairs, true)
+    for (let i = 0; i < pairs * 2; i++) {
+      view.setInt16(MOVE_FRAME_HEADER + i * 2, pendingMoves[i], true)
+    }
+    pendingMoves = pendingMoves.slice(pairs * 2)
+    moveSeq = (moveSeq + 1) & 0xffff
+    if (socket && socket.connected) {
+      socket.emit('mouse_move_bin', buffer)
+    }
+  }
+}
+
+/** 发送鼠标移动事件（每 MOVE_BATCH_INTERVAL 毫秒合并成一个二进制帧） */
 export function emitMouseMove(dx: number, dy: number): void {
-  if (socket && socket.connected) {
-    socket.emit('mouse_move', { 
-      dx: Math.round(dx), 
-      dy: Math.round(dy) 
-    })
+  if (!socket || !socket.connected) {
+    return
+  }
+  let x = Math.round(dx)
+  let y = Math.round(dy)
+  if (x === 0 && y === 0) {
+    return
+  }
+  // 超出 int16 的位移拆成多对
+  do {
+    const px = Math.max(-INT16_MAX, Math.min(INT16_MAX, x))
+    const py = Math.max(-INT16_MAX, Math.min(INT16_MAX, y))
+    pendingMoves.push(px, py)
+    x -= px
+    y -= py
+  } while (x !== 0 || y !== 0)
+  if (!moveBatchTimer) {
+    moveBatchTimer = setTimeout(flushMoveBatch, MOVE_BATCH_INTERVAL)
   }
 }
 
 /** 发送鼠标点击事件 */
 export function emitMouseClick(): void {
   if (socket && socket.connected) {
+    flushMoveBatch()
     socket.emit('mouse_click')
   }
 }
 
 export function emitMouseDown(): void {
   if (socket && socket.connected) {
+    flushMoveBatch()
     socket.emit('mouse_down')
   }
 }
 
 export function emitMouseUp(): void {
   if (socket && socket.connected) {
+    flushMoveBatch()
     socket.emit('mouse_up')
   }
 }
@@ -121,6 +197,7 @@ export function emitMouseUp(): void {
 /** 发送鼠标右键事件 */
 export function emitMouseRightClick(): void {
   if (socket && socket.connected) {
+    flushMoveBatch()
     socket.emit('mouse_rightclick')
   }
 }
@@ -128,12 +205,18 @@ export function emitMouseRightClick(): void {
 /** 发送鼠标滚动事件 */
 export function emitMouseScroll(dx: number, dy: number): void {
   if (socket && socket.connected) {
+    flushMoveBatch()
     socket.emit('mouse_scroll', { dx, dy })
   }
 }
 
 /** 断开连接 */
 export function disconnectSocket(): void {
+  if (moveBatchTimer) {
+    clearTimeout(moveBatchTimer)
+    moveBatchTimer = null
+  }
+  pendingMoves = []
   if (socket) {
     socket.disconnect()
     socket = null
@@ -21,6 +21,17 @@ export interface MouseScrollData {
   dy: number
 }
 
+/** 演示屏幕缩略图（服务端以 --capture 启动时推送） */
+export interface SlideFrame {
+  /** 页码，未知（跳到最后一页后）为 null */
+  index: number | null
+  digest: string
+  width: number
+  height: number
+  /** JPEG 数据 */
+  image: ArrayBuffer
+}
+
 /** 触摸状态 */
 export interface TouchState {
   count: number